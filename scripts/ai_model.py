@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Learned AI-Commit Classifier
+Optional alternative to the hand-weighted rule score: a logistic regression over hashed word unigrams and
+bigrams of the commit message, trained offline on a labelled CSV with NumPy. Whole batches of messages are
+tokenized with one regex pass and scored with array operations, on CPU and without any network access.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_signals import LIKELY_AI_THRESHOLD, score_many
+from commit_store import CommitStore, DEFAULT_STORE_PATH
+
+DEFAULT_BUCKETS = 1 << 20
+# Model probability -> ai_likelihood_score; a probability of 0.5 lands exactly on LIKELY_AI_THRESHOLD
+SCORE_SCALE = 2 * LIKELY_AI_THRESHOLD
+
+TOKEN = re.compile(r"[a-z0-9]+|[^\sa-z0-9]")
+# Joins a batch of messages into one string; its token marks where one message ends
+SEPARATOR = '\x00'
+BIGRAM_MULTIPLIER = 1000003
+# Distinct tokens remembered before the token -> bucket memo is reset
+MAX_MEMO_TOKENS = 1 << 20
+
+POSITIVE_LABELS = {'1', 'true', 'yes', 'ai', 'ai-assisted'}
+NEGATIVE_LABELS = {'0', 'false', 'no', 'human'}
+
+class TokenBuckets(dict):
+    """Token -> hashed feature bucket; crc32 is stable across processes, unlike hash()"""
+
+    def __init__(self, buckets: int):
+        super().__init__()
+        self.buckets = buckets
+        self[SEPARATOR] = -1
+
+    def __missing__(self, token: str) -> int:
+        if len(self) > MAX_MEMO_TOKENS:
+            self.clear()
+            self[SEPARATOR] = -1
+        bucket = self[token] = zlib.crc32(token.encode()) % self.buckets
+        return bucket
+
+class HashedNgramModel:
+    def __init__(self, weights, bias: float = 0.0):
+        """Logistic regression over len(weights) hashed unigram + bigram buckets"""
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.buckets = len(self.weights)
+        self._token_buckets = TokenBuckets(self.buckets)
+
+    @property
+    def version(self) -> str:
+        digest = hashlib.sha256(self.weights.tobytes())
+        digest.update(repr(self.bias).encode())
+        return digest.hexdigest()[:12]
+
+    def features(self, texts: List[str]) -> Tuple:
+        """
+        Sparse feature matrix of a batch as (rows, columns, values): unigram and bigram buckets of every
+        message, each weighted by 1/sqrt(features in its message)
+        """
+        joined = SEPARATOR.join(texts).lower()
+        if joined.count(SEPARATOR) != max(len(texts) - 1, 0):
+            joined = SEPARATOR.join(text.replace(SEPARATOR, ' ') for text in texts).lower()
+
+        tokens = TOKEN.findall(joined)
+        ids = np.fromiter(map(self._token_buckets.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        separators = ids < 0
+        rows = np.cumsum(separators)
+        words = ~separators
+
+        pairs = words[:-1] & words[1:]
+        bigrams = (ids[:-1][pairs] * BIGRAM_MULTIPLIER + ids[1:][pairs]) % self.buckets
+
+        columns = np.concatenate([ids[words], bigrams])
+        rows = np.concatenate([rows[words], rows[:-1][pairs]])
+        counts = np.bincount(rows, minlength=len(texts))
+        values = 1.0 / np.sqrt(counts[rows])
+        return rows, columns, values
+
+    def logits(self, texts: List[str]):
+        rows, columns, values = self.features(texts)
+        return self.bias + np.bincount(rows, weights=self.weights[columns] * values, minlength=len(texts))
+
+    def probabilities(self, texts: Iterable[str]):
+        texts = [text or '' for text in texts]
+        if not texts:
+            return np.zeros(0)
+        return 1.0 / (1.0 + np.exp(-self.logits(texts)))
+
+    def scores(self, texts: Iterable[str]) -> List[float]:
+        """ai_likelihood_score per text on the rule score's scale (LIKELY_AI_THRESHOLD at probability 0.5)"""
+        return np.round(SCORE_SCALE * self.probabilities(texts), 2).tolist()
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, weights=self.weights, bias=np.array([self.bias]))
+
+def load_model(path: str) -> HashedNgramModel:
+    with np.load(path) as saved:
+        return HashedNgramModel(saved['weights'], float(saved['bias'][0]))
+
+def train(texts: List[str], labels: List[int], buckets: int = DEFAULT_BUCKETS, epochs: int = 300,
+          learning_rate: float = 0.05, l2: float = 1e-6) -> HashedNgramModel:
+    """
+    Fit by full-batch Adam on the logistic loss, with classes weighted to equal total weight
+    (AI-assisted commits are usually a small minority)
+    """
+    model = HashedNgramModel(np.zeros(buckets, dtype=np.float32))
+    texts = [text or '' for text in texts]
+    rows, columns, values = model.features(texts)
+    y = np.asarray(labels, dtype=np.float64)
+    n = len(y)
+
+    positives = y.sum()
+    sample_weight = np.where(y == 1, n / (2 * max(positives, 1)), n / (2 * max(n - positives, 1))) / n
+
+    weights = np.zeros(buckets)
+    bias = 0.0
+    moments = [np.zeros(buckets), np.zeros(buckets), 0.0, 0.0]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+    for step in range(1, epochs + 1):
+        z = bias + np.bincount(rows, weights=weights[columns] * values, minlength=n)
+        error = (1.0 / (1.0 + np.exp(-z)) - y) * sample_weight
+        grad_w = np.bincount(columns, weights=error[rows] * values, minlength=buckets) + l2 * weights
+        grad_b = error.sum()
+
+        moments[0] = beta1 * moments[0] + (1 - beta1) * grad_w
+        moments[1] = beta2 * moments[1] + (1 - beta2) * grad_w ** 2
+        moments[2] = beta1 * moments[2] + (1 - beta1) * grad_b
+        moments[3] = beta2 * moments[3] + (1 - beta2) * grad_b ** 2
+        correction1, correction2 = 1 - beta1 ** step, 1 - beta2 ** step
+        weights -= learning_rate * (moments[0] / correction1) / (np.sqrt(moments[1] / correction2) + eps)
+        bias -= learning_rate * (moments[2] / correction1) / (np.sqrt(moments[3] / correction2) + eps)
+
+    return HashedNgramModel(weights, bias)
+
+def read_labelled_csv(path: str, text_column: str = 'message', label_column: str = 'label') -> Tuple[List[str], List[int]]:
+    """Messages and 0/1 labels from a CSV; rows with an unrecognized label are skipped"""
+    texts, labels, skipped = [], [], 0
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            label = (row.get(label_column) or '').strip().lower()
+            if label in POSITIVE_LABELS:
+                labels.append(1)
+            elif label in NEGATIVE_LABELS:
+                labels.append(0)
+            else:
+                skipped += 1
+                continue
+            texts.append(row.get(text_column) or '')
+    if skipped:
+        print(f"Skipped {skipped} rows without a 0/1 label in '{label_column}'")
+    return texts, labels
+
+def evaluate(predicted: List[bool], labels: List[int]) -> Dict:
+    true_positive = sum(1 for p, y in zip(predicted, labels) if p and y)
+    predicted_positive = sum(1 for p in predicted if p)
+    positive = sum(labels)
+    correct = sum(1 for p, y in zip(predicted, labels) if bool(p) == bool(y))
+    return {
+        'accuracy': correct / len(labels) if labels else 0,
+        'precision': true_positive / predicted_positive if predicted_positive else 0,
+        'recall': true_positive / positive if positive else 0
+    }
+
+def train_command(args) -> int:
+    texts, labels = read_labelled_csv(args.csv, args.text_column, args.label_column)
+    if len(set(labels)) < 2:
+        print("The CSV needs both AI-assisted and other commits to train on")
+        return 1
+    print(f"Training on {len(texts):,} commit messages ({sum(labels):,} AI-assisted)...")
+
+    # Hold out a fifth to compare with the rule score, then fit the saved model on everything
+    order = list(range(len(texts)))
+    random.Random(0).shuffle(order)
+    cut = len(order) // 5
+    held_out, training = order[:cut], order[cut:]
+    if held_out:
+        model = train([texts[i] for i in training], [labels[i] for i in training], args.buckets, args.epochs)
+        held_texts, held_labels = [texts[i] for i in held_out], [labels[i] for i in held_out]
+        learned = evaluate([score >= LIKELY_AI_THRESHOLD for score in model.scores(held_texts)], held_labels)
+        rules = evaluate([indicators['likely_ai_assisted'] for indicators in score_many(held_texts)], held_labels)
+        print(f"Held-out {len(held_out):,} messages:")
+        for name, metrics in (('model', learned), ('rules', rules)):
+            print(f"  {name}: accuracy {metrics['accuracy']:.1%}, precision {metrics['precision']:.1%}, "
+                  f"recall {metrics['recall']:.1%}")
+
+    started = time.monotonic()
+    model = train(texts, labels, args.buckets, args.epochs)
+    model.save(args.output)
+    print(f"Model {model.version} trained in {time.monotonic() - started:.1f}s and saved to {args.output}")
+    print(f"Use it with --ai-model {args.output}")
+    return 0
+
+def score_command(args) -> int:
+    model = load_model(args.model)
+    store = CommitStore(args.commit_store)
+    writer = None
+    output = open(args.output, 'w', newline='') if args.output else None
+    if output:
+        writer = csv.writer(output)
+        writer.writerow(['org', 'repo', 'sha', 'ai_likelihood_score'])
+
+    scored = likely = 0
+    elapsed = 0.0
+    for batch in store.iter_messages(args.org, args.batch_size):
+        started = time.monotonic()
+        scores = model.scores(row['message'] for row in batch)
+        elapsed += time.monotonic() - started
+
+        scored += len(batch)
+        likely += sum(1 for score in scores if score >= LIKELY_AI_THRESHOLD)
+        if writer:
+            writer.writerows((row['org'], row['repo'], row['sha'], score) for row, score in zip(batch, scores))
+    store.close()
+    if output:
+        output.close()
+
+    print(f"Model {model.version}: {scored:,} commits scored, {likely:,} likely AI-assisted")
+    if scored and elapsed > 0:
+        print(f"Scoring throughput: {scored / elapsed:,.0f} messages/s")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Train or apply the learned AI-commit classifier')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='Fit a model on a labelled CSV of commit messages')
+    train_parser.add_argument('--csv', required=True, help='CSV with a message column and a 0/1 label column')
+    train_parser.add_argument('--text-column', default='message')
+    train_parser.add_argument('--label-column', default='label')
+    train_parser.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS, help='Hashed feature buckets')
+    train_parser.add_argument('--epochs', type=int, default=300)
+    train_parser.add_argument('--output', default='ai_model.npz', help='Where to save the model')
+
+    score_parser = commands.add_parser('score', help='Score every commit in the local commit store')
+    score_parser.add_argument('--model', required=True, help='Model saved by the train command')
+    score_parser.add_argument('--commit-store', default=DEFAULT_STORE_PATH,
+                              help=f'SQLite commit store (default: {DEFAULT_STORE_PATH})')
+    score_parser.add_argument('--org', help='Only commits of this organization (default: all)')
+    score_parser.add_argument('--batch-size', type=int, default=100000, help='Messages scored per batch')
+    score_parser.add_argument('--output', help='Also write org, repo, sha, score rows to this CSV')
+
+    args = parser.parse_args()
+    return train_command(args) if args.command == 'train' else score_command(args)
+
+if __name__ == '__main__':
+    exit(main())
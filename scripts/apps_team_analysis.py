@@ -9,11 +9,17 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from individual_developer_analyzer import IndividualDeveloperAnalyzer
+from github_client import add_cache_arguments, configure_cache_from_args
 from get_team_members import get_team_members
-from datetime import datetime
+from datetime import datetime, timedelta
+import argparse
 import json
 
 def main():
+    parser = argparse.ArgumentParser(description='Analyze the last 90 days of all apps-team members')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     print("🔍 Apps Team Individual Analysis - Last 90 Days")
     print("=" * 60)
     
@@ -22,9 +28,10 @@ def main():
     # Get apps-team members
     print("Fetching apps-team members...")
     usernames = get_team_members(
-        analyzer.config['github']['token'],
+        analyzer.config['github'].get('token'),
         analyzer.config['github']['organization'],
-        'apps-team'
+        'apps-team',
+        client=analyzer.client
     )
     
     if not usernames:
@@ -33,6 +40,9 @@ def main():
     
     print(f"\n🎯 Analyzing {len(usernames)} apps-team members...")
     
+    # List each repository once instead of once per developer
+    analyzer.load_team_commits([(datetime.now() - timedelta(days=90), None)])
+    
     all_user_data = []
     
     for username in usernames:
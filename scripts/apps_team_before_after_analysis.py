@@ -9,8 +9,12 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from individual_developer_analyzer import IndividualDeveloperAnalyzer
+from github_client import changed_files_count, split_by_period, add_cache_arguments, configure_cache_from_args
+from commit_store import utc_timestamp
 from get_team_members import get_team_members
+from ai_signals import score_commit
 from datetime import datetime, timedelta
+import argparse
 import json
 
 class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
@@ -34,9 +38,15 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
         print(f"   Before: {before_start.strftime('%Y-%m-%d')} to {before_end.strftime('%Y-%m-%d')} ({weeks_before} weeks)")
         print(f"   After:  {after_start.strftime('%Y-%m-%d')} to {after_end.strftime('%Y-%m-%d')} ({weeks_after} weeks)")
         
-        # Analyze both periods
-        before_data = self.analyze_user_period(username, before_start, before_end, "BEFORE")
-        after_data = self.analyze_user_period(username, after_start, after_end, "AFTER")
+        # Fetch each repository once for the whole span, then analyze both periods from it
+        periods = [(before_start, before_end), (after_start, after_end)]
+        commits_by_period = [{}, {}]
+        for repo in self.repositories_for_user(username, before_start, after_end):
+            for index, commits in enumerate(self.get_commits_for_user_periods(repo, username, periods)):
+                commits_by_period[index][repo] = commits
+        
+        before_data = self.analyze_user_period(username, before_start, before_end, "BEFORE", commits_by_period[0])
+        after_data = self.analyze_user_period(username, after_start, after_end, "AFTER", commits_by_period[1])
         
         # Calculate improvements
         comparison = self.calculate_improvements(username, before_data, after_data, weeks_before, weeks_after)
@@ -59,8 +69,8 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
             'comparison': comparison
         }
 
-    def analyze_user_period(self, username, start_date, end_date, period_name):
-        """Analyze a user's activity for a specific period"""
+    def analyze_user_period(self, username, start_date, end_date, period_name, commits_by_repo=None):
+        """Analyze a user's activity for a specific period (from already fetched commits per repo, if given)"""
         
         print(f"      📊 {period_name} period...")
         
@@ -71,11 +81,16 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
             'total_changes': 0,
             'files_changed': 0,
             'repositories': {},
-            'ai_indicators': 0
+            'ai_indicators': 0,
+            'sampling': {'detail_calls': 0, 'calls_saved': 0}
         }
         
-        for repo in self.repositories:
-            commits = self.get_commits_for_user_period(repo, username, start_date, end_date)
+        repos = list(commits_by_repo) if commits_by_repo is not None else self.repositories
+        for repo in repos:
+            if commits_by_repo is not None:
+                commits = commits_by_repo.get(repo, [])
+            else:
+                commits = self.get_commits_for_user_period(repo, username, start_date, end_date)
             if not commits:
                 continue
                 
@@ -87,21 +102,26 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
                 'files_changed': 0
             }
             
-            # Get detailed stats for up to 15 commits per repo per period
-            for i, commit in enumerate(commits[:15]):
-                details = self.get_commit_details(repo, commit['sha'])
+            # Get detailed stats per repo per period until the estimate converges
+            sampled, details_by_sha, sampling = self.sample_commits(repo, commits)
+            for commit in sampled:
+                details = details_by_sha.get(commit['sha'])
                 if details and 'stats' in details:
                     stats = details['stats']
                     repo_stats['additions'] += stats.get('additions', 0)
                     repo_stats['deletions'] += stats.get('deletions', 0)
                     repo_stats['total_changes'] += stats.get('total', 0)
-                    repo_stats['files_changed'] += len(details.get('files', []))
+                    repo_stats['files_changed'] += changed_files_count(details)
                     
                     # Check for AI indicators
-                    message = commit['commit']['message'].lower()
-                    if any(keyword in message for keyword in ['copilot', 'ai-generated', 'ai-assisted', 'auto-generated']):
+                    if score_commit(commit)['likely_ai_assisted']:
                         period_data['ai_indicators'] += 1
             
+            # Line totals cover every commit, extrapolated from the sampled ones
+            self.extrapolate(repo_stats, sampling, ['additions', 'deletions', 'total_changes', 'files_changed'])
+            period_data['sampling']['detail_calls'] += sampling['fetched']
+            period_data['sampling']['calls_saved'] += sampling['calls_saved']
+            
             period_data['repositories'][repo] = repo_stats
             period_data['commits'] += repo_stats['commits']
             period_data['additions'] += repo_stats['additions']
@@ -109,40 +129,40 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
             period_data['total_changes'] += repo_stats['total_changes']
             period_data['files_changed'] += repo_stats['files_changed']
         
-        print(f"         {period_data['commits']} commits, {period_data['total_changes']:,} changes")
+        print(f"         {period_data['commits']} commits, {period_data['total_changes']:,} changes "
+              f"({period_data['sampling']['detail_calls']} detail calls, {period_data['sampling']['calls_saved']} saved)")
         return period_data
 
     def get_commits_for_user_period(self, repo, username, start_date, end_date):
         """Get commits for a user in a specific date range"""
-        url = f"https://api.github.com/repos/{self.org}/{repo}/commits"
-        params = {
-            'author': username,
-            'since': start_date.isoformat(),
-            'until': end_date.isoformat(),
-            'per_page': 100
-        }
+        team = self.team_commits_for(repo, username, start_date, end_date)
+        if team is not None:
+            return team[:100]
         
-        all_commits = []
-        page = 1
+        if self.user_discovery == 'search':
+            return self.search_user_commits(username, start_date, end_date).get(repo, [])[:100]
         
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            if len(all_commits) > 100:  # Reasonable limit
-                break
-                
-        return all_commits
+        return self.client.list_commits(
+            self.org, repo, start_date.isoformat(), end_date.isoformat(), author=username,
+            backend=self.commit_backend, max_items=100, description=f"commits for {username}"  # Reasonable limit
+        )
+
+    def get_commits_for_user_periods(self, repo, username, periods):
+        """Get a user's commits for several (start, end) periods with one fetch of the whole span"""
+        team = [self.team_commits_for(repo, username, start, end) for start, end in periods]
+        if all(commits is not None for commits in team):
+            return [commits[:100] for commits in team]
+        
+        if self.user_discovery == 'search':
+            span_start, span_end = min(start for start, _ in periods), max(end for _, end in periods)
+            found = self.search_user_commits(username, span_start, span_end).get(repo, [])
+            periods = [(utc_timestamp(start.isoformat()), utc_timestamp(end.isoformat())) for start, end in periods]
+            return [commits[:100] for commits in split_by_period(found, periods)]
+        
+        return self.client.list_commits_for_periods(
+            self.org, repo, [(start.isoformat(), end.isoformat()) for start, end in periods], author=username,
+            backend=self.commit_backend, max_items=100, description=f"commits for {username}"  # Reasonable limit per period
+        )
 
     def calculate_improvements(self, username, before, after, weeks_before, weeks_after):
         """Calculate percentage improvements between before and after periods"""
@@ -239,6 +259,10 @@ class BeforeAfterAnalyzer(IndividualDeveloperAnalyzer):
                     print(f"  {repo}: {before_commits} → {after_commits} commits ({change_pct:+.0f}%)")
 
 def main():
+    parser = argparse.ArgumentParser(description='Compare apps-team productivity before/after AI adoption')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     print("🔍 Apps Team Before/After AI Adoption Analysis")
     print("=" * 60)
     
@@ -247,9 +271,10 @@ def main():
     # Get apps-team members
     print("Fetching apps-team members...")
     usernames = get_team_members(
-        analyzer.config['github']['token'],
+        analyzer.config['github'].get('token'),
         analyzer.config['github']['organization'],
-        'apps-team'
+        'apps-team',
+        client=analyzer.client
     )
     
     if not usernames:
@@ -259,6 +284,12 @@ def main():
     print(f"\n🎯 Analyzing {len(usernames)} developers before/after AI adoption...")
     print(f"AI Adoption Date: {analyzer.ai_adoption_date.strftime('%Y-%m-%d')}")
     
+    # List each repository once for both periods instead of once per developer
+    analyzer.load_team_commits([
+        (analyzer.ai_adoption_date - timedelta(weeks=8), analyzer.ai_adoption_date),
+        (analyzer.ai_adoption_date, analyzer.ai_adoption_date + timedelta(weeks=8))
+    ])
+    
     all_analyses = []
     team_improvements = {
         'commits_improvement_pct': [],
@@ -361,5 +392,4 @@ def main():
     print(f"\n💾 Detailed results saved to: {output_file}")
 
 if __name__ == '__main__':
-    import requests
     main()
\ No newline at end of file
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+AI Signal Backfill
+Classifies every commit in the local commit store that has no AI-signal score under the current ruleset,
+in bulk, so later analyses read saved scores instead of re-scanning messages
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from commit_store import CommitStore, DEFAULT_STORE_PATH
+from ai_signals import backfill_scores, RULESET_VERSION
+
+def main():
+    parser = argparse.ArgumentParser(description='Score stored commits with the current AI-signal rules')
+    parser.add_argument('--commit-store', default=DEFAULT_STORE_PATH,
+                        help=f'SQLite commit store to backfill (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--org', help='Only commits of this organization (default: all)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Commits classified per batch')
+    args = parser.parse_args()
+
+    store = CommitStore(args.commit_store)
+    print(f"Backfilling AI-signal scores (ruleset {RULESET_VERSION})...")
+    started = time.monotonic()
+    scored = backfill_scores(store, args.org, args.batch_size)
+    elapsed = time.monotonic() - started
+    print(f"Classified {scored:,} commits in {elapsed:.1f}s"
+          + (f" ({scored / elapsed:,.0f}/s)" if scored and elapsed > 0 else ""))
+    store.close()
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Run Checkpoints
+Saves each finished unit of a collection run (stage x repository x window) to disk, so a run that dies
+partway - an exception, an interrupt, an exhausted rate limit - can be resumed without refetching
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Any, Optional, Sequence
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ai-impact-insights', 'checkpoints')
+
+def run_id(*parts: Any) -> str:
+    """Stable identifier for a run from everything that determines its results (JSON-serializable parts)"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class RunCheckpoints:
+    def __init__(self, checkpoint_dir: str, run: str, resume: bool = False):
+        """
+        Checkpoints for one run under checkpoint_dir/run
+        Without resume, checkpoints left by an earlier attempt at the same run are discarded.
+        """
+        self.path = os.path.join(checkpoint_dir, run)
+        self.resume = resume
+        self._lock = threading.Lock()
+        self.loaded = 0
+        self.saved = 0
+
+        if not resume and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def unit_path(self, stage: str, repo: str, window: Sequence[str]) -> str:
+        key = json.dumps([stage, repo, list(window)])
+        readable = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{stage}-{repo}-{window[0][:10]}")
+        return os.path.join(self.path, f"{readable}-{hashlib.sha256(key.encode()).hexdigest()[:12]}.json")
+
+    def load(self, stage: str, repo: str, window: Sequence[str]) -> Optional[Any]:
+        """The saved result of a finished unit, or None if it has to be (re)done"""
+        if not self.resume:
+            return None
+        try:
+            with open(self.unit_path(stage, repo, window), 'r') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.loaded += 1
+        return value
+
+    def save(self, stage: str, repo: str, window: Sequence[str], value: Any):
+        """Record a finished unit; written atomically so an interrupted write never looks finished"""
+        path = self.unit_path(stage, repo, window)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(value, f, default=str)
+        os.replace(temp_path, path)
+        with self._lock:
+            self.saved += 1
+
+    def clear(self):
+        """Drop this run's checkpoints once its results are safely written"""
+        shutil.rmtree(self.path, ignore_errors=True)
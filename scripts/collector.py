@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Background Collector
+Long-running process that keeps the local commit store warm: commits and their line stats, pull requests,
+issues, team rosters, Copilot seats and AI-signal scores are refreshed on an interval, so the analyzers
+can run with --offline against local data instead of downloading everything again
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import (client_for_config, add_cache_arguments, configure_cache_from_args,
+                           DEFAULT_MAX_WORKERS, DEFAULT_REPO_WORKERS)
+from incremental_sync import sync_commits, sync_items, ITEM_KINDS
+from get_team_members import get_team_members
+from ai_signals import backfill_scores
+
+DEFAULT_INTERVAL_MINUTES = 15
+DEFAULT_HISTORY_DAYS = 180
+# Commit details fetched per repository per cycle; the rest are picked up on later cycles
+DEFAULT_DETAILS_PER_CYCLE = 1000
+
+class Collector:
+    def __init__(self, config: Dict, history_days: int = DEFAULT_HISTORY_DAYS,
+                 details_per_cycle: int = DEFAULT_DETAILS_PER_CYCLE):
+        """Collect everything for the repositories and teams in a config file's 'github' / 'collector' sections"""
+        github = config['github']
+        collector = config.get('collector', {})
+
+        self.client = client_for_config(github)
+        self.org = github['organization']
+        self.repositories = github['repositories']
+        self.teams: List[str] = collector.get('teams', [])
+        self.commit_backend = github.get('commit_backend', 'rest')
+        self.max_workers = github.get('max_workers', DEFAULT_MAX_WORKERS)
+        self.repo_workers = github.get('repo_workers', DEFAULT_REPO_WORKERS)
+        self.history_days = history_days
+        self.details_per_cycle = details_per_cycle
+
+    def since(self) -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=self.history_days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def collect_repository(self, repo: str) -> Dict:
+        """Bring one repository's commits, commit details, pull requests and issues up to date"""
+        since = self.since()
+        counts = {'commits': sync_commits(self.client, self.org, repo, since, self.commit_backend)}
+
+        missing = self.client.store.missing_stats(self.org, repo, since, limit=self.details_per_cycle)
+        details = self.client.get_commits_batch(self.org, repo, missing, max_workers=self.max_workers)
+        counts['details'] = len(details)
+
+        for kind in ITEM_KINDS:
+            counts[kind] = sync_items(self.client, self.org, repo, kind, since)
+        return counts
+
+    def collect_org(self) -> Dict:
+        """Refresh the org-level snapshots: team rosters and Copilot seats"""
+        counts = {}
+        for team in self.teams:
+            counts[f"team {team}"] = len(get_team_members(None, self.org, team, client=self.client))
+        seats = self.client.list_copilot_seats(self.org)
+        counts['copilot seats'] = len(seats) if seats is not None else 'unavailable'
+        return counts
+
+    async def run_cycle(self, executor: ThreadPoolExecutor):
+        """One collection pass; repositories run concurrently, repo_workers at a time"""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        jobs = {repo: loop.run_in_executor(executor, self.collect_repository, repo) for repo in self.repositories}
+        jobs['(organization)'] = loop.run_in_executor(executor, self.collect_org)
+
+        results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+        for name, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"  {name}: failed - {result!r}")
+            else:
+                print(f"  {name}: " + ', '.join(f"{count} {kind}" for kind, count in result.items()))
+        scored = await loop.run_in_executor(executor, backfill_scores, self.client.store, self.org)
+        print(f"  AI signals: {scored} commits classified")
+        print(f"Cycle finished in {time.monotonic() - started:.0f}s")
+
+    async def run(self, interval_minutes: float, once: bool = False):
+        """Collect every interval_minutes until interrupted (SIGINT / SIGTERM stop after the current wait)"""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on this platform; Ctrl+C still ends the process
+
+        with ThreadPoolExecutor(max_workers=max(1, self.repo_workers)) as executor:
+            while not stop.is_set():
+                print(f"\n[{datetime.now().isoformat(timespec='seconds')}] Collecting {len(self.repositories)} "
+                      f"repositories from {self.since()[:10]}...")
+                await self.run_cycle(executor)
+                if once:
+                    break
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=interval_minutes * 60)
+                except asyncio.TimeoutError:
+                    pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the local commit store current for offline analysis')
+    parser.add_argument('--config', default='config.json', help='Configuration file path')
+    parser.add_argument('--interval', type=float, default=None,
+                        help=f'Minutes between collection cycles (default: collector.interval_minutes or {DEFAULT_INTERVAL_MINUTES})')
+    parser.add_argument('--history-days', type=int, default=None,
+                        help=f'How far back to keep data (default: collector.history_days or {DEFAULT_HISTORY_DAYS})')
+    parser.add_argument('--once', action='store_true', help='Run a single collection cycle and exit')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    if args.offline:
+        parser.error('the collector is what fills the store - it cannot run --offline')
+    configure_cache_from_args(args)
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+
+    settings = config.get('collector', {})
+    interval = args.interval if args.interval is not None else settings.get('interval_minutes', DEFAULT_INTERVAL_MINUTES)
+    history_days = args.history_days if args.history_days is not None else settings.get('history_days', DEFAULT_HISTORY_DAYS)
+
+    collector = Collector(config, history_days, settings.get('details_per_cycle', DEFAULT_DETAILS_PER_CYCLE))
+    if collector.client.store is None:
+        print("The collector needs the commit store - remove --no-commit-store")
+        return 1
+
+    asyncio.run(collector.run(interval, once=args.once))
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
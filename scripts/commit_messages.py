@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Commit Message Parser
+Splits a commit message into subject, body and git trailers (Co-authored-by, Generated-by, ...) in one
+pass, and tells bot accounts apart from developers, for the classifier and the per-developer statistics
+"""
+
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# "Key: value" as git interpret-trailers accepts it
+TRAILER_LINE = re.compile(r'([A-Za-z0-9][A-Za-z0-9-]*)[ \t]*:[ \t]*(.*)')
+
+# Accounts that act for an automation without the "[bot]" suffix (Copilot's coding agent commits as "Copilot")
+BOT_LOGINS = frozenset({'copilot', 'github-actions', 'web-flow'})
+
+# Bump whenever parse_message / parse_trailers or the bot checks change what they return; it is part of
+# the AI-signal ruleset version, so saved classifications are redone
+PARSER_VERSION = 1
+
+class ParsedMessage(NamedTuple):
+    subject: str
+    body: str
+    # (lower-cased key, value) in message order
+    trailers: Tuple[Tuple[str, str], ...]
+    # The whole message lower-cased once, for keyword matching
+    lowered: str
+
+    def trailer_values(self, key: str) -> Tuple[str, ...]:
+        return tuple(value for name, value in self.trailers if name == key)
+
+def parse_trailers(paragraph: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """The trailers of a message's last paragraph, or None if it is not a trailer block"""
+    trailers = []
+    for line in paragraph.split('\n'):
+        if line[:1] in (' ', '\t') and trailers:
+            # Continuation of the previous trailer's value
+            key, value = trailers[-1]
+            trailers[-1] = (key, f"{value} {line.strip()}")
+            continue
+        match = TRAILER_LINE.match(line)
+        if not match:
+            return None
+        trailers.append((match.group(1).lower(), match.group(2).strip()))
+    return tuple(trailers)
+
+def parse_message(message: str) -> ParsedMessage:
+    """Subject (first line), body and trailers (a last paragraph made only of "Key: value" lines)"""
+    if not message:
+        return ParsedMessage('', '', (), '')
+    if '\r' in message:
+        message = message.replace('\r\n', '\n')
+
+    subject, _, rest = message.strip().partition('\n')
+    rest = rest.strip()
+    body, trailers = rest, ()
+    head, _, last = rest.rpartition('\n\n')
+    if ':' in last:
+        parsed = parse_trailers(last)
+        if parsed:
+            body, trailers = head.rstrip(), parsed
+
+    return ParsedMessage(subject.strip(), body, trailers, message.lower())
+
+def author_login(commit: Dict) -> Optional[str]:
+    """GitHub login of a commit's author, None when the author email is not linked to an account"""
+    author = commit.get('author')
+    return author.get('login') if isinstance(author, dict) else None
+
+def is_bot_login(login: Optional[str]) -> bool:
+    return bool(login) and (login.endswith('[bot]') or login.lower() in BOT_LOGINS)
+
+def is_bot(commit: Dict) -> bool:
+    """Whether a commit was authored by an app or automation account rather than a developer"""
+    author = commit.get('author')
+    if not isinstance(author, dict):
+        return False
+    return author.get('type') == 'Bot' or is_bot_login(author.get('login'))
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Local Commit Store
+SQLite store of normalized commit records and line stats keyed by (org, repo, sha), shared by all analyzers.
+Also holds pull requests / issues, org-level snapshots (team rosters, Copilot seats), AI-signal
+classifications tagged with the ruleset version, and the per-repo high-water marks used by incremental sync.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ai-impact-insights', 'commits.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    author_login TEXT,
+    author_name TEXT,
+    author_email TEXT,
+    authored_at TEXT,
+    committed_at TEXT,
+    message TEXT,
+    additions INTEGER NOT NULL DEFAULT 0,
+    deletions INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    files_changed INTEGER NOT NULL DEFAULT 0,
+    has_stats INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (org, repo, sha)
+);
+CREATE INDEX IF NOT EXISTS idx_commits_author_committed ON commits (org, author_login COLLATE NOCASE, committed_at);
+CREATE INDEX IF NOT EXISTS idx_commits_committed ON commits (org, repo, committed_at);
+
+CREATE TABLE IF NOT EXISTS items (
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org, repo, kind, number)
+);
+CREATE INDEX IF NOT EXISTS idx_items_created ON items (org, repo, kind, created_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    newest_at TEXT,
+    newest_sha TEXT,
+    covered_since TEXT,
+    synced_at TEXT,
+    PRIMARY KEY (org, repo, kind)
+);
+
+CREATE TABLE IF NOT EXISTS ai_scores (
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (org, repo, sha)
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    org TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (org, kind, key)
+);
+"""
+
+COLUMNS = ('org', 'repo', 'sha', 'author_login', 'author_name', 'author_email', 'authored_at',
+           'committed_at', 'message', 'additions', 'deletions', 'total', 'files_changed', 'has_stats')
+
+SYNC_COLUMNS = ('newest_at', 'newest_sha', 'covered_since', 'synced_at')
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+
+def utc_timestamp(value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO timestamp to UTC 'YYYY-MM-DDTHH:MM:SSZ' so stored dates sort and compare as text"""
+    if not value:
+        return value
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def commit_timestamp(commit: Dict) -> Optional[str]:
+    """UTC timestamp the API date filters apply to: committer date, or author date when that is all we have"""
+    data = commit.get('commit') or {}
+    person = data.get('committer') or data.get('author') or {}
+    return utc_timestamp(person.get('date'))
+
+def normalize_commit(org: str, repo: str, details: Dict) -> Dict:
+    """Flatten a REST commit detail, GraphQL history record or plain list-commits entry into a store row"""
+    commit = details.get('commit', {})
+    author = commit.get('author') or {}
+    stats = details.get('stats', {})
+
+    if 'files_changed' in details:
+        files_changed = details['files_changed']
+    else:
+        files_changed = len(details.get('files', []))
+
+    return {
+        'org': org,
+        'repo': repo,
+        'sha': details['sha'],
+        'author_login': (details.get('author') or {}).get('login'),
+        'author_name': author.get('name'),
+        'author_email': author.get('email'),
+        'authored_at': utc_timestamp(author.get('date')),
+        'committed_at': commit_timestamp(details),
+        'message': commit.get('message', ''),
+        'additions': stats.get('additions', 0),
+        'deletions': stats.get('deletions', 0),
+        'total': stats.get('total', 0),
+        'files_changed': files_changed,
+        'has_stats': 1 if 'stats' in details else 0
+    }
+
+def record_to_commit(record: Dict) -> Dict:
+    """Rebuild the REST-shaped commit (with stats, if known) that the analyzers consume from a store row"""
+    commit = {
+        'sha': record['sha'],
+        'author': {'login': record['author_login']} if record['author_login'] else None,
+        'commit': {
+            'message': record['message'],
+            'author': {
+                'name': record['author_name'],
+                'email': record['author_email'],
+                'date': record['authored_at']
+            },
+            'committer': {'date': record['committed_at']}
+        }
+    }
+    if record['has_stats']:
+        commit['stats'] = {
+            'additions': record['additions'],
+            'deletions': record['deletions'],
+            'total': record['total']
+        }
+        commit['files_changed'] = record['files_changed']
+    return commit
+
+class CommitStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """Open (or create) the SQLite store; safe to share between threads"""
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._migrate()
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def _migrate(self):
+        """Bring stores written by older versions up to the current schema (caller holds the lock)"""
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(commits)')}
+        if columns and 'has_stats' not in columns:
+            # Older stores only ever held commits with stats
+            self._conn.execute('ALTER TABLE commits ADD COLUMN has_stats INTEGER NOT NULL DEFAULT 1')
+        if columns and 'committed_at' not in columns:
+            # The author date is the best guess for commits saved before committer dates were kept
+            self._conn.execute('ALTER TABLE commits ADD COLUMN committed_at TEXT')
+            self._conn.execute('UPDATE commits SET committed_at = authored_at')
+            self._conn.execute('DROP INDEX IF EXISTS idx_commits_author')
+            self._conn.execute('DROP INDEX IF EXISTS idx_commits_date')
+
+    def get(self, org: str, repo: str, sha: str) -> Optional[Dict]:
+        """Stored commit for a SHA, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM commits WHERE org = ? AND repo = ? AND sha = ? AND has_stats = 1', (org, repo, sha)
+            ).fetchone()
+        return record_to_commit(dict(row)) if row else None
+
+    def contains(self, org: str, repo: str, sha: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM commits WHERE org = ? AND repo = ? AND sha = ? AND has_stats = 1', (org, repo, sha)
+            ).fetchone()
+        return row is not None
+
+    def get_many(self, org: str, repo: str, shas: Iterable[str]) -> Dict[str, Dict]:
+        """Stored commits for a batch of SHAs, keyed by SHA (missing ones are left out)"""
+        shas = list(shas)
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(shas), LOOKUP_CHUNK):
+                chunk = shas[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT * FROM commits WHERE org = ? AND repo = ? AND has_stats = 1 AND sha IN ({placeholders})',
+                    [org, repo] + chunk
+                ).fetchall()
+                for row in rows:
+                    found[row['sha']] = record_to_commit(dict(row))
+
+        return found
+
+    def put_many(self, org: str, repo: str, commits: Iterable[Dict]):
+        """Save commits (REST details or GraphQL history records); existing rows are replaced"""
+        self._insert(org, repo, commits, 'INSERT OR REPLACE')
+
+    def put_listed(self, org: str, repo: str, commits: Iterable[Dict]):
+        """Save list-commits entries without stats; commits already stored (possibly with stats) are kept"""
+        self._insert(org, repo, commits, 'INSERT OR IGNORE')
+
+    def _insert(self, org: str, repo: str, commits: Iterable[Dict], verb: str):
+        rows = [tuple(normalize_commit(org, repo, commit)[column] for column in COLUMNS) for commit in commits]
+        if not rows:
+            return
+
+        placeholders = ','.join('?' * len(COLUMNS))
+        with self._lock:
+            self._conn.executemany(
+                f'{verb} INTO commits ({",".join(COLUMNS)}) VALUES ({placeholders})', rows
+            )
+            self._conn.commit()
+
+    def put(self, org: str, repo: str, commit: Dict):
+        self.put_many(org, repo, [commit])
+
+    def query(self, org: str, repo: Optional[str] = None, author: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """
+        Stored commits filtered by repo, author login (any case, like the API) and committer date range, as
+        the API's since/until filter them; newest first
+        """
+        clauses = ['org = ?']
+        params = [org]
+        if repo:
+            clauses.append('repo = ?')
+            params.append(repo)
+        if author:
+            clauses.append('author_login = ? COLLATE NOCASE')
+            params.append(author)
+        if since:
+            clauses.append('committed_at >= ?')
+            params.append(utc_timestamp(since))
+        if until:
+            clauses.append('committed_at <= ?')
+            params.append(utc_timestamp(until))
+
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT * FROM commits WHERE {" AND ".join(clauses)} ORDER BY committed_at DESC', params
+            ).fetchall()
+        return [record_to_commit(dict(row)) for row in rows]
+
+    def missing_stats(self, org: str, repo: str, since: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """SHAs of listed commits whose line stats have not been fetched yet, newest first"""
+        clauses = ['org = ?', 'repo = ?', 'has_stats = 0']
+        params = [org, repo]
+        if since:
+            clauses.append('committed_at >= ?')
+            params.append(utc_timestamp(since))
+        sql = f'SELECT sha FROM commits WHERE {" AND ".join(clauses)} ORDER BY committed_at DESC'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [row['sha'] for row in rows]
+
+    def login_for_email(self, org: str, email: str) -> Optional[str]:
+        """GitHub login the API has reported for a commit author email, if any stored commit has one"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT author_login FROM commits WHERE org = ? AND author_email = ? AND author_login IS NOT NULL LIMIT 1',
+                (org, email)
+            ).fetchone()
+        return row['author_login'] if row else None
+
+    def put_items(self, org: str, repo: str, kind: str, items: Iterable[Dict]):
+        """Save pull requests or issues (raw API objects) under `kind`; newer copies replace older ones"""
+        rows = [
+            (org, repo, kind, item['number'], utc_timestamp(item.get('created_at')),
+             utc_timestamp(item.get('updated_at')), json.dumps(item))
+            for item in items
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO items (org, repo, kind, number, created_at, updated_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+
+    def query_items(self, org: str, repo: str, kind: str, since: Optional[str] = None,
+                    until: Optional[str] = None) -> List[Dict]:
+        """Stored pull requests or issues created in a date range, newest first"""
+        clauses = ['org = ?', 'repo = ?', 'kind = ?']
+        params = [org, repo, kind]
+        if since:
+            clauses.append('created_at >= ?')
+            params.append(utc_timestamp(since))
+        if until:
+            clauses.append('created_at <= ?')
+            params.append(utc_timestamp(until))
+
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT data FROM items WHERE {" AND ".join(clauses)} ORDER BY created_at DESC', params
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def get_sync_state(self, org: str, repo: str, kind: str) -> Optional[Dict]:
+        """High-water mark of the last incremental sync of `kind` ('commits', 'pulls', 'issues'), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM sync_state WHERE org = ? AND repo = ? AND kind = ?', (org, repo, kind)
+            ).fetchone()
+        return {column: row[column] for column in SYNC_COLUMNS} if row else None
+
+    def set_sync_state(self, org: str, repo: str, kind: str, state: Dict):
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO sync_state (org, repo, kind, {",".join(SYNC_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (org, repo, kind) + tuple(state.get(column) for column in SYNC_COLUMNS)
+            )
+            self._conn.commit()
+
+    def get_ai_scores(self, org: str, repo: str, shas: Iterable[str], ruleset: str) -> Dict[str, str]:
+        """Comma-separated AI-signal categories of commits classified under `ruleset`, keyed by SHA"""
+        shas = list(shas)
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(shas), LOOKUP_CHUNK):
+                chunk = shas[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT sha, categories FROM ai_scores WHERE org = ? AND repo = ? AND ruleset = ? '
+                    f'AND sha IN ({placeholders})', [org, repo, ruleset] + chunk
+                ).fetchall()
+                found.update((row['sha'], row['categories']) for row in rows)
+
+        return found
+
+    def put_ai_scores(self, org: str, repo: str, ruleset: str, scores: Iterable[tuple]):
+        """Save (sha, categories, score) classifications, replacing any made under an older ruleset"""
+        rows = [(org, repo, sha, ruleset, categories, score) for sha, categories, score in scores]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO ai_scores (org, repo, sha, ruleset, categories, score) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+
+    def unscored_commits(self, ruleset: str, org: Optional[str] = None, limit: int = 10000) -> List[Dict]:
+        """Stored commits (org, repo, sha, author_login, message) not yet classified under `ruleset`"""
+        clauses = ['(s.sha IS NULL OR s.ruleset != ?)']
+        params = [ruleset]
+        if org:
+            clauses.append('c.org = ?')
+            params.append(org)
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT c.org, c.repo, c.sha, c.author_login, c.message FROM commits c '
+                'LEFT JOIN ai_scores s ON s.org = c.org AND s.repo = c.repo AND s.sha = c.sha '
+                f'WHERE {" AND ".join(clauses)} LIMIT {int(limit)}', params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_messages(self, org: Optional[str] = None, batch_size: int = 100000) -> Iterator[List[Dict]]:
+        """Every stored commit's (org, repo, sha, author_login, message), batch_size rows at a time"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT rowid, org, repo, sha, author_login, message FROM commits '
+                    f'WHERE rowid > ?{" AND org = ?" if org else ""} ORDER BY rowid LIMIT {int(batch_size)}',
+                    [last_rowid, org] if org else [last_rowid]
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]['rowid']
+            yield [dict(row) for row in rows]
+
+    def put_snapshot(self, org: str, kind: str, key: str, data):
+        """Replace the saved copy of an org-level listing (e.g. kind 'team_members' keyed by team slug)"""
+        fetched_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO snapshots (org, kind, key, data, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                (org, kind, key, json.dumps(data), fetched_at)
+            )
+            self._conn.commit()
+
+    def get_snapshot(self, org: str, kind: str, key: str) -> Optional[Dict]:
+        """{'data': ..., 'fetched_at': ...} of the last saved copy, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, fetched_at FROM snapshots WHERE org = ? AND kind = ? AND key = ?', (org, kind, key)
+            ).fetchone()
+        return {'data': json.loads(row['data']), 'fetched_at': row['fetched_at']} if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
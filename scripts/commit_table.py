@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Columnar Commit Table
+Normalized commits of one repository and period held as NumPy arrays - author code, epoch timestamp,
+line stats and AI score - instead of per-commit dicts and lists, with per-user metrics computed by a
+vectorized group-by
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from github_client import changed_files_count
+
+# Column -> dtype; 38 bytes per commit
+COLUMNS = {
+    'author': np.int32,
+    'timestamp': np.int64,
+    # Calendar day of the commit in its own timezone offset (days since 1970-01-01)
+    'day': np.int32,
+    'additions': np.int32,
+    'deletions': np.int32,
+    'total': np.int32,
+    'files': np.int32,
+    'detailed': np.bool_,
+    'ai_score': np.float32,
+    'ai_assisted': np.bool_,
+}
+
+# Sums per author returned by CommitTable.aggregate, from the column they add up
+SUMS = {
+    'total_additions': 'additions',
+    'total_deletions': 'deletions',
+    'total_changes': 'total',
+    'files_changed': 'files',
+    'detailed_commits': 'detailed',
+    'ai_assisted_commits': 'ai_assisted',
+    'ai_likelihood_total': 'ai_score',
+}
+
+NO_INDICATORS = {'ai_likelihood_score': 0, 'likely_ai_assisted': False, 'bot_author': False}
+
+def digits(dates: Sequence[str], width: int) -> np.ndarray:
+    """The first `width` characters of each timestamp as a matrix of digit values (separators included)"""
+    return np.frombuffer(np.array(dates, dtype=f'S{width}').tobytes(), dtype=np.uint8).reshape(-1, width).astype(np.int64) - 48
+
+def number(chars: np.ndarray, start: int, end: int) -> np.ndarray:
+    value = np.zeros(len(chars), dtype=np.int64)
+    for position in range(start, end):
+        value = value * 10 + chars[:, position]
+    return value
+
+def days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01 of proleptic Gregorian dates, element-wise"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def calendar_days(dates: Sequence[str]) -> np.ndarray:
+    """Days since 1970-01-01 of the date part of ISO-8601 timestamps (the commit's own calendar day)"""
+    if not len(dates):
+        return np.zeros(0, dtype=np.int32)
+    chars = digits(dates, 10)
+    return days_from_civil(number(chars, 0, 4), number(chars, 5, 7), number(chars, 8, 10)).astype(np.int32)
+
+def epoch_seconds(dates: Sequence[str]) -> np.ndarray:
+    """UTC epoch seconds of ISO-8601 timestamps; GitHub's "...Z" form is parsed without a per-date call"""
+    if not len(dates):
+        return np.zeros(0, dtype=np.int64)
+    chars = digits(dates, 20) if set(map(len, dates)) == {20} else None
+    if chars is not None and (chars[:, 19] == ord('Z') - 48).all():
+        days = days_from_civil(number(chars, 0, 4), number(chars, 5, 7), number(chars, 8, 10))
+        return days * 86400 + number(chars, 11, 13) * 3600 + number(chars, 14, 16) * 60 + number(chars, 17, 19)
+    return np.array([
+        int(datetime.fromisoformat(date.replace('Z', '+00:00')).timestamp()) for date in dates
+    ], dtype=np.int64)
+
+def codes_for(labels: Iterable[str], index: Dict[str, int]) -> List[int]:
+    """Integer code per label, adding new labels to `index` (label -> code) in order of appearance"""
+    return [index.setdefault(label, len(index)) for label in labels]
+
+class CommitTable:
+    def __init__(self, authors: List[str], columns: Dict[str, np.ndarray]):
+        """Commits as parallel arrays (see COLUMNS); the author column indexes into `authors`"""
+        self.authors = authors
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['timestamp'])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    @classmethod
+    def from_commits(cls, commits: List[Dict], details_by_sha: Dict[str, Dict],
+                     indicators: Optional[List[Dict]] = None) -> 'CommitTable':
+        """
+        One row per commit with a GitHub author, from list-commits entries and the commit details fetched
+        for some of them (line stats are 0 and `detailed` False for the rest). With their
+        detect_ai_assistance indicators, AI scores are filled in and bot-authored commits left out.
+        """
+        if indicators is None:
+            indicators = [NO_INDICATORS] * len(commits)
+        # One pass over the commits; everything after works on whole columns
+        rows = [
+            (commit['author']['login'], commit['commit']['author']['date'], commit['sha'],
+             entry['ai_likelihood_score'], entry['likely_ai_assisted'])
+            for commit, entry in zip(commits, indicators)
+            if isinstance(commit.get('author'), dict) and commit['author'].get('login') and not entry['bot_author']
+        ]
+        logins, dates, shas, scores, assisted = zip(*rows) if rows else ((), (), (), (), ())
+
+        index: Dict[str, int] = {}
+        authors = codes_for(logins, index)
+
+        # Line stats only for the (usually few) commits with fetched details; zero elsewhere
+        detailed = []
+        if details_by_sha:
+            for row, sha in enumerate(shas):
+                details = details_by_sha.get(sha)
+                if details and 'stats' in details:
+                    stats = details['stats']
+                    detailed.append((row, stats.get('additions', 0), stats.get('deletions', 0),
+                                     stats.get('total', 0), changed_files_count(details)))
+        line_stats = {name: np.zeros(len(rows), dtype=COLUMNS[name]) for name in ('additions', 'deletions', 'total', 'files')}
+        is_detailed = np.zeros(len(rows), dtype=np.bool_)
+        if detailed:
+            positions, *values = (np.array(column) for column in zip(*detailed))
+            for name, column in zip(('additions', 'deletions', 'total', 'files'), values):
+                line_stats[name][positions] = column
+            is_detailed[positions] = True
+
+        columns = {
+            'author': np.array(authors, dtype=np.int32),
+            'timestamp': epoch_seconds(dates),
+            'day': calendar_days(dates),
+            'detailed': is_detailed,
+            'ai_score': np.array(scores, dtype=np.float32),
+            'ai_assisted': np.array(assisted, dtype=np.bool_),
+        }
+        columns.update(line_stats)
+        return cls(list(index), columns)
+
+    def active_days(self, groups: np.ndarray, size: int) -> np.ndarray:
+        """Distinct calendar days with at least one commit, per group"""
+        if not len(groups):
+            return np.zeros(size, dtype=np.int64)
+        days = self.columns['day'].astype(np.int64)
+        first = days.min()
+        span = int(days.max() - first) + 1
+        distinct = np.unique(groups.astype(np.int64) * span + (days - first))
+        return np.bincount(distinct // span, minlength=size)
+
+    def aggregate(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Per-author metrics: commits, active_days and the SUMS columns, as arrays aligned with the distinct
+        author codes returned alongside
+        """
+        authors, groups = np.unique(self.columns['author'], return_inverse=True)
+        groups = groups.reshape(-1)
+        size = len(authors)
+        metrics = {'commits': np.bincount(groups, minlength=size)}
+        for metric, column in SUMS.items():
+            metrics[metric] = np.bincount(groups, weights=self.columns[column], minlength=size)
+        metrics['active_days'] = self.active_days(groups, size)
+        return authors, metrics
+
+    def user_summaries(self) -> Dict[str, Dict]:
+        """
+        Per-author stats: commits, line and file sums over detailed commits, active days and AI counts
+        (commits_per_active_day, ai_assistance_rate and avg_ai_likelihood derived from them)
+        """
+        authors, metrics = self.aggregate()
+        commits = metrics['commits']
+        derived = {
+            'commits_per_active_day': ratio(commits, metrics['active_days']),
+            'ai_assistance_rate': ratio(metrics['ai_assisted_commits'], commits) * 100,
+            'avg_ai_likelihood': ratio(metrics['ai_likelihood_total'], commits),
+        }
+        columns = {
+            name: values.astype(np.int64).tolist() for name, values in metrics.items() if name != 'ai_likelihood_total'
+        }
+        columns.update((name, values.tolist()) for name, values in derived.items())
+
+        return {
+            self.authors[author]: {name: values[row] for name, values in columns.items()}
+            for row, author in enumerate(authors.tolist())
+        }
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise numerator / denominator, 0 where the denominator is not positive"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def pct_change(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Element-wise percentage change from before to after, 0 where before is not positive"""
+    return ratio(np.asarray(after) - np.asarray(before), before) * 100
+
+def sum_by_user(stats_by_repo: Dict[str, Dict[str, Dict]], fields: Dict[str, str]) -> Tuple[Dict[str, int], Dict[str, np.ndarray]]:
+    """
+    Per-user sums across repositories of {repo: {user: stats}} rows, as arrays per name in `fields`
+    (name -> stats key, missing keys count as 0) plus user -> position in those arrays
+    """
+    index: Dict[str, int] = {}
+    codes = []
+    columns = {name: [] for name in fields}
+    for repo_stats in stats_by_repo.values():
+        for user, stats in repo_stats.items():
+            codes.append(index.setdefault(user, len(index)))
+            for name, key in fields.items():
+                columns[name].append(stats.get(key, 0))
+
+    codes = np.array(codes, dtype=np.int64)
+    return index, {
+        name: np.bincount(codes, weights=np.asarray(values, dtype=np.float64), minlength=len(index))
+        for name, values in columns.items()
+    }
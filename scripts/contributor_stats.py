@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Weekly Contributor Stats Backend
+Per-author weekly additions/deletions/commits for a repository's whole history from
+/repos/{org}/{repo}/stats/contributors - one call per repository instead of sampled commit details
+"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+# GitHub answers 202 while it computes the stats in the background; poll until they are ready
+STATS_POLL_INTERVAL = 2.0
+STATS_MAX_POLLS = 15
+
+def stats_path(org: str, repo: str) -> str:
+    return f"/repos/{org}/{repo}/stats/contributors"
+
+def fetch_contributor_stats(client, org: str, repo: str, poll_interval: float = STATS_POLL_INTERVAL,
+                            max_polls: int = STATS_MAX_POLLS) -> Optional[List[Dict]]:
+    """Contributor stats for a repository, waiting out 202 responses; [] for an empty repo, None on failure"""
+    delay = poll_interval
+    for _ in range(max_polls):
+        response = client.get(stats_path(org, repo))
+
+        if response.status_code == 200:
+            return response.json() or []
+        if response.status_code == 204:
+            return []
+        if response.status_code != 202:
+            print(f"Error fetching contributor stats for {repo}: {response.status_code}")
+            return None
+
+        time.sleep(delay)
+        delay = min(delay * 1.5, 30)
+
+    print(f"Contributor stats for {repo} were still being computed after {max_polls} attempts")
+    return None
+
+def prewarm_contributor_stats(client, org: str, repos: Sequence[str], max_workers: int = 8):
+    """Ask for every repository's stats at once so GitHub computes them in parallel before we poll"""
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        list(executor.map(lambda repo: client.get(stats_path(org, repo)), repos))
+
+def weekly_totals(stats: List[Dict], since: datetime, until: datetime) -> Dict[str, Dict]:
+    """
+    Per-author commits/additions/deletions/total for the weeks starting in [since, until)
+    Weeks start on Sunday (UTC), so windows are effectively rounded to whole weeks
+    """
+    start = to_epoch(since)
+    end = to_epoch(until)
+    totals = defaultdict(lambda: {'commits': 0, 'additions': 0, 'deletions': 0, 'total': 0})
+
+    for contributor in stats:
+        login = (contributor.get('author') or {}).get('login')
+        if not login:
+            continue
+        for week in contributor.get('weeks', []):
+            if start <= week['w'] < end and (week['c'] or week['a'] or week['d']):
+                author = totals[login]
+                author['commits'] += week['c']
+                author['additions'] += week['a']
+                author['deletions'] += week['d']
+                author['total'] += week['a'] + week['d']
+
+    return dict(totals)
+
+def to_epoch(value: datetime) -> float:
+    """Unix time of a datetime, treating naive values as UTC like the rest of the analysis"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
@@ -4,13 +4,22 @@ GitHub Copilot Before/After Impact Analysis
 Compares the same developers' productivity before and after Copilot adoption
 """
 
-import requests
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 import argparse
 from typing import Dict, List, Optional
-from collections import defaultdict
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import (client_for_config, run_concurrently, add_cache_arguments,
+                           configure_cache_from_args, DEFAULT_MAX_WORKERS, DEFAULT_REPO_WORKERS)
+from contributor_stats import weekly_totals
+from sampling import sample_commit_details, DEFAULT_Z
+from commit_table import CommitTable, sum_by_user, ratio, pct_change
 
 class CopilotBeforeAfterAnalyzer:
     def __init__(self, config_path: str = "config.json"):
@@ -18,16 +27,18 @@ class CopilotBeforeAfterAnalyzer:
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         
-        self.github_token = self.config['github']['token']
+        self.github_token = self.config['github'].get('token')
         self.org = self.config['github']['organization']
         self.repositories = self.config['github']['repositories']
         
-        self.headers = {
-            'Authorization': f'Bearer {self.github_token}',
-            'Accept': 'application/vnd.github+json',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-        self.base_url = 'https://api.github.com'
+        self.client = client_for_config(self.config['github'])
+        self.max_workers = self.config['github'].get('max_workers', DEFAULT_MAX_WORKERS)
+        self.commit_backend = self.config['github'].get('commit_backend', 'rest')
+        self.repo_workers = self.config['github'].get('repo_workers', DEFAULT_REPO_WORKERS)
+        # 'commits' estimates line changes from sampled commit details; 'weekly' uses /stats/contributors
+        self.line_stats_source = self.config['github'].get('line_stats_source', 'commits')
+        # Commit details fetched per repository and period; defaults to 10 per author
+        self.sample_budget = self.config['analysis'].get('sample_budget')
         
         # Parse copilot adoption date
         self.copilot_adoption_date = datetime.fromisoformat(
@@ -36,98 +47,88 @@ class CopilotBeforeAfterAnalyzer:
 
     def get_repository_commits(self, repo: str, since: str, until: str) -> List[Dict]:
         """Get commits for a repository in the specified date range"""
-        url = f"{self.base_url}/repos/{self.org}/{repo}/commits"
-        params = {
-            'since': since,
-            'until': until,
-            'per_page': 100
-        }
-        
-        all_commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error fetching commits for {repo}: {response.status_code}")
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            # Rate limiting protection
-            if len(all_commits) > 1000:  # Reasonable limit
-                break
-                
-        return all_commits
+        # Rate limiting protection
+        return self.client.list_commits(
+            self.org, repo, since, until, backend=self.commit_backend,
+            max_items=1000, description=f"commits for {repo}"
+        )
+
+    def get_repository_commits_for_periods(self, repo: str, periods: List[tuple]) -> List[List[Dict]]:
+        """Get commits for several (since, until) periods with a single fetch of the whole span"""
+        # Rate limiting protection (per period)
+        return self.client.list_commits_for_periods(
+            self.org, repo, periods, backend=self.commit_backend,
+            max_items=1000, description=f"commits for {repo}"
+        )
 
     def get_commit_details(self, repo: str, sha: str) -> Optional[Dict]:
         """Get detailed commit information including line changes"""
-        url = f"{self.base_url}/repos/{self.org}/{repo}/commits/{sha}"
-        
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        return None
+        return self.client.get_commit(self.org, repo, sha)
 
-    def analyze_user_productivity(self, commits: List[Dict], repo: str) -> Dict:
-        """Analyze productivity metrics from commits"""
-        user_stats = defaultdict(lambda: {
-            'commits': 0,
-            'total_additions': 0,
-            'total_deletions': 0,
-            'total_changes': 0,
-            'commit_dates': [],
-            'files_changed': 0
-        })
-        
-        for commit in commits:
-            author_login = commit.get('author', {}).get('login')
-            if not author_login:
-                continue
-                
-            commit_date = datetime.fromisoformat(
-                commit['commit']['author']['date'].replace('Z', '+00:00')
+    def get_commit_details_batch(self, repo: str, shas: List[str]) -> Dict[str, Dict]:
+        """Get detailed commit information for many commits in parallel"""
+        return self.client.get_commits_batch(self.org, repo, shas, max_workers=self.max_workers)
+
+    def analyze_repository(self, repo: str, periods: List[tuple]) -> List[tuple]:
+        """
+        Fetch one repository's commits for all periods at once and analyze each period
+        Returns a (commit count, user stats) pair per period
+        """
+        print(f"  Fetching {repo} commits from {min(p[0] for p in periods)[:10]} to {max(p[1] for p in periods)[:10]}...")
+        weekly = [None] * len(periods)
+        if self.line_stats_source == 'weekly':
+            stats = self.client.get_contributor_stats(self.org, repo)
+            if stats is not None:
+                weekly = [
+                    weekly_totals(stats, datetime.fromisoformat(since), datetime.fromisoformat(until))
+                    for since, until in periods
+                ]
+        
+        return [
+            (len(commits), self.analyze_user_productivity(commits, repo, period_weekly))
+            for commits, period_weekly in zip(self.get_repository_commits_for_periods(repo, periods), weekly)
+        ]
+
+    def analyze_user_productivity(self, commits: List[Dict], repo: str, weekly: Optional[Dict] = None) -> Dict:
+        """
+        Analyze productivity metrics from commits
+        With per-author weekly stats for the period, line changes are taken from them instead of sampled details
+        """
+        # Get detailed stats for a stratified sample of commits (to avoid too many API calls),
+        # plus any commits whose stats are already known locally at no API cost
+        details_by_sha, estimates = {}, {}
+        if weekly is None:
+            budget = self.sample_budget
+            if budget is None:
+                budget = 10 * len({(c.get('author') or {}).get('login') for c in commits} - {None})
+            details_by_sha, estimates = sample_commit_details(
+                self.client, self.org, repo, commits, budget, self.max_workers
             )
-            
-            user_stats[author_login]['commits'] += 1
-            user_stats[author_login]['commit_dates'].append(commit_date)
-            
-            # Get detailed stats (sample some commits to avoid too many API calls)
-            if user_stats[author_login]['commits'] <= 10:  # Sample first 10 commits per user
-                details = self.get_commit_details(repo, commit['sha'])
-                if details and 'stats' in details:
-                    stats = details['stats']
-                    user_stats[author_login]['total_additions'] += stats.get('additions', 0)
-                    user_stats[author_login]['total_deletions'] += stats.get('deletions', 0)
-                    user_stats[author_login]['total_changes'] += stats.get('total', 0)
-                    user_stats[author_login]['files_changed'] += len(details.get('files', []))
-        
-        # Calculate derived metrics
+        
+        table = CommitTable.from_commits(commits, details_by_sha)
+        user_stats = table.user_summaries()
+        
         for user, stats in user_stats.items():
-            if stats['commit_dates']:
-                # Calculate active days
-                dates = [d.date() for d in stats['commit_dates']]
-                unique_dates = len(set(dates))
-                stats['active_days'] = unique_dates
-                stats['commits_per_active_day'] = stats['commits'] / unique_dates if unique_dates > 0 else 0
-                
-                # Estimate total changes (for commits we didn't sample)
-                if stats['commits'] > 10:
-                    sample_commits = min(10, stats['commits'])
-                    avg_changes_per_commit = stats['total_changes'] / sample_commits if sample_commits > 0 else 0
-                    stats['estimated_total_changes'] = avg_changes_per_commit * stats['commits']
-                else:
-                    stats['estimated_total_changes'] = stats['total_changes']
-        
-        return dict(user_stats)
+            if weekly is not None:
+                # Exact per-author line counts for the period - nothing left to extrapolate
+                week_totals = weekly.get(user, {})
+                stats['total_additions'] = week_totals.get('additions', 0)
+                stats['total_deletions'] = week_totals.get('deletions', 0)
+                stats['total_changes'] = week_totals.get('total', 0)
+                stats['detailed_commits'] = stats['commits']
+            
+            # Estimate total changes (for commits we didn't sample), with a 95% interval
+            estimate = estimates.get(user)
+            if estimate:
+                stats['estimated_total_changes'] = estimate['estimate']
+                stats['estimated_total_changes_variance'] = estimate['variance']
+                stats['estimated_total_changes_ci'] = [estimate['ci_low'], estimate['ci_high']]
+            else:
+                stats['estimated_total_changes'] = stats['total_changes']
+                stats['estimated_total_changes_variance'] = 0.0
+                stats['estimated_total_changes_ci'] = [stats['total_changes'], stats['total_changes']]
+        
+        return user_stats
 
     def run_before_after_analysis(self) -> Dict:
         """Run the main before/after analysis"""
@@ -149,31 +150,21 @@ class CopilotBeforeAfterAnalyzer:
         all_before_stats = {}
         all_after_stats = {}
         
-        # Analyze each repository
-        for repo in self.repositories:
-            print(f"\nAnalyzing repository: {repo}")
-            
-            # Before period
-            print("  Fetching 'before' commits...")
-            before_commits = self.get_repository_commits(
-                repo, 
-                before_start.isoformat(), 
-                before_end.isoformat()
-            )
-            before_stats = self.analyze_user_productivity(before_commits, repo)
+        # Analyze repositories concurrently, each with one fetch spanning both periods
+        print(f"\nAnalyzing {len(self.repositories)} repositories ({self.repo_workers} in parallel)...")
+        windows = [(before_start.isoformat(), before_end.isoformat()), (after_start.isoformat(), after_end.isoformat())]
+        if self.line_stats_source == 'weekly':
+            print("Requesting weekly contributor stats for all repositories...")
+            self.client.prewarm_contributor_stats(self.org, self.repositories)
+        
+        repo_results = run_concurrently(
+            self.analyze_repository, [(repo, windows) for repo in self.repositories], self.repo_workers
+        )
+        
+        for repo, ((before_count, before_stats), (after_count, after_stats)) in zip(self.repositories, repo_results):
             all_before_stats[repo] = before_stats
-            
-            # After period  
-            print("  Fetching 'after' commits...")
-            after_commits = self.get_repository_commits(
-                repo,
-                after_start.isoformat(),
-                after_end.isoformat()
-            )
-            after_stats = self.analyze_user_productivity(after_commits, repo)
             all_after_stats[repo] = after_stats
-            
-            print(f"  Before: {len(before_commits)} commits, After: {len(after_commits)} commits")
+            print(f"  {repo} - Before: {before_count} commits, After: {after_count} commits")
         
         # Aggregate and compare
         analysis_results = self.compare_before_after(all_before_stats, all_after_stats)
@@ -204,109 +195,89 @@ class CopilotBeforeAfterAnalyzer:
         """Compare user productivity before and after Copilot adoption"""
         
         # Aggregate user stats across all repositories
-        user_before = defaultdict(lambda: {
-            'commits': 0, 'total_changes': 0, 'active_days': 0, 'repos': []
-        })
-        user_after = defaultdict(lambda: {
-            'commits': 0, 'total_changes': 0, 'active_days': 0, 'repos': []
-        })
-        
-        # Aggregate before stats
-        for repo, repo_stats in before_stats.items():
-            for user, stats in repo_stats.items():
-                user_before[user]['commits'] += stats['commits']
-                user_before[user]['total_changes'] += stats['estimated_total_changes']
-                user_before[user]['active_days'] += stats['active_days']
-                user_before[user]['repos'].append(repo)
-        
-        # Aggregate after stats
-        for repo, repo_stats in after_stats.items():
-            for user, stats in repo_stats.items():
-                user_after[user]['commits'] += stats['commits']
-                user_after[user]['total_changes'] += stats['estimated_total_changes']
-                user_after[user]['active_days'] += stats['active_days']
-                user_after[user]['repos'].append(repo)
+        fields = {
+            'commits': 'commits', 'total_changes': 'estimated_total_changes',
+            'total_changes_variance': 'estimated_total_changes_variance', 'active_days': 'active_days'
+        }
+        before_index, user_before = sum_by_user(before_stats, fields)
+        after_index, user_after = sum_by_user(after_stats, fields)
         
         # Find users who were active both before and after
-        before_users = set(user_before.keys())
-        after_users = set(user_after.keys())
-        common_users = before_users.intersection(after_users)
+        before_users = set(before_index)
+        after_users = set(after_index)
+        common_users = [user for user in before_index if user in after_index]
         
         min_commits = self.config['analysis']['min_commits_for_analysis']
-        qualified_users = [
-            user for user in common_users 
-            if user_before[user]['commits'] >= min_commits and 
-               user_after[user]['commits'] >= min_commits
-        ]
+        b = np.array([before_index[user] for user in common_users], dtype=np.int64)
+        a = np.array([after_index[user] for user in common_users], dtype=np.int64)
+        qualified = (user_before['commits'][b] >= min_commits) & (user_after['commits'][a] >= min_commits)
+        qualified_users = [user for user, ok in zip(common_users, qualified.tolist()) if ok]
+        before = {name: values[b[qualified]] for name, values in user_before.items()}
+        after = {name: values[a[qualified]] for name, values in user_after.items()}
         
         print(f"\nFound {len(qualified_users)} users with sufficient activity in both periods")
         
-        # Calculate improvements for qualified users
-        user_comparisons = {}
+        before_weeks = self.config['analysis']['before_period_weeks']
+        after_weeks = self.config['analysis']['after_period_weeks']
+        
+        # Weekly and per-active-day averages for every qualified user at once
+        metrics = {
+            'before': {
+                'commits_per_week': before['commits'] / before_weeks,
+                'changes_per_week': before['total_changes'] / before_weeks,
+                # Sampling error of the line-change estimates (repositories are sampled independently)
+                'changes_margin': DEFAULT_Z * np.sqrt(before['total_changes_variance']) / before_weeks,
+                'commits_per_active_day': ratio(before['commits'], before['active_days']),
+            },
+            'after': {
+                'commits_per_week': after['commits'] / after_weeks,
+                'changes_per_week': after['total_changes'] / after_weeks,
+                'changes_margin': DEFAULT_Z * np.sqrt(after['total_changes_variance']) / after_weeks,
+                'commits_per_active_day': ratio(after['commits'], after['active_days']),
+            },
+        }
+        
+        # Calculate percentage improvements
         improvements = {
-            'commits_per_week': [],
-            'changes_per_week': [],
-            'commits_per_active_day': []
+            metric: pct_change(metrics['before'][metric], metrics['after'][metric])
+            for metric in ('commits_per_week', 'changes_per_week', 'commits_per_active_day')
         }
         
-        for user in qualified_users:
-            before = user_before[user]
-            after = user_after[user]
-            
-            before_weeks = self.config['analysis']['before_period_weeks']
-            after_weeks = self.config['analysis']['after_period_weeks']
-            
-            # Calculate weekly averages
-            before_commits_per_week = before['commits'] / before_weeks
-            after_commits_per_week = after['commits'] / after_weeks
-            
-            before_changes_per_week = before['total_changes'] / before_weeks
-            after_changes_per_week = after['total_changes'] / after_weeks
-            
-            # Calculate daily averages
-            before_commits_per_active_day = before['commits'] / before['active_days'] if before['active_days'] > 0 else 0
-            after_commits_per_active_day = after['commits'] / after['active_days'] if after['active_days'] > 0 else 0
-            
-            # Calculate percentage improvements
-            commits_improvement = ((after_commits_per_week - before_commits_per_week) / before_commits_per_week * 100) if before_commits_per_week > 0 else 0
-            changes_improvement = ((after_changes_per_week - before_changes_per_week) / before_changes_per_week * 100) if before_changes_per_week > 0 else 0
-            daily_commits_improvement = ((after_commits_per_active_day - before_commits_per_active_day) / before_commits_per_active_day * 100) if before_commits_per_active_day > 0 else 0
-            
-            user_comparisons[user] = {
-                'before': {
-                    'commits_per_week': before_commits_per_week,
-                    'changes_per_week': before_changes_per_week,
-                    'commits_per_active_day': before_commits_per_active_day,
-                    'total_commits': before['commits'],
-                    'active_days': before['active_days']
-                },
-                'after': {
-                    'commits_per_week': after_commits_per_week,
-                    'changes_per_week': after_changes_per_week,
-                    'commits_per_active_day': after_commits_per_active_day,
-                    'total_commits': after['commits'],
-                    'active_days': after['active_days']
-                },
-                'improvements': {
-                    'commits_per_week_pct': commits_improvement,
-                    'changes_per_week_pct': changes_improvement,
-                    'commits_per_active_day_pct': daily_commits_improvement
+        columns = {period: {name: values.tolist() for name, values in period_metrics.items()}
+                   for period, period_metrics in metrics.items()}
+        totals = {'before': before, 'after': after}
+        changes = {metric: values.tolist() for metric, values in improvements.items()}
+        
+        user_comparisons = {}
+        for row, user in enumerate(qualified_users):
+            comparison = {}
+            for period, period_columns in columns.items():
+                changes_per_week = period_columns['changes_per_week'][row]
+                margin = period_columns['changes_margin'][row]
+                comparison[period] = {
+                    'commits_per_week': period_columns['commits_per_week'][row],
+                    'changes_per_week': changes_per_week,
+                    'changes_per_week_ci': [max(0.0, changes_per_week - margin), changes_per_week + margin],
+                    'commits_per_active_day': period_columns['commits_per_active_day'][row],
+                    'total_commits': int(totals[period]['commits'][row]),
+                    'active_days': int(totals[period]['active_days'][row])
                 }
+            comparison['improvements'] = {
+                'commits_per_week_pct': changes['commits_per_week'][row],
+                'changes_per_week_pct': changes['changes_per_week'][row],
+                'commits_per_active_day_pct': changes['commits_per_active_day'][row]
             }
-            
-            improvements['commits_per_week'].append(commits_improvement)
-            improvements['changes_per_week'].append(changes_improvement)
-            improvements['commits_per_active_day'].append(daily_commits_improvement)
+            user_comparisons[user] = comparison
         
         # Calculate summary statistics
         summary = {}
         for metric, values in improvements.items():
-            if values:
+            if len(values):
                 summary[metric] = {
-                    'avg_improvement_pct': sum(values) / len(values),
-                    'median_improvement_pct': sorted(values)[len(values)//2],
-                    'users_improved': len([v for v in values if v > 0]),
-                    'users_declined': len([v for v in values if v < 0]),
+                    'avg_improvement_pct': float(values.mean()),
+                    'median_improvement_pct': float(np.sort(values)[len(values)//2]),
+                    'users_improved': int((values > 0).sum()),
+                    'users_declined': int((values < 0).sum()),
                     'total_users': len(values)
                 }
         
@@ -365,8 +336,10 @@ def main():
     parser = argparse.ArgumentParser(description='Analyze Copilot before/after impact')
     parser.add_argument('--config', default='config.json', help='Configuration file path')
     parser.add_argument('--output', help='Output file (optional)')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
+    configure_cache_from_args(args)
     
     if not os.path.exists(args.config):
         print(f"Config file not found: {args.config}")
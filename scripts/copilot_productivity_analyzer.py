@@ -4,36 +4,36 @@ GitHub Copilot Metrics & Code Production Correlation Analysis
 Extracts Copilot usage data and correlates with code production metrics
 """
 
-import requests
 import json
+import os
+import sys
 from datetime import datetime, timedelta
 import pandas as pd
 import argparse
 from typing import Dict, List, Optional
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import get_client, add_cache_arguments, configure_cache_from_args
+from ai_signals import score_many
+
 class CopilotMetricsAnalyzer:
     def __init__(self, github_token: str, org: str):
         self.github_token = github_token
         self.org = org
-        self.headers = {
-            'Authorization': f'Bearer {github_token}',
-            'Accept': 'application/vnd.github+json',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-        self.base_url = 'https://api.github.com'
+        self.client = get_client(github_token.split(','))
 
     def get_copilot_usage_summary(self, since: str, until: str) -> Dict:
         """
         Get Copilot usage summary for the organization
         https://docs.github.com/en/rest/copilot/copilot-usage
         """
-        url = f"{self.base_url}/orgs/{self.org}/copilot/usage"
         params = {
             'since': since,
             'until': until
         }
         
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.client.get(f"/orgs/{self.org}/copilot/usage", params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -45,65 +45,30 @@ class CopilotMetricsAnalyzer:
         """
         Get details about Copilot seat assignments
         """
-        url = f"{self.base_url}/orgs/{self.org}/copilot/billing/seats"
-        
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code == 200:
-            return response.json().get('seats', [])
-        else:
-            print(f"Error fetching Copilot seats: {response.status_code} - {response.text}")
+        seats = self.client.list_copilot_seats(self.org)
+        if seats is None:
+            print("Error fetching Copilot seats")
             return []
+        return seats
 
     def get_repository_commits(self, repo: str, since: str, until: str) -> List[Dict]:
         """
         Get commits for a specific repository in the date range
         """
-        url = f"{self.base_url}/repos/{self.org}/{repo}/commits"
-        params = {
-            'since': since,
-            'until': until,
-            'per_page': 100
-        }
-        
-        all_commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            # GitHub API rate limiting
-            if page > 10:  # Limit for demo purposes
-                break
-                
-        return all_commits
+        # GitHub API rate limiting (local store in incremental / offline mode)
+        return self.client.list_commits(
+            self.org, repo, since, until,
+            max_pages=10, description=f"commits for {repo}"  # Limit for demo purposes
+        )
 
     def get_org_repositories(self) -> List[str]:
         """
         Get list of repositories in the organization
         """
-        url = f"{self.base_url}/orgs/{self.org}/repos"
         params = {'per_page': 100, 'type': 'all'}
         
-        response = requests.get(url, headers=self.headers, params=params)
-        
-        if response.status_code == 200:
-            repos = response.json()
-            return [repo['name'] for repo in repos if not repo['archived']]
-        else:
-            print(f"Error fetching repositories: {response.status_code}")
-            return []
+        repos = self.client.paginate(f"/orgs/{self.org}/repos", params, description="repositories")
+        return [repo['name'] for repo in repos if not repo['archived']]
 
     def analyze_commit_patterns(self, commits: List[Dict]) -> Dict:
         """
@@ -125,15 +90,12 @@ class CopilotMetricsAnalyzer:
                 'total_changes': 0
             }
             
-            # Get detailed commit stats (requires additional API call)
-            # For efficiency, we'll estimate based on message patterns
-            message_lower = commit_info['message'].lower()
-            
-            # Simple heuristics for AI-assisted commits
-            ai_indicators = ['copilot', 'ai-generated', 'auto-complete', 'suggested']
-            commit_info['likely_ai_assisted'] = any(indicator in message_lower for indicator in ai_indicators)
-            
             commit_data.append(commit_info)
+        
+        # Detailed commit stats would need an additional API call per commit,
+        # so AI assistance is estimated from message patterns, all messages in one batch
+        for commit_info, indicators in zip(commit_data, score_many(c['message'] for c in commit_data)):
+            commit_info['likely_ai_assisted'] = indicators['likely_ai_assisted']
             
         # Aggregate metrics
         total_commits = len(commit_data)
@@ -271,12 +233,14 @@ class CopilotMetricsAnalyzer:
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze GitHub Copilot impact on code production')
-    parser.add_argument('--token', required=True, help='GitHub API token with org access')
+    parser.add_argument('--token', required=True, help='GitHub API token with org access (comma-separate several to pool their rate limits)')
     parser.add_argument('--org', required=True, help='GitHub organization name')
     parser.add_argument('--weeks', type=int, default=4, help='Analysis period in weeks')
     parser.add_argument('--output', default='copilot_analysis.json', help='Output file')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
+    configure_cache_from_args(args)
     
     analyzer = CopilotMetricsAnalyzer(args.token, args.org)
     
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+GitHub API Credentials
+Personal access tokens and GitHub App installations, each with its own rate limit budget
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+
+from rate_limiter import RateLimitScheduler
+
+# Refresh installation tokens this long before GitHub expires them
+TOKEN_REFRESH_MARGIN = 300
+
+class TokenCredential:
+    def __init__(self, token: str):
+        """A personal access (or any bearer) token"""
+        self.token = token
+        self.rate_limiter = RateLimitScheduler()
+
+    @property
+    def key(self) -> str:
+        return f"token:{self.token}"
+
+    def authorization(self) -> str:
+        return f'Bearer {self.token}'
+
+class AppInstallationCredential:
+    def __init__(self, app_id: str, installation_id: str, private_key: str, base_url: str):
+        """A GitHub App installation; short-lived installation tokens are minted and refreshed on demand"""
+        self.app_id = str(app_id)
+        self.installation_id = str(installation_id)
+        self.private_key = private_key
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = RateLimitScheduler()
+
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"app:{self.app_id}:{self.installation_id}"
+
+    def _app_jwt(self) -> str:
+        """Sign the short-lived JWT that authenticates as the App itself"""
+        try:
+            import jwt
+        except ImportError:
+            raise RuntimeError("GitHub App credentials need PyJWT: pip install 'pyjwt[crypto]'")
+
+        now = int(time.time())
+        payload = {'iat': now - 60, 'exp': now + 540, 'iss': self.app_id}
+        return jwt.encode(payload, self.private_key, algorithm='RS256')
+
+    def authorization(self) -> str:
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_at - TOKEN_REFRESH_MARGIN:
+                self._refresh()
+            return f'Bearer {self._token}'
+
+    def _refresh(self):
+        response = requests.post(
+            f"{self.base_url}/app/installations/{self.installation_id}/access_tokens",
+            headers={
+                'Authorization': f'Bearer {self._app_jwt()}',
+                'Accept': 'application/vnd.github+json',
+                'X-GitHub-Api-Version': '2022-11-28'
+            }
+        )
+        if response.status_code != 201:
+            raise RuntimeError(f"Could not create installation token for app {self.app_id}: {response.status_code}")
+
+        data = response.json()
+        self._token = data['token']
+        expires_at = data.get('expires_at')
+        if expires_at:
+            self._expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00')).timestamp()
+        else:
+            self._expires_at = time.time() + 3600
+
+def credentials_from_config(github_config: Dict, base_url: str) -> List:
+    """
+    Build credentials from the 'github' config section
+    Accepts 'token', a 'tokens' list, and/or an 'apps' list of
+    {"app_id", "installation_id", "private_key_path"} GitHub App installations
+    """
+    tokens = []
+    if github_config.get('token'):
+        tokens.append(github_config['token'])
+    for token in github_config.get('tokens', []):
+        if token not in tokens:
+            tokens.append(token)
+
+    credentials = [TokenCredential(token) for token in tokens]
+
+    for app in github_config.get('apps', []):
+        with open(app['private_key_path'], 'r') as f:
+            private_key = f.read()
+        credentials.append(AppInstallationCredential(app['app_id'], app['installation_id'], private_key, base_url))
+
+    if not credentials:
+        raise ValueError("No GitHub credentials configured: set github.token, github.tokens or github.apps")
+    return credentials
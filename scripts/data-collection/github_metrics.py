@@ -4,28 +4,31 @@ GitHub Metrics Collection Script
 Collects productivity and quality metrics from GitHub repositories
 """
 
-import requests
 import json
 import csv
+import sys
 from datetime import datetime, timedelta
 import argparse
 import os
 from typing import Dict, List, Optional
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_client import get_client, add_cache_arguments, configure_cache_from_args
+from ai_signals import is_ai_assisted, score_commits, pull_request_text
+
 class GitHubMetricsCollector:
     def __init__(self, token: str, org: str, repo: str):
         self.token = token
         self.org = org
         self.repo = repo
-        self.headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
-        self.base_url = 'https://api.github.com'
+        self.client = get_client(token.split(','))
 
     def get_pull_requests(self, since: datetime, until: datetime) -> List[Dict]:
         """Fetch pull requests within date range"""
-        url = f"{self.base_url}/repos/{self.org}/{self.repo}/pulls"
+        if self.client.uses_local_data(since.isoformat()):
+            return self.client.list_items(self.org, self.repo, 'pulls', since.isoformat(), until.isoformat())
+
         params = {
             'state': 'all',
             'since': since.isoformat(),
@@ -33,20 +36,8 @@ class GitHubMetricsCollector:
         }
         
         all_prs = []
-        page = 1
         
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error fetching PRs: {response.status_code}")
-                break
-                
-            prs = response.json()
-            if not prs:
-                break
-                
+        for prs in self.client.iter_pages(f"/repos/{self.org}/{self.repo}/pulls", params, description="PRs"):
             # Filter by date range
             for pr in prs:
                 created_at = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
@@ -55,8 +46,6 @@ class GitHubMetricsCollector:
                 elif created_at < since:
                     # We've gone too far back
                     return all_prs
-                    
-            page += 1
             
         return all_prs
 
@@ -91,10 +80,7 @@ class GitHubMetricsCollector:
                 metrics['closed_prs'] += 1
                 
             # Check for AI assistance indicators
-            body = pr['body'] or ''
-            title = pr['title'] or ''
-            if any(keyword in (body + title).lower() for keyword in 
-                   ['copilot', 'ai-generated', 'ai-assisted', 'chatgpt', 'ai:']):
+            if is_ai_assisted(pull_request_text(pr)):
                 metrics['prs_with_ai_assistance'] += 1
                 
             # Get PR size (would need additional API call for accurate lines)
@@ -111,32 +97,7 @@ class GitHubMetricsCollector:
 
     def get_commits(self, since: datetime, until: datetime) -> List[Dict]:
         """Fetch commits within date range"""
-        url = f"{self.base_url}/repos/{self.org}/{self.repo}/commits"
-        params = {
-            'since': since.isoformat(),
-            'until': until.isoformat(),
-            'per_page': 100
-        }
-        
-        all_commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error fetching commits: {response.status_code}")
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-        return all_commits
+        return self.client.list_commits(self.org, self.repo, since.isoformat(), until.isoformat())
 
     def calculate_commit_metrics(self, commits: List[Dict]) -> Dict:
         """Calculate commit-based metrics"""
@@ -151,7 +112,9 @@ class GitHubMetricsCollector:
         }
         
         contributors = set()
-        ai_commits = 0
+        # Check for AI assistance indicators in commit messages (one batch, saved classifications reused)
+        ai_commits = sum(indicators['likely_ai_assisted']
+                         for indicators in score_commits(self.client.store, self.org, self.repo, commits))
         
         for commit in commits:
             # Track unique contributors
@@ -159,12 +122,6 @@ class GitHubMetricsCollector:
             if author and author.get('login'):
                 contributors.add(author['login'])
                 
-            # Check for AI assistance indicators in commit messages
-            message = commit.get('commit', {}).get('message', '').lower()
-            if any(keyword in message for keyword in 
-                   ['ai-generated', 'copilot', 'ai-assisted', 'auto-generated']):
-                ai_commits += 1
-                
         metrics['unique_contributors'] = len(contributors)
         metrics['commits_with_ai_indicators'] = ai_commits
         
@@ -180,7 +137,11 @@ class GitHubMetricsCollector:
 
     def get_issues(self, since: datetime, until: datetime) -> List[Dict]:
         """Fetch issues within date range"""
-        url = f"{self.base_url}/repos/{self.org}/{self.repo}/issues"
+        if self.client.uses_local_data(since.isoformat()):
+            issues = self.client.list_items(self.org, self.repo, 'issues', since.isoformat(), until.isoformat())
+            # Filter out pull requests (they appear in issues endpoint)
+            return [issue for issue in issues if 'pull_request' not in issue]
+
         params = {
             'state': 'all',
             'since': since.isoformat(),
@@ -188,28 +149,14 @@ class GitHubMetricsCollector:
         }
         
         all_issues = []
-        page = 1
         
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error fetching issues: {response.status_code}")
-                break
-                
-            issues = response.json()
-            if not issues:
-                break
-                
+        for issues in self.client.iter_pages(f"/repos/{self.org}/{self.repo}/issues", params, description="issues"):
             # Filter out pull requests (they appear in issues endpoint)
             for issue in issues:
                 if 'pull_request' not in issue:
                     created_at = datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00'))
                     if since <= created_at <= until:
                         all_issues.append(issue)
-                        
-            page += 1
             
         return all_issues
 
@@ -306,15 +253,17 @@ def save_metrics_to_json(metrics: Dict, filename: str):
 
 def main():
     parser = argparse.ArgumentParser(description='Collect GitHub repository metrics')
-    parser.add_argument('--token', required=True, help='GitHub API token')
+    parser.add_argument('--token', required=True, help='GitHub API token (comma-separate several to pool their rate limits)')
     parser.add_argument('--org', required=True, help='GitHub organization/owner')
     parser.add_argument('--repo', required=True, help='Repository name')
     parser.add_argument('--weeks', type=int, default=4, help='Number of weeks to analyze')
     parser.add_argument('--output', default='github_metrics', help='Output file prefix')
     parser.add_argument('--format', choices=['json', 'csv', 'both'], default='both', 
                         help='Output format')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
+    configure_cache_from_args(args)
     
     # Initialize collector
     collector = GitHubMetricsCollector(args.token, args.org, args.repo)
@@ -3,19 +3,18 @@
 Simple GitHub Commit Analysis - Debug Version
 """
 
-import requests
+import argparse
 import json
+import os
+import sys
 from datetime import datetime, timedelta
 
-def test_commit_fetch(token, org, repo, since, until):
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import client_for_config, add_cache_arguments, configure_cache_from_args
+
+def test_commit_fetch(client, org, repo, since, until):
     """Test fetching commits from a single repository"""
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28'
-    }
-    
-    url = f"https://api.github.com/repos/{org}/{repo}/commits"
     params = {
         'since': since,
         'until': until,
@@ -25,7 +24,7 @@ def test_commit_fetch(token, org, repo, since, until):
     print(f"Testing commits for {org}/{repo}")
     print(f"Date range: {since} to {until}")
     
-    response = requests.get(url, headers=headers, params=params)
+    response = client.get(f"/repos/{org}/{repo}/commits", params=params)
     print(f"Response status: {response.status_code}")
     
     if response.status_code == 200:
@@ -52,11 +51,15 @@ def test_commit_fetch(token, org, repo, since, until):
         return []
 
 def main():
+    parser = argparse.ArgumentParser(description='Debug commit fetching for configured repositories')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     # Load config
     with open('config.json', 'r') as f:
         config = json.load(f)
     
-    token = config['github']['token']
+    client = client_for_config(config['github'])
     org = config['github']['organization']
     repos = config['github']['repositories']
     
@@ -72,7 +75,7 @@ def main():
     for repo in repos:
         print(f"\n--- Testing {repo} ---")
         commits = test_commit_fetch(
-            token, org, repo,
+            client, org, repo,
             before_start.isoformat(),
             before_end.isoformat()
         )
@@ -4,84 +4,261 @@ Enhanced GitHub Analysis with Detailed Line Changes
 Fetches detailed commit stats including additions/deletions for more accurate productivity metrics
 """
 
-import requests
+import argparse
 import json
+import os
+import sys
 from datetime import datetime, timedelta
 from collections import defaultdict
-import time
 
-def get_detailed_commit_stats(token, org, repo, commits, max_commits=100):
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import (client_for_config, changed_files_count, run_concurrently, add_cache_arguments,
+                           configure_cache_from_args, FetchError, DEFAULT_MAX_WORKERS, DEFAULT_REPO_WORKERS)
+from commit_store import commit_timestamp, utc_timestamp
+from contributor_stats import weekly_totals
+from sampling import sample_details_adaptively, DEFAULT_RELATIVE_ERROR, DEFAULT_MAX_SAMPLES
+
+def get_detailed_commit_stats(client, org, repo, commits, max_commits=DEFAULT_MAX_SAMPLES, max_workers=DEFAULT_MAX_WORKERS,
+                              target_error=DEFAULT_RELATIVE_ERROR):
     """
-    Fetch detailed stats (additions/deletions) for commits
-    Limited to avoid rate limiting
+    Estimate each author's line changes (additions/deletions) from detailed stats for a sample of their commits
+    Details are fetched per author, a few at a time, until changes per commit are within target_error
+    (at most max_commits per author); up to max_workers requests run in parallel.
+    Commits whose stats are already known locally (e.g. GraphQL backend) are always included.
+    Returns one record per author with their commit count and totals extrapolated to all of their commits.
     """
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28'
-    }
+    by_author = defaultdict(list)
+    for commit in commits:
+        author = (commit.get('author') or {}).get('login')
+        if author:
+            by_author[author].append(commit)
     
-    detailed_stats = []
-    processed = 0
-    
-    print(f"    Fetching detailed stats (max {max_commits} commits)...")
+    print(f"    Fetching detailed stats for {len(by_author)} authors (until within {target_error:.0%}, "
+          f"max {max_commits} commits each, {max_workers} parallel)...")
     
-    for commit in commits[:max_commits]:  # Limit to avoid rate limits
-        sha = commit['sha']
-        url = f"https://api.github.com/repos/{org}/{repo}/commits/{sha}"
+    detailed_stats = []
+    detail_calls = calls_saved = 0
+    for author, author_commits in by_author.items():
+        details_by_sha, sampling = sample_details_adaptively(
+            client, org, repo, author_commits, target_error, max_commits, max_workers
+        )
+        detail_calls += sampling['fetched']
+        calls_saved += sampling['calls_saved']
         
-        try:
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                commit_details = response.json()
-                stats = commit_details.get('stats', {})
-                
-                detailed_stats.append({
-                    'sha': sha,
-                    'author': commit.get('author', {}).get('login') if commit.get('author') else None,
-                    'date': commit.get('commit', {}).get('author', {}).get('date'),
-                    'message': commit.get('commit', {}).get('message', ''),
-                    'additions': stats.get('additions', 0),
-                    'deletions': stats.get('deletions', 0),
-                    'total_changes': stats.get('total', 0),
-                    'files_changed': len(commit_details.get('files', []))
-                })
-                processed += 1
-                
-                # Rate limiting - GitHub allows 5000 requests per hour
-                if processed % 20 == 0:
-                    print(f"      Processed {processed}/{min(len(commits), max_commits)} commits...")
-                    time.sleep(1)  # Brief pause
-                    
-            elif response.status_code == 403:
-                print(f"      Rate limit hit at commit {processed}")
-                break
-            else:
-                print(f"      Error {response.status_code} for commit {sha[:8]}")
-                
-        except Exception as e:
-            print(f"      Exception processing commit {sha[:8]}: {e}")
+        sampled = [details_by_sha[c['sha']] for c in author_commits if 'stats' in details_by_sha.get(c['sha'], {})]
+        if not sampled:
             continue
+        scale = len(author_commits) / len(sampled)
+        
+        detailed_stats.append({
+            'author': author,
+            'commits': len(author_commits),
+            'sampled_commits': len(sampled),
+            'additions': round(sum(d['stats'].get('additions', 0) for d in sampled) * scale),
+            'deletions': round(sum(d['stats'].get('deletions', 0) for d in sampled) * scale),
+            'total_changes': round(sum(d['stats'].get('total', 0) for d in sampled) * scale),
+            'files_changed': round(sum(changed_files_count(d) for d in sampled) * scale)
+        })
     
-    print(f"    Successfully processed {len(detailed_stats)} commits with detailed stats")
+    print(f"    Processed {len(detailed_stats)} authors with {detail_calls} detail calls ({calls_saved} saved by adaptive sampling)")
     return detailed_stats
 
-def analyze_repository_changes(token, org, repos, before_start, before_end, after_start, after_end):
+def fetch_window_stats(client, org, repo, start, end, max_workers=DEFAULT_MAX_WORKERS, commit_backend='rest',
+                       target_error=DEFAULT_RELATIVE_ERROR, max_samples=DEFAULT_MAX_SAMPLES):
+    """Fetch one repository's commits in one period and per-author totals estimated from a sample of them"""
+    commits = client.list_commits(
+        org, repo, start.isoformat(), end.isoformat(), backend=commit_backend,
+        max_items=200, max_pages=5, description=f"commits for {repo}"  # Limit pages
+    )
+    print(f"  {repo}: found {len(commits)} commits from {start.date()} to {end.date()}")
+    
+    # Get detailed stats for a sample of commits
+    return get_detailed_commit_stats(client, org, repo, commits, max_commits=max_samples, max_workers=max_workers,
+                                     target_error=target_error)
+
+# The compare API lists at most this many changed files, on its first page only
+COMPARE_FILES_PER_PAGE = 300
+
+def find_boundary_commits(client, org, repo, dates):
     """
-    Analyze line changes for repositories with detailed commit stats
+    Mainline commit at each date: SHA of the newest commit on the default branch's first-parent line
+    committed at or before it, or None before the first commit
+    The newest commit by date (/commits?until=) can be a branch commit merged only later, so the walk
+    follows parents[0] from the branch head instead, listing commits newest first back to the earliest date.
+    Raises FetchError if the listing cannot be read.
+    """
+    pending = sorted(set(dates), reverse=True)
+    found = {date: None for date in pending}
+    current = None
+    for page in client.iter_pages(f"/repos/{org}/{repo}/commits", description=f"mainline commits for {repo}",
+                                  strict=True):
+        for commit in page:
+            # The first commit listed is the branch head; after that only its first-parent line counts
+            if current is not None and commit['sha'] != current:
+                continue
+            committed = commit_timestamp(commit)
+            while pending and committed <= utc_timestamp(pending[0].isoformat()):
+                found[pending.pop(0)] = commit['sha']
+            parents = commit.get('parents') or []
+            if not pending or not parents:
+                return found
+            current = parents[0]['sha']
+    return found
+
+def compare_range_totals(client, org, repo, base, head):
     """
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28'
+    Aggregate line/file changes between two commits, or None when the compare cannot give exact totals
+    The compare API pages through commits, not files: its file list stops at the first 300 files,
+    so a range touching that many is reported as unavailable rather than as truncated totals.
+    """
+    response = client.get(f"/repos/{org}/{repo}/compare/{base}...{head}")
+    if response.status_code != 200:
+        print(f"    Error comparing {repo} {base[:8]}...{head[:8]}: {response.status_code}")
+        return None
+    
+    data = response.json()
+    files = data.get('files', [])
+    if len(files) >= COMPARE_FILES_PER_PAGE:
+        print(f"    {repo} {base[:8]}...{head[:8]} changes {COMPARE_FILES_PER_PAGE}+ files - compare list is truncated")
+        return None
+    
+    return {
+        'commits': data.get('total_commits', 0),
+        'total_additions': sum(f.get('additions', 0) for f in files),
+        'total_deletions': sum(f.get('deletions', 0) for f in files),
+        'total_changes': sum(f.get('changes', 0) for f in files),
+        'files_changed': len(files)
     }
+
+def window_records_totals(records):
+    """Window totals summed from per-author records"""
+    totals = {'commits': 0, 'total_additions': 0, 'total_deletions': 0, 'total_changes': 0, 'files_changed': 0}
+    for record in records:
+        totals['commits'] += record['commits']
+        totals['total_additions'] += record['additions']
+        totals['total_deletions'] += record['deletions']
+        totals['total_changes'] += record['total_changes']
+        totals['files_changed'] += record['files_changed']
+    return totals
+
+def fetch_window_compare(client, org, repo, start, end, boundaries):
+    """
+    Whole-period totals from one compare between the period's mainline boundary commits
+    (`boundaries`, from find_boundary_commits). Lines are the net change over the period, so code
+    rewritten twice within it counts once. None when the period has no commit before it to compare from
+    or the compare touches too many files to list them all.
+    """
+    head = boundaries[end]
+    base = boundaries[start]
+    
+    if head is None or head == base:
+        print(f"  {repo}: no commits from {start.date()} to {end.date()}")
+        return {'commits': 0, 'total_additions': 0, 'total_deletions': 0, 'total_changes': 0, 'files_changed': 0}
+    
+    totals = compare_range_totals(client, org, repo, base, head) if base else None
+    if totals is not None:
+        print(f"  {repo}: {totals['commits']} commits, {totals['total_changes']:,} lines changed "
+              f"from {start.date()} to {end.date()} (compare)")
+    return totals
+
+def fetch_repository_totals(client, org, repo, windows, max_workers=DEFAULT_MAX_WORKERS, commit_backend='rest',
+                            target_error=DEFAULT_RELATIVE_ERROR, max_samples=DEFAULT_MAX_SAMPLES):
+    """
+    Totals of every (start, end) window of one repository, all measured the same way: net change from the
+    compare API, or - if any window cannot be compared - gross per-commit stats for all of them, so
+    before and after are never compared across units
+    Returns (mode, totals per window) with mode 'compare' or 'per_commit'
+    """
+    compared = []
+    try:
+        boundaries = find_boundary_commits(client, org, repo, [date for window in windows for date in window])
+    except FetchError as error:
+        print(f"    Error finding boundary commits for {repo}: {error}")
+        boundaries = None
+    for start, end in windows:
+        totals = fetch_window_compare(client, org, repo, start, end, boundaries) if boundaries else None
+        if totals is None:
+            print(f"  {repo}: no exact compare for {start.date()} to {end.date()} - "
+                  f"using per-commit stats for every period")
+            break
+        compared.append(totals)
+    else:
+        return 'compare', compared
+    
+    return 'per_commit', [
+        window_records_totals(fetch_window_stats(client, org, repo, start, end, max_workers, commit_backend,
+                                                 target_error, max_samples))
+        for start, end in windows
+    ]
+
+def fetch_window_weekly_stats(client, org, repo, start, end):
+    """
+    Exact per-author totals for one period from the repository's weekly contributor stats
+    Returned in the detailed-stats record shape, one record per author carrying its commit count
+    """
+    stats = client.get_contributor_stats(org, repo) or []
+    totals = weekly_totals(stats, start, end)
+    print(f"  {repo}: {sum(t['commits'] for t in totals.values())} commits by {len(totals)} authors "
+          f"from {start.date()} to {end.date()} (weekly stats)")
     
+    return [{
+        'author': author,
+        'commits': author_totals['commits'],
+        'additions': author_totals['additions'],
+        'deletions': author_totals['deletions'],
+        'total_changes': author_totals['total'],
+        'files_changed': 0  # Not reported by the weekly stats
+    } for author, author_totals in totals.items()]
+
+def analyze_repository_changes(client, org, repos, before_start, before_end, after_start, after_end,
+                               max_workers=DEFAULT_MAX_WORKERS, commit_backend='rest',
+                               repo_workers=DEFAULT_REPO_WORKERS, line_stats_source='commits', per_author=True,
+                               target_error=DEFAULT_RELATIVE_ERROR, max_samples=DEFAULT_MAX_SAMPLES):
+    """
+    Analyze line changes for repositories with detailed commit stats
+    Repositories and their before/after periods are collected concurrently, repo_workers at a time.
+    With line_stats_source 'weekly', exact totals come from /stats/contributors (one call per repository).
+    Without per_author, per-commit stats are skipped and each period's totals come from the compare API
+    (or, for repositories where a period cannot be compared, from per-commit stats for both periods).
+    Otherwise each author's commit details are sampled until their changes per commit are within target_error.
+    Each repository's line_stats_mode records which of 'weekly', 'compare' or 'per_commit' was used.
+    """
     results = {}
     
-    for repo in repos:
+    print(f"\nFetching before/after commits for {len(repos)} repositories ({repo_workers} in parallel)...")
+    windows = [(before_start, before_end), (after_start, after_end)]
+    if line_stats_source == 'weekly':
+        client.prewarm_contributor_stats(org, repos)
+        modes = ['weekly'] * len(repos)
+        detailed = run_concurrently(
+            fetch_window_weekly_stats,
+            [(client, org, repo, start, end) for repo in repos for start, end in windows],
+            repo_workers
+        )
+    elif per_author:
+        modes = ['per_commit'] * len(repos)
+        detailed = run_concurrently(
+            fetch_window_stats,
+            [(client, org, repo, start, end, max_workers, commit_backend, target_error, max_samples)
+             for repo in repos for start, end in windows],
+            repo_workers
+        )
+    else:
+        # One mode per repository, so its before and after totals are in the same units
+        repo_totals = run_concurrently(
+            fetch_repository_totals,
+            [(client, org, repo, windows, max_workers, commit_backend, target_error, max_samples) for repo in repos],
+            repo_workers
+        )
+        modes = [mode for mode, _ in repo_totals]
+        detailed = [totals for _, window_totals in repo_totals for totals in window_totals]
+    
+    for index, repo in enumerate(repos):
         print(f"\n--- Analyzing {repo} with detailed line changes ---")
         
         repo_results = {
+            'line_stats_mode': modes[index],
             'before': {'commits': 0, 'total_additions': 0, 'total_deletions': 0, 'total_changes': 0, 'files_changed': 0},
             'after': {'commits': 0, 'total_additions': 0, 'total_deletions': 0, 'total_changes': 0, 'files_changed': 0},
             'user_stats': defaultdict(lambda: {
@@ -90,68 +267,25 @@ def analyze_repository_changes(token, org, repos, before_start, before_end, afte
             })
         }
         
-        # Fetch basic commits for both periods
-        url = f"https://api.github.com/repos/{org}/{repo}/commits"
-        
-        # Before period
-        print("  Fetching 'before' commits...")
-        before_commits = []
-        page = 1
-        while len(before_commits) < 200 and page <= 5:  # Limit pages
-            params = {
-                'since': before_start.isoformat(),
-                'until': before_end.isoformat(),
-                'per_page': 100,
-                'page': page
-            }
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code == 200:
-                commits = response.json()
-                if not commits:
-                    break
-                before_commits.extend(commits)
-                page += 1
-            else:
-                break
-        
-        # After period
-        print("  Fetching 'after' commits...")
-        after_commits = []
-        page = 1
-        while len(after_commits) < 200 and page <= 5:  # Limit pages
-            params = {
-                'since': after_start.isoformat(),
-                'until': after_end.isoformat(),
-                'per_page': 100,
-                'page': page
-            }
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code == 200:
-                commits = response.json()
-                if not commits:
-                    break
-                after_commits.extend(commits)
-                page += 1
-            else:
-                break
+        before_detailed, after_detailed = detailed[2 * index], detailed[2 * index + 1]
         
-        print(f"  Found {len(before_commits)} before commits, {len(after_commits)} after commits")
-        
-        # Get detailed stats for a sample of commits
-        before_detailed = get_detailed_commit_stats(token, org, repo, before_commits, max_commits=50)
-        after_detailed = get_detailed_commit_stats(token, org, repo, after_commits, max_commits=50)
+        if isinstance(before_detailed, dict):
+            # Window totals only - there are no per-author records
+            repo_results['before'].update(before_detailed)
+            repo_results['after'].update(after_detailed)
+            before_detailed = after_detailed = []
         
         # Analyze before period
         for commit_detail in before_detailed:
             author = commit_detail['author']
             if author:
-                repo_results['before']['commits'] += 1
+                repo_results['before']['commits'] += commit_detail.get('commits', 1)
                 repo_results['before']['total_additions'] += commit_detail['additions']
                 repo_results['before']['total_deletions'] += commit_detail['deletions']
                 repo_results['before']['total_changes'] += commit_detail['total_changes']
                 repo_results['before']['files_changed'] += commit_detail['files_changed']
                 
-                repo_results['user_stats'][author]['before']['commits'] += 1
+                repo_results['user_stats'][author]['before']['commits'] += commit_detail.get('commits', 1)
                 repo_results['user_stats'][author]['before']['additions'] += commit_detail['additions']
                 repo_results['user_stats'][author]['before']['deletions'] += commit_detail['deletions']
                 repo_results['user_stats'][author]['before']['changes'] += commit_detail['total_changes']
@@ -161,13 +295,13 @@ def analyze_repository_changes(token, org, repos, before_start, before_end, afte
         for commit_detail in after_detailed:
             author = commit_detail['author']
             if author:
-                repo_results['after']['commits'] += 1
+                repo_results['after']['commits'] += commit_detail.get('commits', 1)
                 repo_results['after']['total_additions'] += commit_detail['additions']
                 repo_results['after']['total_deletions'] += commit_detail['deletions']
                 repo_results['after']['total_changes'] += commit_detail['total_changes']
                 repo_results['after']['files_changed'] += commit_detail['files_changed']
                 
-                repo_results['user_stats'][author]['after']['commits'] += 1
+                repo_results['user_stats'][author]['after']['commits'] += commit_detail.get('commits', 1)
                 repo_results['user_stats'][author]['after']['additions'] += commit_detail['additions']
                 repo_results['user_stats'][author]['after']['deletions'] += commit_detail['deletions']
                 repo_results['user_stats'][author]['after']['changes'] += commit_detail['total_changes']
@@ -179,7 +313,7 @@ def analyze_repository_changes(token, org, repos, before_start, before_end, afte
         before = repo_results['before']
         after = repo_results['after']
         
-        print(f"  Repository Summary:")
+        print(f"  Repository Summary ({repo_results['line_stats_mode']} line stats):")
         print(f"    Commits: {before['commits']} → {after['commits']} ({(after['commits']/before['commits']-1)*100:+.1f}% change)" if before['commits'] > 0 else "    No before commits with details")
         print(f"    Lines added: {before['total_additions']:,} → {after['total_additions']:,} ({(after['total_additions']/before['total_additions']-1)*100:+.1f}% change)" if before['total_additions'] > 0 else "    Lines added: 0 → {:,}".format(after['total_additions']))
         print(f"    Lines deleted: {before['total_deletions']:,} → {after['total_deletions']:,} ({(after['total_deletions']/before['total_deletions']-1)*100:+.1f}% change)" if before['total_deletions'] > 0 else "    Lines deleted: 0 → {:,}".format(after['total_deletions']))
@@ -188,13 +322,26 @@ def analyze_repository_changes(token, org, repos, before_start, before_end, afte
     return results
 
 def main():
+    parser = argparse.ArgumentParser(description='Analyze detailed line changes before/after AI adoption')
+    parser.add_argument('--per-author', action='store_true',
+                        help='Break line changes down per author from per-commit stats (slower than window totals)')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    configure_cache_from_args(args)
+    
     # Load config
     with open('config.json', 'r') as f:
         config = json.load(f)
     
-    token = config['github']['token']
+    client = client_for_config(config['github'])
     org = config['github']['organization']
     repos = config['github']['repositories']
+    max_workers = config['github'].get('max_workers', DEFAULT_MAX_WORKERS)
+    commit_backend = config['github'].get('commit_backend', 'rest')
+    repo_workers = config['github'].get('repo_workers', DEFAULT_REPO_WORKERS)
+    line_stats_source = config['github'].get('line_stats_source', 'commits')
+    target_error = config['analysis'].get('sample_relative_error', DEFAULT_RELATIVE_ERROR)
+    max_samples = config['analysis'].get('sample_max_commits', DEFAULT_MAX_SAMPLES)
     
     # Date ranges
     adoption_date = datetime.fromisoformat(config['analysis']['copilot_adoption_date'])
@@ -213,7 +360,11 @@ def main():
     print(f"After: {after_start.date()} to {after_end.date()} ({after_weeks} weeks)")
     
     # Run analysis
-    results = analyze_repository_changes(token, org, repos, before_start, before_end, after_start, after_end)
+    results = analyze_repository_changes(client, org, repos, before_start, before_end, after_start, after_end,
+                                         max_workers=max_workers, commit_backend=commit_backend,
+                                         repo_workers=repo_workers, line_stats_source=line_stats_source,
+                                         per_author=args.per_author, target_error=target_error,
+                                         max_samples=max_samples)
     
     # Overall summary
     print(f"\n" + "="*60)
@@ -4,20 +4,35 @@ GitHub Team Members Fetcher
 Gets list of team members from a GitHub organization team
 """
 
-import requests
+import argparse
 import json
+import os
+import sys
 
-def get_team_members(token, org, team_slug):
-    """Get all members of a GitHub team"""
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28'
-    }
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import get_client, client_for_config, add_cache_arguments, configure_cache_from_args
+
+def get_team_members(token, org, team_slug, client=None):
+    """
+    Get all members of a GitHub team (pass `client` to reuse a configured token pool)
+    The roster is saved to the local store; in offline mode the saved roster is returned instead
+    """
+    client = client or get_client(token)
+    usernames = client.snapshot(org, 'team_members', team_slug, lambda: fetch_team_members(client, org, team_slug))
+    if not usernames:
+        return []
+    
+    print(f"\nMembers of '{team_slug}' team:")
+    for username in usernames:
+        print(f"  - {username}")
     
+    return usernames
+
+def fetch_team_members(client, org, team_slug):
+    """Member logins of a team from the API, or None if the team cannot be read"""
     # First, get team ID
-    teams_url = f"https://api.github.com/orgs/{org}/teams"
-    response = requests.get(teams_url, headers=headers)
+    response = client.get(f"/orgs/{org}/teams", params={'per_page': 100})
     
     if response.status_code != 200:
         print(f"Error fetching teams: {response.status_code}")
@@ -26,7 +41,7 @@ def get_team_members(token, org, team_slug):
             print(f"Error message: {error_data.get('message', 'Unknown error')}")
         except:
             pass
-        return []
+        return None
     
     teams = response.json()
     team_id = None
@@ -40,42 +55,31 @@ def get_team_members(token, org, team_slug):
     
     if not team_id:
         print(f"\nTeam '{team_slug}' not found!")
-        return []
+        return None
     
     # Get team members
-    members_url = f"https://api.github.com/teams/{team_id}/members"
-    response = requests.get(members_url, headers=headers)
-    
-    if response.status_code != 200:
-        print(f"Error fetching team members: {response.status_code}")
-        try:
-            error_data = response.json()
-            print(f"Error message: {error_data.get('message', 'Unknown error')}")
-        except:
-            pass
-        return []
-    
-    members = response.json()
-    usernames = [member['login'] for member in members]
+    members = client.paginate(f"/teams/{team_id}/members", description="team members")
+    if not members:
+        return None
     
-    print(f"\nMembers of '{team_slug}' team:")
-    for username in usernames:
-        print(f"  - {username}")
-    
-    return usernames
+    return [member['login'] for member in members]
 
 def main():
+    parser = argparse.ArgumentParser(description='List the members of a GitHub team')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     # Load config
     with open('config.json', 'r') as f:
         config = json.load(f)
     
-    token = config['github']['token']
+    client = client_for_config(config['github'])
     org = config['github']['organization']
     team_slug = 'apps-team'
     
     print(f"🔍 Fetching members of '{team_slug}' team in {org} organization...")
     
-    usernames = get_team_members(token, org, team_slug)
+    usernames = get_team_members(None, org, team_slug, client=client)
     
     if usernames:
         print(f"\n✅ Found {len(usernames)} team members")
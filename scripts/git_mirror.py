@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local Git Mirror Backend
+Keeps bare mirrors of repositories up to date with incremental `git fetch` and streams
+`git log --numstat` into commit records with exact line stats, without any API calls
+"""
+
+import base64
+import os
+import re
+import subprocess
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from commit_store import utc_timestamp
+
+DEFAULT_MIRROR_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ai-impact-insights', 'mirrors')
+DEFAULT_GIT_URL = 'https://github.com/{org}/{repo}.git'
+
+# Record / field separators that never appear in commit metadata
+RECORD_SEP = '\x1e'
+FIELD_SEP = '\x1f'
+LOG_FORMAT = f'{RECORD_SEP}%H{FIELD_SEP}%an{FIELD_SEP}%ae{FIELD_SEP}%aI{FIELD_SEP}%cI{FIELD_SEP}%B{FIELD_SEP}'
+
+# <id>+<login>@users.noreply.github.com or <login>@users.noreply.github.com
+NOREPLY_EMAIL = re.compile(r'^(?:\d+\+)?([A-Za-z0-9-]+)@users\.noreply\.github\.com$', re.IGNORECASE)
+
+def login_from_email(email: Optional[str]) -> Optional[str]:
+    """GitHub login encoded in a noreply commit email, if it is one"""
+    match = NOREPLY_EMAIL.match(email or '')
+    return match.group(1) if match else None
+
+def parse_record(raw: str, resolve_login: Callable[[str], Optional[str]]) -> Optional[Dict]:
+    """Turn one formatted `git log --numstat` record into the REST list-commits shape with stats"""
+    parts = raw.split(FIELD_SEP, 6)
+    if len(parts) < 7:
+        return None
+    sha, name, email, date, committed, message, numstat = parts
+
+    additions = deletions = files = 0
+    for line in numstat.splitlines():
+        fields = line.split('\t', 2)
+        if len(fields) != 3:
+            continue
+        # Binary files report '-' for both counts
+        additions += int(fields[0]) if fields[0].isdigit() else 0
+        deletions += int(fields[1]) if fields[1].isdigit() else 0
+        files += 1
+
+    login = resolve_login(email)
+    return {
+        'sha': sha,
+        'author': {'login': login} if login else None,
+        'commit': {
+            'message': message.rstrip('\n'),
+            'author': {'name': name, 'email': email, 'date': date},
+            'committer': {'date': committed}
+        },
+        'stats': {
+            'additions': additions,
+            'deletions': deletions,
+            'total': additions + deletions
+        },
+        'files_changed': files
+    }
+
+class GitMirror:
+    def __init__(self, mirror_dir: str = DEFAULT_MIRROR_DIR, url_template: str = DEFAULT_GIT_URL,
+                 auth_token: Optional[Callable[[], Optional[str]]] = None):
+        """
+        Manage bare mirrors under mirror_dir, cloned from url_template ({org} and {repo} are filled in)
+        auth_token, if given, returns the token sent as HTTP basic auth when cloning or fetching
+        """
+        self.mirror_dir = mirror_dir
+        self.url_template = url_template
+        self.auth_token = auth_token
+
+        self._lock = threading.Lock()
+        self._repo_locks: Dict[tuple, threading.Lock] = {}
+        self._updated = set()
+
+    def path(self, org: str, repo: str) -> str:
+        return os.path.join(self.mirror_dir, org, f"{repo}.git")
+
+    def _git(self, args: List[str], **kwargs) -> subprocess.CompletedProcess:
+        """Run git with credentials passed through the environment rather than the command line"""
+        env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+        token = self.auth_token() if self.auth_token else None
+        if token:
+            basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            env.update({
+                'GIT_CONFIG_COUNT': '1',
+                'GIT_CONFIG_KEY_0': 'http.extraHeader',
+                'GIT_CONFIG_VALUE_0': f'Authorization: Basic {basic}'
+            })
+        return subprocess.run(['git'] + args, env=env, capture_output=True, text=True, **kwargs)
+
+    def update(self, org: str, repo: str) -> bool:
+        """Clone the mirror if missing, otherwise fetch what is new; done at most once per process per repo"""
+        key = (org, repo)
+        with self._lock:
+            lock = self._repo_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key in self._updated:
+                return True
+
+            path = self.path(org, repo)
+            if os.path.isdir(path):
+                print(f"  Fetching mirror of {repo}...")
+                result = self._git(['--git-dir', path, 'fetch', '--prune', '--quiet', 'origin'])
+            else:
+                print(f"  Cloning mirror of {repo}...")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                url = self.url_template.format(org=org, repo=repo)
+                result = self._git(['clone', '--mirror', '--quiet', url, path])
+
+            if result.returncode != 0:
+                print(f"Error updating mirror of {repo}: {result.stderr.strip()}")
+                return False
+
+            self._updated.add(key)
+            return True
+
+    def has_commit(self, org: str, repo: str, sha: str) -> bool:
+        return self._git(['--git-dir', self.path(org, repo), 'cat-file', '-e', f'{sha}^{{commit}}']).returncode == 0
+
+    def iter_commits(self, org: str, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+                     resolve_login: Callable[[str], Optional[str]] = login_from_email,
+                     revisions: str = 'HEAD') -> Iterator[Dict]:
+        """
+        Stream default-branch commits in a date range, newest first, parsing git output as it arrives
+        revisions narrows them to a range such as '<sha>..HEAD'
+        """
+        args = ['git', '--git-dir', self.path(org, repo), 'log', revisions, '--numstat', '--no-renames',
+                '--diff-merges=first-parent', f'--format={LOG_FORMAT}']
+        # git reads timestamps without an offset as local time; the API backends read them as UTC
+        if since:
+            args.append(f'--since={utc_timestamp(since)}')
+        if until:
+            args.append(f'--until={utc_timestamp(until)}')
+
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   text=True, encoding='utf-8', errors='replace')
+        try:
+            buffer = []
+            for line in process.stdout:
+                if line.startswith(RECORD_SEP) and buffer:
+                    record = parse_record(''.join(buffer)[1:], resolve_login)
+                    if record:
+                        yield record
+                    buffer = []
+                buffer.append(line)
+
+            if buffer:
+                record = parse_record(''.join(buffer)[1:], resolve_login)
+                if record:
+                    yield record
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    def list_commits(self, org: str, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+                     author: Optional[str] = None,
+                     resolve_login: Callable[[str], Optional[str]] = login_from_email) -> Optional[List[Dict]]:
+        """
+        Update the mirror and return its commits in a date range (optionally by one author login)
+        None when the mirror cannot be updated
+        """
+        if not self.update(org, repo):
+            return None
+
+        return [
+            commit for commit in self.iter_commits(org, repo, since, until, resolve_login)
+            if not author or (commit['author'] or {}).get('login', '').lower() == author.lower()
+        ]
@@ -0,0 +1,767 @@
+#!/usr/bin/env python3
+"""
+Shared GitHub API Client
+Keep-alive connection pool, auth headers and pagination used by every analysis script
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from graphql_commits import fetch_commit_history, USER_ID_QUERY
+from http_cache import ResponseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from commit_store import CommitStore, DEFAULT_STORE_PATH, commit_timestamp, utc_timestamp
+from incremental_sync import sync_commits, sync_items
+from contributor_stats import fetch_contributor_stats, prewarm_contributor_stats
+from git_mirror import GitMirror, login_from_email, DEFAULT_MIRROR_DIR, DEFAULT_GIT_URL
+from credentials import TokenCredential, credentials_from_config
+from ai_signals import configure_model
+
+DEFAULT_BASE_URL = 'https://api.github.com'
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MAX_WORKERS = 8
+# The search API never returns more than this many results for one query
+SEARCH_RESULT_LIMIT = 1000
+# How many pages of a list endpoint are fetched ahead concurrently once the last page is known
+DEFAULT_PAGE_WORKERS = 4
+# How many (repository, window) collections run at once in the before/after analyzers
+DEFAULT_REPO_WORKERS = 4
+COMMIT_BACKENDS = ('rest', 'graphql', 'git')
+# How many times a request rejected by a rate limit is retried after waiting
+MAX_RATE_LIMIT_RETRIES = 5
+
+class FetchError(RuntimeError):
+    """A listing requested with strict=True could not be fetched completely, or a request stayed rate limited"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+# Response cache and commit store shared by every client; set up by entry points via configure_cache()
+_cache: Optional[ResponseCache] = None
+_store: Optional[CommitStore] = None
+# Whether listings are served from the commit store after an incremental sync; see configure_sync()
+_incremental = False
+# Whether to work only from local data kept warm by the collector; see configure_offline()
+_offline = False
+
+class GitHubClient:
+    def __init__(self, credentials: Union[str, Sequence], base_url: str = DEFAULT_BASE_URL,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        """
+        Create a pooled session authenticated with one token, a list of tokens, or credential objects
+        With several credentials, each request goes to the one with the most rate limit budget left
+        """
+        self.base_url = base_url.rstrip('/')
+        if isinstance(credentials, str):
+            credentials = [credentials]
+        self.credentials = [TokenCredential(c) if isinstance(c, str) else c for c in credentials]
+        self._credential_lock = threading.Lock()
+        self._next_credential = 0
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'X-GitHub-Api-Version': '2022-11-28'
+        })
+
+        # Reuse TLS connections across calls instead of a new handshake per request
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Commit details already known locally (e.g. from GraphQL history), keyed by (org, repo, sha)
+        self._commit_details: Dict[tuple, Dict] = {}
+        self._user_node_ids: Dict[str, Optional[str]] = {}
+        self._contributor_stats: Dict[tuple, Optional[List[Dict]]] = {}
+        self.page_workers = DEFAULT_PAGE_WORKERS
+        self.cache = _cache
+        # Cached responses are never served across different credential sets
+        self.cache_scope = ResponseCache.make_scope(credential.key for credential in self.credentials)
+        self.store = _store
+        self.incremental = _incremental
+        self.offline = _offline
+
+        # Bare mirrors for the 'git' backend, and commit emails mapped to GitHub logins
+        self.mirror: Optional[GitMirror] = None
+        self.git_logins: Dict[str, str] = {}
+        self._email_logins: Dict[tuple, Optional[str]] = {}
+
+        # Earliest date each (org, repo, kind) has been synced from during this process
+        self._synced: Dict[tuple, str] = {}
+        self._sync_locks: Dict[tuple, threading.Lock] = {}
+        self._sync_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        """Resolve an API path (or pass through an absolute URL)"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, path: str, params: Optional[Dict] = None) -> requests.Response:
+        """
+        GET an API path using the shared session
+        With a cache configured, sends If-None-Match / If-Modified-Since and serves 304s from disk
+        """
+        url = self.url(path)
+        resource = 'search' if '/search/' in url else 'core'
+        if self.cache is None:
+            return self.request('GET', url, resource=resource, params=params)
+
+        key = ResponseCache.make_key(url, params, self.cache_scope)
+        entry = self.cache.get(key)
+        if self.offline:
+            # Whatever was cached last, without revalidating
+            return offline_response(url, entry)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.request('GET', url, resource=resource, params=params, headers=headers)
+
+        if response.status_code == 304 and entry:
+            return cached_response(entry, response)
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and (etag or last_modified):
+            self.cache.put(key, etag, last_modified, response.headers, response.text)
+
+        return response
+
+    def pick_credential(self, resource: str = 'core'):
+        """
+        The credential that can send soonest, preferring the most remaining budget
+        Ties (e.g. budgets not yet known) rotate so load spreads evenly across credentials
+        """
+        with self._credential_lock:
+            count = len(self.credentials)
+            start = self._next_credential
+            self._next_credential = (start + 1) % count
+
+        best, best_rank = None, None
+        for offset in range(count):
+            credential = self.credentials[(start + offset) % count]
+            wait, remaining = credential.rate_limiter.headroom(resource)
+            rank = (wait, -remaining)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = credential, rank
+        return best
+
+    def request(self, method: str, url: str, resource: str = 'core', **kwargs) -> requests.Response:
+        """
+        Send a request through the rate limit scheduler of the best available credential
+        Rate limit rejections are waited out (or moved to another credential) and retried
+        rather than returned as partial data; still rejected after MAX_RATE_LIMIT_RETRIES attempts,
+        the request raises FetchError instead of handing the 403/429 back as a response
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        if self.offline:
+            return offline_response(url)
+
+        for attempt in range(1, MAX_RATE_LIMIT_RETRIES + 1):
+            credential = self.pick_credential(resource)
+            credential.rate_limiter.acquire(resource)
+            headers['Authorization'] = credential.authorization()
+            response = self.session.request(method, url, headers=headers, **kwargs)
+
+            wait = credential.rate_limiter.update(response)
+            if wait is None:
+                return response
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+
+            if len(self.credentials) > 1 and self.pick_credential(resource) is not credential:
+                print(f"Rate limited by GitHub ({response.status_code}) - switching credentials...")
+                continue
+
+            print(f"Rate limited by GitHub ({response.status_code}) - retrying in {wait:.0f}s...")
+            time.sleep(wait)
+
+        raise FetchError(f"Still rate limited by GitHub ({response.status_code}) after "
+                         f"{MAX_RATE_LIMIT_RETRIES} attempts: {url}", response.status_code)
+
+    def graphql(self, query: str, variables: Optional[Dict] = None) -> Optional[Dict]:
+        """Run a GraphQL query and return its data, or None on error"""
+        response = self.request('POST', self.url('/graphql'), resource='graphql',
+                                json={'query': query, 'variables': variables or {}})
+
+        if response.status_code != 200:
+            print(f"GraphQL error: {response.status_code}")
+            return None
+
+        payload = response.json()
+        if payload.get('errors'):
+            print(f"GraphQL error: {payload['errors'][0].get('message', 'Unknown error')}")
+            return None
+        return payload.get('data')
+
+    def get_user_node_id(self, login: str) -> Optional[str]:
+        """Look up (and remember) the GraphQL node ID for a user login"""
+        if login not in self._user_node_ids:
+            data = self.graphql(USER_ID_QUERY, {'login': login})
+            user = (data or {}).get('user')
+            self._user_node_ids[login] = user['id'] if user else None
+        return self._user_node_ids[login]
+
+    def iter_pages(self, path: str, params: Optional[Dict] = None, max_pages: Optional[int] = None,
+                   description: str = 'results', items_key: Optional[str] = None,
+                   strict: bool = False) -> Iterator[List[Dict]]:
+        """
+        Yield each page of a paginated list endpoint in order
+        Once the first response's Link header gives the last page, up to page_workers of the following
+        pages are fetched concurrently ahead of the consumer (who may still stop early).
+        Stops at the first empty or short page, on an error response (raising FetchError with strict),
+        or after max_pages. items_key names the list inside object responses (e.g. 'items' for the search API)
+        """
+        params = dict(params or {})
+        params.setdefault('per_page', 100)
+        per_page = params['per_page']
+
+        first = self._get_page(path, params, 1, description, items_key, strict)
+        if not first:
+            return
+        items, response = first
+        yield items
+
+        # A short page is the last page - no need to ask for an empty one
+        if len(items) < per_page:
+            return
+
+        last_page = last_page_number(response)
+        if last_page is None:
+            # No Link header to plan from: walk on one page at a time
+            last_page = max_pages if max_pages is not None else math.inf
+            workers = 1
+        else:
+            last_page = min(last_page, max_pages) if max_pages is not None else last_page
+            workers = max(1, self.page_workers)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        next_page = 2
+        try:
+            while pending or next_page <= last_page:
+                while next_page <= last_page and len(pending) < workers:
+                    pending.append(executor.submit(self._get_page, path, params, next_page, description,
+                                                   items_key, strict))
+                    next_page += 1
+
+                result = pending.popleft().result()
+                if not result:
+                    return
+                items, _ = result
+                yield items
+
+                if len(items) < per_page:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _get_page(self, path: str, params: Dict, page: int, description: str,
+                  items_key: Optional[str] = None, strict: bool = False) -> Optional[tuple]:
+        """(items, response) for one page, or None on an error (FetchError with strict) or empty page"""
+        response = self.get(path, params=dict(params, page=page))
+
+        if response.status_code != 200:
+            if strict:
+                raise FetchError(f"Error fetching {description} page {page}: {response.status_code}",
+                                 response.status_code)
+            print(f"Error fetching {description}: {response.status_code}")
+            return None
+
+        items = response.json()
+        if items_key:
+            items = items.get(items_key, [])
+        return (items, response) if items else None
+
+    def paginate(self, path: str, params: Optional[Dict] = None, max_items: Optional[int] = None,
+                 max_pages: Optional[int] = None, description: str = 'results', strict: bool = False) -> List[Dict]:
+        """Collect all pages of a list endpoint, stopping once max_items have been gathered"""
+        if max_items is not None:
+            # Never fetch pages (even ahead, in parallel) past the ones max_items needs
+            per_page = (params or {}).get('per_page', 100)
+            needed = max(1, math.ceil(max_items / per_page))
+            max_pages = min(max_pages, needed) if max_pages is not None else needed
+
+        all_items = []
+
+        for items in self.iter_pages(path, params, max_pages=max_pages, description=description, strict=strict):
+            all_items.extend(items)
+            if max_items is not None and len(all_items) >= max_items:
+                break
+
+        return all_items
+
+    def list_commits(self, org: str, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+                     author: Optional[str] = None, backend: str = 'rest', max_items: Optional[int] = None,
+                     max_pages: Optional[int] = None, description: str = 'commits') -> List[Dict]:
+        """
+        List commits in a repository, newest first, in the REST list-commits shape
+        In incremental mode the repository is synced into the commit store and the whole window is
+        answered from it (max_items / max_pages only bound API fetches, so they do not apply)
+        """
+        if self.uses_local_data(since):
+            self.sync(org, repo, 'commits', since, backend)
+            return self.store.query(org, repo, author, since, until)
+
+        return self.fetch_commits(org, repo, since, until, author, backend, max_items, max_pages, description)
+
+    def list_commits_for_periods(self, org: str, repo: str, periods: Sequence[tuple], author: Optional[str] = None,
+                                 backend: str = 'rest', max_items: Optional[int] = None,
+                                 description: str = 'commits') -> List[List[Dict]]:
+        """
+        Commits for any number of (since, until) periods from one listing of the whole span, split locally
+        Overlapping or adjacent periods share one download. max_items is a per-period budget: the listing
+        runs newest first, so a shared cap would be used up by the newest period, and capped periods are
+        listed one by one instead. An until of None means up to now.
+        """
+        bounds = [(utc_timestamp(since), utc_timestamp(until)) for since, until in periods]
+        if max_items is not None and len(periods) > 1 and not self.uses_local_data(min(since for since, _ in bounds)):
+            return [
+                split_by_period(self.list_commits(org, repo, since, until, author, backend, max_items,
+                                                  description=description), [period])[0]
+                for (since, until), period in zip(periods, bounds)
+            ]
+
+        untils = [until for _, until in bounds]
+        commits = self.list_commits(
+            org, repo, min(since for since, _ in bounds), None if None in untils else max(untils), author,
+            backend, max_items, description=description
+        )
+        return split_by_period(commits, bounds)
+
+    def search_commits(self, org: str, author: str, since: str, until: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Find an author's commits anywhere in the org through the commit search API, grouped by repository
+        A few paginated calls replace one listing per repository; search only indexes default branches
+        and returns at most SEARCH_RESULT_LIMIT commits per query
+        """
+        dates = f"{since[:10]}..{until[:10]}" if until else f">={since[:10]}"
+        params = {'q': f"author:{author} org:{org} committer-date:{dates}", 'sort': 'committer-date',
+                  'order': 'desc', 'per_page': 100}
+
+        by_repo: Dict[str, List[Dict]] = {}
+        count = 0
+        for items in self.iter_pages('/search/commits', params, max_pages=SEARCH_RESULT_LIMIT // 100,
+                                     description=f"commit search for {author}", items_key='items'):
+            for item in items:
+                by_repo.setdefault(item['repository']['name'], []).append(item)
+            count += len(items)
+
+        if count >= SEARCH_RESULT_LIMIT:
+            print(f"Warning: commit search for {author} hit the {SEARCH_RESULT_LIMIT} result limit - narrow the date range")
+        return by_repo
+
+    def get_contributor_stats(self, org: str, repo: str) -> Optional[List[Dict]]:
+        """Weekly per-author stats for a repository's whole history (memoized; 202 responses are polled)"""
+        key = (org, repo)
+        if self._contributor_stats.get(key) is None:
+            self._contributor_stats[key] = fetch_contributor_stats(self, org, repo)
+        return self._contributor_stats[key]
+
+    def prewarm_contributor_stats(self, org: str, repos: Sequence[str]):
+        """Trigger the stats computation for many repositories in parallel before polling any of them"""
+        prewarm_contributor_stats(self, org, [repo for repo in repos if (org, repo) not in self._contributor_stats],
+                                  DEFAULT_MAX_WORKERS)
+
+    def list_copilot_seats(self, org: str) -> Optional[List[Dict]]:
+        """Every Copilot seat assignment in the org (saved to the store; offline, the saved copy), None on failure"""
+        def fetch():
+            seats = []
+            for items in self.iter_pages(f"/orgs/{org}/copilot/billing/seats", {'per_page': 100},
+                                         description="Copilot seats", items_key='seats'):
+                seats.extend(items)
+            return seats or None
+
+        return self.snapshot(org, 'copilot_seats', org, fetch)
+
+    def list_items(self, org: str, repo: str, kind: str, since: str, until: Optional[str] = None) -> List[Dict]:
+        """Pull requests or issues (`kind` 'pulls' / 'issues') created in a window, synced into and read from the store"""
+        self.sync(org, repo, kind, since)
+        return self.store.query_items(org, repo, kind, since, until)
+
+    def uses_local_data(self, since: Optional[str] = None) -> bool:
+        """Whether a listing starting at `since` is answered from the synced local store"""
+        return (self.incremental or self.offline) and self.store is not None and bool(since)
+
+    def snapshot(self, org: str, kind: str, key: str, fetch) -> Optional[object]:
+        """
+        An org-level listing (team roster, Copilot seats, ...): fetched and saved to the store, or
+        offline, the last saved copy. fetch() returns the data, or None when it could not be fetched.
+        """
+        if self.offline:
+            saved = self.store.get_snapshot(org, kind, key) if self.store is not None else None
+            if saved is None:
+                print(f"No local copy of {kind} '{key}' - run the collector first")
+                return None
+            return saved['data']
+
+        data = fetch()
+        if data is not None and self.store is not None:
+            self.store.put_snapshot(org, kind, key, data)
+        return data
+
+    def sync(self, org: str, repo: str, kind: str, since: str, backend: str = 'rest'):
+        """Incrementally sync one repository's commits, pulls or issues; at most once per process and window"""
+        key = (org, repo, kind)
+        since = utc_timestamp(since)
+        with self._sync_lock:
+            lock = self._sync_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            synced = self._synced.get(key)
+            if synced is not None and synced <= since:
+                return
+
+            if self.offline:
+                state = self.store.get_sync_state(org, repo, kind)
+                if state is None or since < state['covered_since']:
+                    print(f"Warning: local {kind} for {repo} only go back to "
+                          f"{state['covered_since'] if state else 'nothing'} - results before that are missing")
+                self._synced[key] = since
+                return
+
+            try:
+                if kind == 'commits':
+                    count = sync_commits(self, org, repo, since, backend)
+                else:
+                    count = sync_items(self, org, repo, kind, since)
+            except FetchError as error:
+                print(f"Warning: could not sync {repo} {kind} ({error}) - using the {kind} stored so far")
+                return
+            print(f"  Synced {repo} {kind}: {count} fetched")
+            self._synced[key] = since
+
+    def fetch_commits(self, org: str, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+                      author: Optional[str] = None, backend: str = 'rest', max_items: Optional[int] = None,
+                      max_pages: Optional[int] = None, description: str = 'commits', strict: bool = False) -> List[Dict]:
+        """
+        Fetch commits from the API, newest first, in the REST list-commits shape
+        The 'graphql' and 'git' backends also return line stats, so later detail lookups need no extra calls;
+        'git' reads every commit from a local mirror, so max_items / max_pages do not apply to it.
+        With strict, a listing cut short by an error raises FetchError instead of returning what was fetched.
+        """
+        if backend in ('graphql', 'git'):
+            if backend == 'git':
+                commits = self.get_mirror().list_commits(
+                    org, repo, since, until, author, resolve_login=lambda email: self.resolve_login(org, email)
+                )
+            else:
+                commits = fetch_commit_history(self, org, repo, since, until, author, max_items=max_items,
+                                               strict=strict)
+            if commits is None:
+                if strict:
+                    raise FetchError(f"Error fetching {description}")
+                commits = []
+            return self.remember_commits(org, repo, commits)
+
+        params = {'per_page': 100}
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        if author:
+            params['author'] = author
+
+        return self.paginate(f"/repos/{org}/{repo}/commits", params,
+                             max_items=max_items, max_pages=max_pages, description=description, strict=strict)
+
+    def fetch_commits_after(self, org: str, repo: str, sha: str, backend: str = 'rest') -> Optional[List[Dict]]:
+        """
+        Default-branch commits that `sha` does not reach - everything merged since it, whatever their dates
+        None when the backend cannot tell ('graphql') or `sha` has left the history (e.g. a force push);
+        raises FetchError when the commits cannot be fetched completely
+        """
+        if backend == 'git':
+            mirror = self.get_mirror()
+            if not mirror.update(org, repo):
+                raise FetchError(f"Error updating mirror of {repo}")
+            if not mirror.has_commit(org, repo, sha):
+                return None
+            commits = list(mirror.iter_commits(org, repo, resolve_login=lambda email: self.resolve_login(org, email),
+                                               revisions=f"{sha}..HEAD"))
+            return self.remember_commits(org, repo, commits)
+        if backend != 'rest':
+            return None
+
+        response = self.get(f"/repos/{org}/{repo}")
+        if response.status_code != 200:
+            raise FetchError(f"Error fetching {repo}: {response.status_code}", response.status_code)
+        branch = response.json()['default_branch']
+
+        # The compare lists commits oldest first, paginated like any list endpoint
+        commits = []
+        try:
+            for page in self.iter_pages(f"/repos/{org}/{repo}/compare/{sha}...{branch}",
+                                        description=f"new commits for {repo}", items_key='commits', strict=True):
+                commits.extend(page)
+        except FetchError as error:
+            if error.status_code == 404:
+                return None
+            raise
+        return commits[::-1]
+
+    def remember_commits(self, org: str, repo: str, commits: List[Dict]) -> List[Dict]:
+        """Keep commits that carry line stats for later detail lookups, in memory and in the store"""
+        for commit in commits:
+            self._commit_details[(org, repo, commit['sha'])] = commit
+        if self.store is not None:
+            self.store.put_many(org, repo, commits)
+        return commits
+
+    def get_mirror(self) -> GitMirror:
+        """The git mirror manager, authenticating clones and fetches with the first credential"""
+        if self.mirror is None:
+            self.mirror = GitMirror(DEFAULT_MIRROR_DIR, DEFAULT_GIT_URL, self.git_token)
+        return self.mirror
+
+    def git_token(self) -> str:
+        return self.credentials[0].authorization().split(' ', 1)[1]
+
+    def resolve_login(self, org: str, email: str) -> Optional[str]:
+        """
+        GitHub login for a commit email from the 'git' backend: configured mapping, noreply address,
+        or a login the API previously reported for the same email; None (like REST) if unknown
+        """
+        key = (org, email.lower())
+        if key not in self._email_logins:
+            login = self.git_logins.get(email.lower()) or login_from_email(email)
+            if not login and self.store is not None:
+                login = self.store.login_for_email(org, email)
+            self._email_logins[key] = login
+        return self._email_logins[key]
+
+    def has_commit_details(self, org: str, repo: str, sha: str) -> bool:
+        """True when a commit's details are already available without an API call"""
+        if (org, repo, sha) in self._commit_details:
+            return True
+        return self.store is not None and self.store.contains(org, repo, sha)
+
+    def get_commit(self, org: str, repo: str, sha: str) -> Optional[Dict]:
+        """Get detailed commit information including line changes (local store first, then the API)"""
+        known = self._commit_details.get((org, repo, sha))
+        if known is not None:
+            return known
+
+        if self.store is not None:
+            stored = self.store.get(org, repo, sha)
+            if stored is not None:
+                return stored
+
+        if self.offline:
+            return None
+        details = self._fetch_commit(org, repo, sha)
+        if details is not None and self.store is not None:
+            self.store.put(org, repo, details)
+        return details
+
+    def _fetch_commit(self, org: str, repo: str, sha: str) -> Optional[Dict]:
+        """GET a single commit from the REST API"""
+        try:
+            response = self.get(f"/repos/{org}/{repo}/commits/{sha}")
+        except requests.RequestException as e:
+            print(f"Exception fetching commit {sha[:8]}: {e}")
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 403:
+            print(f"Rate limit hit on commit {sha[:8]}")
+        else:
+            print(f"Error {response.status_code} for commit {sha[:8]}")
+        return None
+
+    def get_commits_batch(self, org: str, repo: str, shas: Iterable[str],
+                          max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Dict]:
+        """
+        Fetch details for a batch of commits concurrently
+        Returns a dict keyed by SHA; commits that could not be fetched are left out
+        """
+        details = {}
+        unique_shas = []
+        for sha in dict.fromkeys(shas):
+            known = self._commit_details.get((org, repo, sha))
+            if known is not None:
+                details[sha] = known
+            else:
+                unique_shas.append(sha)
+
+        # Commits are immutable, so anything already in the store never needs another request
+        if self.store is not None and unique_shas:
+            stored = self.store.get_many(org, repo, unique_shas)
+            details.update(stored)
+            unique_shas = [sha for sha in unique_shas if sha not in stored]
+
+        if not unique_shas or self.offline:
+            return details
+
+        fetched = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(self._fetch_commit, org, repo, sha): sha for sha in unique_shas}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is not None:
+                    details[futures[future]] = result
+                    fetched.append(result)
+
+        if self.store is not None:
+            self.store.put_many(org, repo, fetched)
+
+        return details
+
+def cached_response(entry: Dict, not_modified: requests.Response) -> requests.Response:
+    """Turn a 304 plus the cached entry back into the 200 response callers expect"""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = entry['body'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.headers = CaseInsensitiveDict(not_modified.headers)
+    response.headers.update(entry.get('headers', {}))
+    response.from_cache = True
+    return response
+
+def offline_response(url: str, entry: Optional[Dict] = None) -> requests.Response:
+    """The cached body as a 200 in offline mode, or 504 (like HTTP only-if-cached) when nothing is cached"""
+    response = requests.Response()
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict((entry or {}).get('headers', {}))
+    if entry:
+        response.status_code = 200
+        response._content = entry['body'].encode('utf-8')
+        response.from_cache = True
+    else:
+        response.status_code = 504
+        response._content = b'{"message": "Not available offline"}'
+    return response
+
+def split_by_period(commits: List[Dict], periods: Sequence[tuple]) -> List[List[Dict]]:
+    """Assign commits to every (since, until) UTC-timestamp period containing them, keeping their order (until may be None)"""
+    split = [[] for _ in periods]
+    for commit in commits:
+        timestamp = commit_timestamp(commit)
+        if not timestamp:
+            continue
+        for index, (since, until) in enumerate(periods):
+            if since <= timestamp and (until is None or timestamp <= until):
+                split[index].append(commit)
+    return split
+
+def last_page_number(response: requests.Response) -> Optional[int]:
+    """Page number of the Link header's rel="last" URL, if the response has one"""
+    last = response.links.get('last') if response.headers.get('Link') else None
+    if not last:
+        return None
+    page = parse_qs(urlparse(last['url']).query).get('page')
+    return int(page[0]) if page and page[0].isdigit() else None
+
+def run_concurrently(func, items: Sequence[tuple], max_workers: int = DEFAULT_REPO_WORKERS) -> List:
+    """Call func(*item) for every item on a thread pool; results come back in input order"""
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(*item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(func, *item) for item in items]
+        return [future.result() for future in futures]
+
+def changed_files_count(details: Dict) -> int:
+    """Number of files a commit touched, for both REST detail and GraphQL history records"""
+    if 'files_changed' in details:
+        return details['files_changed']
+    return len(details.get('files', []))
+
+_clients: Dict[tuple, GitHubClient] = {}
+
+def get_client(token: Union[str, Sequence[str]], base_url: str = DEFAULT_BASE_URL) -> GitHubClient:
+    """Return the process-wide client for a token (or list of tokens) so all callers share one connection pool"""
+    tokens = (token,) if isinstance(token, str) else tuple(token)
+    key = (tokens, base_url)
+    if key not in _clients:
+        _clients[key] = GitHubClient(list(tokens), base_url)
+    return _clients[key]
+
+def client_for_config(github_config: Dict) -> GitHubClient:
+    """Return the process-wide client for the 'github' config section (token, tokens and/or apps)"""
+    base_url = github_config.get('api_url', DEFAULT_BASE_URL)
+    credentials = credentials_from_config(github_config, base_url)
+    key = (tuple(credential.key for credential in credentials), base_url)
+    if key not in _clients:
+        client = GitHubClient(credentials, base_url)
+        client.mirror = GitMirror(github_config.get('mirror_dir', DEFAULT_MIRROR_DIR),
+                                  github_config.get('git_url', DEFAULT_GIT_URL), client.git_token)
+        client.git_logins = {email.lower(): login for email, login in github_config.get('git_logins', {}).items()}
+        _clients[key] = client
+    return _clients[key]
+
+def configure_cache(cache_dir: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES):
+    """Enable the on-disk response cache in cache_dir for all clients, or disable it with None"""
+    global _cache
+    _cache = ResponseCache(cache_dir, max_bytes) if cache_dir else None
+    for client in _clients.values():
+        client.cache = _cache
+
+def configure_store(store_path: Optional[str]):
+    """Enable the SQLite commit store at store_path for all clients, or disable it with None"""
+    global _store
+    _store = CommitStore(store_path) if store_path else None
+    for client in _clients.values():
+        client.store = _store
+
+def configure_sync(enabled: bool):
+    """Serve commit / PR / issue listings from the commit store after an incremental sync, for all clients"""
+    global _incremental
+    if enabled and _store is None:
+        print("Incremental sync needs the commit store - ignoring --incremental")
+        enabled = False
+    _incremental = enabled
+    for client in _clients.values():
+        client.incremental = _incremental
+
+def configure_offline(enabled: bool):
+    """Answer everything from the commit store and response cache without calling GitHub, for all clients"""
+    global _offline
+    if enabled and _store is None:
+        print("Offline mode needs the commit store - ignoring --offline")
+        enabled = False
+    _offline = enabled
+    for client in _clients.values():
+        client.offline = _offline
+
+def add_cache_arguments(parser):
+    """Add the cache and commit store options shared by every entry point"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Directory for the on-disk API response cache (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the on-disk API response cache')
+    parser.add_argument('--commit-store', default=DEFAULT_STORE_PATH,
+                        help=f'SQLite file holding commit stats shared across runs (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--no-commit-store', action='store_true', help='Do not read or write the local commit store')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Sync only what changed since the last run into the commit store and analyze local data')
+    parser.add_argument('--offline', action='store_true',
+                        help='Analyze only the local data kept current by collector.py, without calling GitHub')
+    parser.add_argument('--ai-model', default=None,
+                        help='Score AI assistance with a model trained by ai_model.py instead of the weighted rules')
+
+def configure_cache_from_args(args):
+    """Apply the parsed --cache-dir / --no-cache / --commit-store / --no-commit-store / --incremental / --offline / --ai-model options"""
+    configure_cache(None if args.no_cache else args.cache_dir)
+    configure_store(None if args.no_commit_store else args.commit_store)
+    configure_sync(args.incremental)
+    configure_offline(args.offline)
+    configure_model(args.ai_model)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+On-disk, size-bounded LRU cache of GitHub API responses for conditional (ETag / Last-Modified) requests
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ai-impact-insights', 'http')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Response headers worth replaying when a cached body is served
+KEPT_HEADERS = ('ETag', 'Last-Modified', 'Link', 'Content-Type')
+
+class ResponseCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) a cache directory and index the entries already in it"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times (touched on every hit)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, name[:-5], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_scope(identities: Iterable[str]) -> str:
+        """
+        Opaque cache scope for a set of credential identities (hashed, so no token reaches the disk)
+        Responses are only shared between clients holding the same credentials: the credentials of one
+        client rotate per request, so they must all have the same access to the repositories it reads
+        """
+        raw = json.dumps(sorted(identities))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None, scope: str = '') -> str:
+        """Cache key for a URL plus its query parameters, within a credential scope"""
+        raw = json.dumps([scope, url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached entry (etag, last_modified, headers, body) and mark it recently used"""
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+        return entry
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str], headers: Dict, body: str):
+        """Store a response body with its validators, evicting least recently used entries over the size limit"""
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'headers': {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            'body': body
+        }
+        data = json.dumps(entry)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = self._evict()
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used keys until the cache fits (caller holds the lock)"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            old_key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(old_key)
+        return evicted
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
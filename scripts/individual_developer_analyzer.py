@@ -4,68 +4,143 @@ Individual Developer Analysis - Last 90 Days
 Analyzes specific developers' commit patterns and code volume over the past 90 days
 """
 
-import requests
+import argparse
 import json
+import os
+import sys
 from datetime import datetime, timedelta
 from collections import defaultdict
-import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import (client_for_config, changed_files_count, split_by_period, run_concurrently,
+                           add_cache_arguments, configure_cache_from_args, DEFAULT_MAX_WORKERS,
+                           DEFAULT_REPO_WORKERS)
+from commit_store import utc_timestamp
+from ai_signals import classify_many, ai_indicators
+from commit_messages import parse_message
+from sampling import sample_details_adaptively, DEFAULT_RELATIVE_ERROR, DEFAULT_MAX_SAMPLES
 
 class IndividualDeveloperAnalyzer:
     def __init__(self, config_path="config.json"):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         
-        self.token = self.config['github']['token']
+        self.token = self.config['github'].get('token')
         self.org = self.config['github']['organization']
         self.repositories = self.config['github']['repositories']
         
-        self.headers = {
-            'Authorization': f'Bearer {self.token}',
-            'Accept': 'application/vnd.github+json',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
+        self.client = client_for_config(self.config['github'])
+        self.max_workers = self.config['github'].get('max_workers', DEFAULT_MAX_WORKERS)
+        self.commit_backend = self.config['github'].get('commit_backend', 'rest')
+        self.repo_workers = self.config['github'].get('repo_workers', DEFAULT_REPO_WORKERS)
+        # 'repos' lists every configured repository per user; 'search' finds a user's commits org-wide
+        self.user_discovery = self.config['github'].get('user_discovery', 'repos')
+        self._user_searches = {}
+        
+        # Commit details are fetched per user and period until changes per commit are within this relative error
+        analysis = self.config.get('analysis', {})
+        self.sample_relative_error = analysis.get('sample_relative_error', DEFAULT_RELATIVE_ERROR)
+        self.sample_max_commits = analysis.get('sample_max_commits', DEFAULT_MAX_SAMPLES)
+        
+        # Team mode: commits listed once per repo and period, grouped by author login
+        # {(start, end): {repo: {login: [commits]}}} with UTC timestamps (end None = up to now)
+        self.team_commits = {}
+
+    def load_team_commits(self, periods):
+        """
+        Team mode: list every repository once for the given (start, end) periods and group commits by author
+        Per-user lookups inside these periods are then answered from memory, so the API cost scales with
+        repositories instead of users x repositories. An end of None means up to now.
+        """
+        periods = [(utc_timestamp(start.isoformat()), utc_timestamp(end.isoformat()) if end else None)
+                   for start, end in periods]
+        print(f"Listing {len(self.repositories)} repositories once for the whole team...")
+        
+        def list_repo(repo):
+            return self.client.list_commits_for_periods(
+                self.org, repo, periods, backend=self.commit_backend, description=f"commits for {repo}"
+            )
+        
+        per_repo = run_concurrently(list_repo, [(repo,) for repo in self.repositories], self.repo_workers)
+        for repo, per_period in zip(self.repositories, per_repo):
+            for period, commits in zip(periods, per_period):
+                by_author = self.team_commits.setdefault(period, {}).setdefault(repo, defaultdict(list))
+                for commit in commits:
+                    login = (commit.get('author') or {}).get('login')
+                    if login:
+                        by_author[login.lower()].append(commit)
+
+    def team_commits_for(self, repo, username, start_date, end_date=None):
+        """A user's commits from a loaded team period covering start..end, or None if none covers it"""
+        start = utc_timestamp(start_date.isoformat())
+        end = utc_timestamp(end_date.isoformat()) if end_date else None
+        
+        for (loaded_start, loaded_end), by_repo in self.team_commits.items():
+            covers_end = loaded_end is None or (end is not None and end <= loaded_end)
+            if loaded_start <= start and covers_end and repo in by_repo:
+                commits = by_repo[repo].get(username.lower(), [])
+                return split_by_period(commits, [(start, end)])[0]
+        return None
+
+    def search_user_commits(self, username, start_date, end_date=None):
+        """A user's commits anywhere in the org between two dates, grouped by repository (search API, cached)"""
+        key = (username.lower(), start_date, end_date)
+        if key not in self._user_searches:
+            self._user_searches[key] = self.client.search_commits(
+                self.org, username, start_date.isoformat(), end_date.isoformat() if end_date else None
+            )
+        return self._user_searches[key]
+
+    def repositories_for_user(self, username, start_date, end_date=None):
+        """Repositories to analyze for a user: the configured ones, or where search found their commits"""
+        if self.user_discovery != 'search':
+            return self.repositories
+        return sorted(self.search_user_commits(username, start_date, end_date))
 
     def get_commits_for_user(self, repo, username, since_date):
         """Get all commits for a specific user in a repository since a date"""
-        url = f"https://api.github.com/repos/{self.org}/{repo}/commits"
-        params = {
-            'author': username,
-            'since': since_date.isoformat(),
-            'per_page': 100
-        }
+        team = self.team_commits_for(repo, username, since_date)
+        if team is not None:
+            return team[:300]
         
-        all_commits = []
-        page = 1
+        if self.user_discovery == 'search':
+            return self.search_user_commits(username, since_date).get(repo, [])[:300]
         
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"    Error fetching commits for {username}: {response.status_code}")
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            # Rate limiting protection
-            if len(all_commits) > 300:
-                break
-                
-        return all_commits
+        # Rate limiting protection
+        return self.client.list_commits(
+            self.org, repo, since_date.isoformat(), author=username, backend=self.commit_backend,
+            max_items=300, description=f"commits for {username}"
+        )
 
     def get_commit_details(self, repo, sha):
         """Get detailed stats for a specific commit"""
-        url = f"https://api.github.com/repos/{self.org}/{repo}/commits/{sha}"
-        
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json()
-        return None
+        return self.client.get_commit(self.org, repo, sha)
+
+    def get_commit_details_batch(self, repo, shas):
+        """Get detailed stats for many commits in parallel"""
+        return self.client.get_commits_batch(self.org, repo, shas, max_workers=self.max_workers)
+
+    def sample_commits(self, repo, commits):
+        """
+        Fetch details for a user's commits until their changes per commit converge (steady committers cost
+        a few calls, erratic ones up to sample_max_commits); commits known locally are always included
+        Returns (sampled commits, details by SHA, sampling summary)
+        """
+        details_by_sha, summary = sample_details_adaptively(
+            self.client, self.org, repo, commits, self.sample_relative_error, self.sample_max_commits,
+            self.max_workers
+        )
+        sampled = [commit for commit in commits if 'stats' in details_by_sha.get(commit['sha'], {})]
+        return sampled, details_by_sha, summary
+
+    @staticmethod
+    def extrapolate(stats, summary, keys):
+        """Scale sums over the sampled commits up to all of the user's commits"""
+        if 0 < summary['sampled'] < summary['commits']:
+            scale = summary['commits'] / summary['sampled']
+            for key in keys:
+                stats[key] = round(stats[key] * scale)
 
     def analyze_user_activity(self, username, days=90):
         """Analyze a specific user's activity across all repositories"""
@@ -86,10 +161,11 @@ class IndividualDeveloperAnalyzer:
                 'files_changed': 0
             },
             'daily_activity': defaultdict(lambda: {'commits': 0, 'changes': 0}),
-            'commit_messages': []
+            'commit_messages': [],
+            'sampling': {'detail_calls': 0, 'calls_saved': 0}
         }
         
-        for repo in self.repositories:
+        for repo in self.repositories_for_user(username, since_date):
             print(f"   📁 Checking {repo}...")
             
             commits = self.get_commits_for_user(repo, username, since_date)
@@ -108,15 +184,16 @@ class IndividualDeveloperAnalyzer:
                 'commit_details': []
             }
             
-            # Get detailed stats for up to 20 recent commits
-            for i, commit in enumerate(commits[:20]):
-                details = self.get_commit_details(repo, commit['sha'])
+            # Get detailed stats for commits until the estimate converges
+            sampled, details_by_sha, sampling = self.sample_commits(repo, commits)
+            for commit in sampled:
+                details = details_by_sha.get(commit['sha'])
                 if details and 'stats' in details:
                     stats = details['stats']
                     additions = stats.get('additions', 0)
                     deletions = stats.get('deletions', 0)
                     total = stats.get('total', 0)
-                    files = len(details.get('files', []))
+                    files = changed_files_count(details)
                     
                     repo_stats['additions'] += additions
                     repo_stats['deletions'] += deletions
@@ -133,21 +210,24 @@ class IndividualDeveloperAnalyzer:
                     # Store commit message for pattern analysis
                     message = commit['commit']['message']
                     user_data['commit_messages'].append(message)
+                    subject = parse_message(message).subject
                     
                     repo_stats['commit_details'].append({
                         'sha': commit['sha'][:8],
                         'date': commit_date.strftime('%Y-%m-%d'),
-                        'message': message[:60] + ('...' if len(message) > 60 else ''),
+                        'message': subject[:60] + ('...' if len(subject) > 60 else ''),
                         'additions': additions,
                         'deletions': deletions,
                         'total': total,
                         'files': files
                     })
-                
-                # Rate limiting
-                if (i + 1) % 10 == 0:
-                    time.sleep(1)
                     
+            # Totals cover every commit, extrapolated from the sampled ones
+            self.extrapolate(repo_stats, sampling, ['additions', 'deletions', 'total_changes', 'files_changed'])
+            repo_stats['sampling'] = sampling
+            user_data['sampling']['detail_calls'] += sampling['fetched']
+            user_data['sampling']['calls_saved'] += sampling['calls_saved']
+            
             user_data['repositories'][repo] = repo_stats
             user_data['totals']['commits'] += repo_stats['commits']
             user_data['totals']['additions'] += repo_stats['additions']
@@ -181,28 +261,13 @@ class IndividualDeveloperAnalyzer:
             'documentation': 0
         }
         
-        ai_keywords = ['copilot', 'ai-generated', 'ai-assisted', 'auto-generated', 'gpt', 'claude']
-        bulk_keywords = ['bulk', 'mass', 'multiple', 'batch', 'auto']
-        feature_keywords = ['feature', 'add', 'implement', 'create', 'new']
-        bug_keywords = ['fix', 'bug', 'issue', 'resolve', 'patch']
-        refactor_keywords = ['refactor', 'cleanup', 'reorganize', 'restructure']
-        doc_keywords = ['doc', 'documentation', 'readme', 'comment', 'docstring']
-        
-        for message in messages:
-            message_lower = message.lower()
-            
-            if any(keyword in message_lower for keyword in ai_keywords):
+        # One parse and pass per message over every rule set (and AI trailer) shared with the other analyzers
+        for categories in classify_many(messages):
+            if ai_indicators(categories)['likely_ai_assisted']:
                 patterns['ai_indicators'] += 1
-            if any(keyword in message_lower for keyword in bulk_keywords):
-                patterns['bulk_operations'] += 1
-            if any(keyword in message_lower for keyword in feature_keywords):
-                patterns['feature_development'] += 1
-            if any(keyword in message_lower for keyword in bug_keywords):
-                patterns['bug_fixes'] += 1
-            if any(keyword in message_lower for keyword in refactor_keywords):
-                patterns['refactoring'] += 1
-            if any(keyword in message_lower for keyword in doc_keywords):
-                patterns['documentation'] += 1
+            for pattern in ('bulk_operations', 'feature_development', 'bug_fixes', 'refactoring', 'documentation'):
+                if pattern in categories:
+                    patterns[pattern] += 1
         
         return patterns
 
@@ -223,6 +288,8 @@ class IndividualDeveloperAnalyzer:
         print(f"Lines Deleted: {totals['deletions']:,}")
         print(f"Total Changes: {totals['total_changes']:,}")
         print(f"Files Modified: {totals['files_changed']:,}")
+        sampling = user_data['sampling']
+        print(f"Commit Detail Calls: {sampling['detail_calls']:,} ({sampling['calls_saved']:,} saved by adaptive sampling)")
         
         if 'metrics' in user_data:
             metrics = user_data['metrics']
@@ -259,6 +326,10 @@ class IndividualDeveloperAnalyzer:
                 print(f"  {commit['date']} [{repo}] {commit['message']} ({commit['total']} changes)")
 
 def main():
+    parser = argparse.ArgumentParser(description='Analyze the last 90 days of individual developers')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     print("🔍 Individual Developer Analysis - Last 90 Days")
     print("=" * 60)
     
@@ -270,9 +341,10 @@ def main():
         from get_team_members import get_team_members
         print("🔍 Fetching apps-team members...")
         usernames = get_team_members(
-            analyzer.config['github']['token'],
+            analyzer.config['github'].get('token'),
             analyzer.config['github']['organization'],
-            'apps-team'
+            'apps-team',
+            client=analyzer.client
         )
         
         if not usernames:
@@ -283,7 +355,9 @@ def main():
             else:
                 print("No usernames provided. Exiting.")
                 return
-    except:
+    except (ImportError, OSError) as e:
+        # requests' connection errors are OSErrors
+        print(f"Could not fetch team members: {e}")
         print("Please specify GitHub usernames to analyze (comma-separated):")
         usernames_input = input("> ").strip()
         
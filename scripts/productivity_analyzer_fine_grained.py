@@ -4,13 +4,25 @@ GitHub Productivity Before/After Analysis (Fine-Grained Token Compatible)
 Focuses on commit-based productivity analysis that works with fine-grained tokens
 """
 
-import requests
 import json
 import os
+import sys
+import traceback
 from datetime import datetime, timedelta
 import argparse
 from typing import Dict, List, Optional
-from collections import defaultdict
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import (client_for_config, run_concurrently, add_cache_arguments,
+                           configure_cache_from_args, FetchError, DEFAULT_MAX_WORKERS, DEFAULT_REPO_WORKERS)
+from contributor_stats import weekly_totals
+from sampling import sample_commit_details, DEFAULT_Z
+from ai_signals import score_commit, score_commits, model_version
+from checkpoints import RunCheckpoints, run_id, DEFAULT_CHECKPOINT_DIR
+from commit_table import CommitTable, sum_by_user, ratio, pct_change
 
 class ProductivityAnalyzer:
     def __init__(self, config_path: str = "config.json"):
@@ -18,16 +30,23 @@ class ProductivityAnalyzer:
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         
-        self.github_token = self.config['github']['token']
+        self.github_token = self.config['github'].get('token')
         self.org = self.config['github']['organization']
         self.repositories = self.config['github']['repositories']
         
-        self.headers = {
-            'Authorization': f'Bearer {self.github_token}',
-            'Accept': 'application/vnd.github+json',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-        self.base_url = 'https://api.github.com'
+        self.client = client_for_config(self.config['github'])
+        self.max_workers = self.config['github'].get('max_workers', DEFAULT_MAX_WORKERS)
+        self.commit_backend = self.config['github'].get('commit_backend', 'rest')
+        self.repo_workers = self.config['github'].get('repo_workers', DEFAULT_REPO_WORKERS)
+        # 'commits' estimates line changes from sampled commit details; 'weekly' uses /stats/contributors
+        self.line_stats_source = self.config['github'].get('line_stats_source', 'commits')
+        # Commit details fetched per repository and period, spread over authors and fortnights
+        self.sample_budget = self.config['analysis'].get('sample_budget', 50)
+        
+        # Set checkpoint_dir to save each finished repository/window/stage unit; resume skips saved ones
+        self.checkpoint_dir = None
+        self.resume = False
+        self.checkpoints = None
         
         # Parse adoption date (could be any AI tool, not just Copilot)
         self.ai_adoption_date = datetime.fromisoformat(
@@ -40,186 +59,135 @@ class ProductivityAnalyzer:
         
         # Test basic repo access
         test_repo = self.repositories[0] if self.repositories else "test"
-        url = f"{self.base_url}/repos/{self.org}/{test_repo}"
-        response = requests.get(url, headers=self.headers)
+        response = self.client.get(f"/repos/{self.org}/{test_repo}")
         tests['repository_access'] = response.status_code == 200
         
         # Test org access
-        url = f"{self.base_url}/orgs/{self.org}"
-        response = requests.get(url, headers=self.headers)
+        response = self.client.get(f"/orgs/{self.org}")
         tests['organization_access'] = response.status_code == 200
         
         # Test Copilot API access (may fail with fine-grained tokens)
-        url = f"{self.base_url}/orgs/{self.org}/copilot/usage"
-        response = requests.get(url, headers=self.headers)
+        response = self.client.get(f"/orgs/{self.org}/copilot/usage")
         tests['copilot_api_access'] = response.status_code == 200
         
         return tests
 
     def get_repository_commits(self, repo: str, since: str, until: str) -> List[Dict]:
         """Get commits for a repository in the specified date range"""
-        url = f"{self.base_url}/repos/{self.org}/{repo}/commits"
-        params = {
-            'since': since,
-            'until': until,
-            'per_page': 100
-        }
-        
-        all_commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error fetching commits for {repo}: {response.status_code}")
-                if response.status_code == 403:
-                    print("Rate limit hit - waiting and continuing with collected data...")
-                break
-                
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            # Reasonable limit to avoid rate limiting
-            if len(all_commits) > 500:
-                break
-                
-        return all_commits
+        # Reasonable limit to avoid rate limiting
+        return self.client.list_commits(
+            self.org, repo, since, until, backend=self.commit_backend,
+            max_items=500, description=f"commits for {repo}"
+        )
+
+    def get_repository_commits_for_periods(self, repo: str, periods: List[tuple]) -> List[List[Dict]]:
+        """Get commits for several (since, until) periods with a single fetch of the whole span"""
+        # Reasonable limit to avoid rate limiting (per period)
+        return self.client.list_commits_for_periods(
+            self.org, repo, periods, backend=self.commit_backend,
+            max_items=500, description=f"commits for {repo}"
+        )
 
     def get_commit_details(self, repo: str, sha: str) -> Optional[Dict]:
         """Get detailed commit information including line changes"""
-        url = f"{self.base_url}/repos/{self.org}/{repo}/commits/{sha}"
-        
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 403:
-            print("Rate limit hit on commit details - using basic stats")
-        return None
+        return self.client.get_commit(self.org, repo, sha)
+
+    def get_commit_details_batch(self, repo: str, shas: List[str]) -> Dict[str, Dict]:
+        """Get detailed commit information for many commits in parallel"""
+        return self.client.get_commits_batch(self.org, repo, shas, max_workers=self.max_workers)
 
     def detect_ai_assistance(self, commit: Dict) -> Dict:
         """
         Detect potential AI assistance in commits using various heuristics
         Works without Copilot API access
         """
-        message = commit.get('commit', {}).get('message', '').lower()
-        
-        # AI tool indicators in commit messages
-        ai_keywords = [
-            'copilot', 'github copilot', 'ai-generated', 'ai-assisted', 'ai generated',
-            'chatgpt', 'gpt', 'claude', 'ai suggested', 'auto-generated',
-            'code completion', 'ai completion', 'suggested by ai'
-        ]
-        
-        # Code generation patterns
-        generation_patterns = [
-            'generated boilerplate', 'auto-complete', 'scaffolded',
-            'template generated', 'bulk generation'
-        ]
-        
-        # Documentation assistance patterns
-        docs_patterns = [
-            'added docstrings', 'generated comments', 'auto-documented',
-            'documentation update', 'comment generation'
-        ]
-        
-        indicators = {
-            'explicit_ai_mention': any(keyword in message for keyword in ai_keywords),
-            'generation_pattern': any(pattern in message for pattern in generation_patterns),
-            'docs_pattern': any(pattern in message for pattern in docs_patterns),
-            'bulk_changes': 'bulk' in message or 'mass' in message or 'multiple files' in message
-        }
+        return score_commit(commit)
+
+    def analyze_repository(self, repo: str, periods: List[tuple]) -> List[tuple]:
+        """
+        Fetch one repository's commits for all periods at once and analyze each period
+        Returns a (commit count, user stats) pair per period
+        With checkpoints, finished periods are loaded from disk and each stage is saved as it completes
+        """
+        done = [self.load_checkpoint('stats', repo, period) for period in periods]
+        if all(unit is not None for unit in done):
+            print(f"  {repo}: resumed from checkpoint")
+            return [(unit['commit_count'], unit['user_stats']) for unit in done]
+        
+        weekly = [None] * len(periods)
+        if self.line_stats_source == 'weekly':
+            stats = self.client.get_contributor_stats(self.org, repo)
+            if stats is not None:
+                weekly = [
+                    weekly_totals(stats, datetime.fromisoformat(since), datetime.fromisoformat(until))
+                    for since, until in periods
+                ]
+        
+        commits_by_period = [self.load_checkpoint('commits', repo, period) for period in periods]
+        if any(commits is None for commits in commits_by_period):
+            print(f"  Fetching {repo} commits from {min(p[0] for p in periods)[:10]} to {max(p[1] for p in periods)[:10]}...")
+            commits_by_period = self.get_repository_commits_for_periods(repo, periods)
+            for period, commits in zip(periods, commits_by_period):
+                self.save_checkpoint('commits', repo, period, commits)
+        
+        results = []
+        for period, commits, period_weekly, unit in zip(periods, commits_by_period, weekly, done):
+            if unit is None:
+                user_stats = self.analyze_user_productivity(commits, repo, period_weekly)
+                self.save_checkpoint('stats', repo, period, {'commit_count': len(commits), 'user_stats': user_stats})
+                results.append((len(commits), user_stats))
+            else:
+                results.append((unit['commit_count'], unit['user_stats']))
+        return results
+
+    def load_checkpoint(self, stage: str, repo: str, period: tuple):
+        return self.checkpoints.load(stage, repo, period) if self.checkpoints else None
+
+    def save_checkpoint(self, stage: str, repo: str, period: tuple, value):
+        if self.checkpoints:
+            self.checkpoints.save(stage, repo, period, value)
+
+    def analyze_user_productivity(self, commits: List[Dict], repo: str, weekly: Optional[Dict] = None) -> Dict:
+        """
+        Analyze productivity metrics from commits, aggregated per author over a columnar commit table
+        With per-author weekly stats for the period, line changes are taken from them instead of sampled details
+        """
+        # Get detailed stats for a stratified sample of commits (to avoid rate limits),
+        # plus any commits whose stats are already known locally at no API cost
+        details_by_sha, estimates = {}, {}
+        if weekly is None:
+            details_by_sha, estimates = sample_commit_details(
+                self.client, self.org, repo, commits, self.sample_budget, self.max_workers
+            )
         
-        # Overall AI likelihood score
-        score = sum([
-            indicators['explicit_ai_mention'] * 3,  # Highest weight
-            indicators['generation_pattern'] * 2,
-            indicators['docs_pattern'] * 1,
-            indicators['bulk_changes'] * 1
-        ])
+        # Detect AI assistance for the whole period in one batch (saved classifications are reused)
+        all_ai_indicators = score_commits(self.client.store, self.org, repo, commits)
         
-        indicators['ai_likelihood_score'] = score
-        indicators['likely_ai_assisted'] = score >= 2
+        # Commits without valid author information, and those made by bot accounts, are left out
+        table = CommitTable.from_commits(commits, details_by_sha, all_ai_indicators)
+        user_stats = table.user_summaries()
         
-        return indicators
-
-    def analyze_user_productivity(self, commits: List[Dict], repo: str) -> Dict:
-        """Analyze productivity metrics from commits"""
-        user_stats = defaultdict(lambda: {
-            'commits': 0,
-            'total_additions': 0,
-            'total_deletions': 0,
-            'total_changes': 0,
-            'commit_dates': [],
-            'files_changed': 0,
-            'ai_assisted_commits': 0,
-            'ai_likelihood_scores': []
-        })
-        
-        for i, commit in enumerate(commits):
-            author_login = None
-            if commit.get('author') and isinstance(commit['author'], dict):
-                author_login = commit['author'].get('login')
-            
-            if not author_login:
-                # Skip commits without valid author information
-                continue
-                
-            commit_date = datetime.fromisoformat(
-                commit['commit']['author']['date'].replace('Z', '+00:00')
-            )
-            
-            user_stats[author_login]['commits'] += 1
-            user_stats[author_login]['commit_dates'].append(commit_date)
-            
-            # Detect AI assistance
-            ai_indicators = self.detect_ai_assistance(commit)
-            user_stats[author_login]['ai_likelihood_scores'].append(ai_indicators['ai_likelihood_score'])
-            if ai_indicators['likely_ai_assisted']:
-                user_stats[author_login]['ai_assisted_commits'] += 1
-            
-            # Get detailed stats for sample of commits (to avoid rate limits)
-            if i < 50:  # Sample first 50 commits
-                details = self.get_commit_details(repo, commit['sha'])
-                if details and 'stats' in details:
-                    stats = details['stats']
-                    additions = stats.get('additions', 0)
-                    deletions = stats.get('deletions', 0)
-                    total = stats.get('total', 0)
-                    
-                    user_stats[author_login]['total_additions'] += additions
-                    user_stats[author_login]['total_deletions'] += deletions
-                    user_stats[author_login]['total_changes'] += total
-                    user_stats[author_login]['files_changed'] += len(details.get('files', []))
-        
-        # Calculate derived metrics
         for user, stats in user_stats.items():
-            if stats['commit_dates']:
-                # Calculate active days
-                dates = [d.date() for d in stats['commit_dates']]
-                unique_dates = len(set(dates))
-                stats['active_days'] = unique_dates
-                stats['commits_per_active_day'] = stats['commits'] / unique_dates if unique_dates > 0 else 0
-                
-                # Estimate total changes for all commits
-                sampled_commits = min(50, stats['commits'])
-                if sampled_commits > 0 and stats['total_changes'] > 0:
-                    avg_changes_per_commit = stats['total_changes'] / sampled_commits
-                    stats['estimated_total_changes'] = avg_changes_per_commit * stats['commits']
-                else:
-                    stats['estimated_total_changes'] = stats['total_changes']
-                
-                # AI assistance metrics
-                stats['ai_assistance_rate'] = (stats['ai_assisted_commits'] / stats['commits'] * 100) if stats['commits'] > 0 else 0
-                stats['avg_ai_likelihood'] = sum(stats['ai_likelihood_scores']) / len(stats['ai_likelihood_scores']) if stats['ai_likelihood_scores'] else 0
-        
-        return dict(user_stats)
+            if weekly is not None:
+                # Exact per-author line counts for the period - nothing left to extrapolate
+                week_totals = weekly.get(user, {})
+                stats['total_additions'] = week_totals.get('additions', 0)
+                stats['total_deletions'] = week_totals.get('deletions', 0)
+                stats['total_changes'] = week_totals.get('total', 0)
+                stats['detailed_commits'] = stats['commits']
+            
+            # Estimate total changes for all commits from the stratified sample, with a 95% interval
+            estimate = estimates.get(user)
+            if estimate:
+                stats['estimated_total_changes'] = estimate['estimate']
+                stats['estimated_total_changes_variance'] = estimate['variance']
+                stats['estimated_total_changes_ci'] = [estimate['ci_low'], estimate['ci_high']]
+            else:
+                stats['estimated_total_changes'] = stats['total_changes']
+                stats['estimated_total_changes_variance'] = 0.0
+                stats['estimated_total_changes_ci'] = [stats['total_changes'], stats['total_changes']]
+        
+        return user_stats
 
     def run_before_after_analysis(self) -> Dict:
         """Run the main before/after analysis"""
@@ -230,7 +198,7 @@ class ProductivityAnalyzer:
         print(f"Organization access: {'✓' if api_tests['organization_access'] else '✗'}")
         print(f"Copilot API access: {'✓' if api_tests['copilot_api_access'] else '✗'}")
         
-        if not api_tests['repository_access']:
+        if not api_tests['repository_access'] and not self.client.offline:
             raise Exception("Cannot access repositories. Check your token permissions.")
         
         before_weeks = self.config['analysis']['before_period_weeks']
@@ -251,31 +219,30 @@ class ProductivityAnalyzer:
         all_before_stats = {}
         all_after_stats = {}
         
-        # Analyze each repository
-        for repo in self.repositories:
-            print(f"\nAnalyzing repository: {repo}")
-            
-            # Before period
-            print("  Fetching 'before' commits...")
-            before_commits = self.get_repository_commits(
-                repo, 
-                before_start.isoformat(), 
-                before_end.isoformat()
-            )
-            before_stats = self.analyze_user_productivity(before_commits, repo)
+        # Analyze repositories concurrently, each with one fetch spanning both periods
+        print(f"\nAnalyzing {len(self.repositories)} repositories ({self.repo_workers} in parallel)...")
+        windows = [(before_start.isoformat(), before_end.isoformat()), (after_start.isoformat(), after_end.isoformat())]
+        if self.line_stats_source == 'weekly':
+            print("Requesting weekly contributor stats for all repositories...")
+            self.client.prewarm_contributor_stats(self.org, self.repositories)
+        
+        if self.checkpoint_dir:
+            # Everything that shapes the collected data identifies the run, so a changed config starts afresh
+            run = run_id(self.org, windows, self.commit_backend, self.line_stats_source, self.sample_budget,
+                         model_version())
+            self.checkpoints = RunCheckpoints(self.checkpoint_dir, run, resume=self.resume)
+            print(f"Checkpoints: {self.checkpoints.path}{' (resuming)' if self.resume else ''}")
+        
+        repo_results = run_concurrently(
+            self.analyze_repository, [(repo, windows) for repo in self.repositories], self.repo_workers
+        )
+        if self.checkpoints and self.checkpoints.loaded:
+            print(f"Reused {self.checkpoints.loaded} checkpointed units")
+        
+        for repo, ((before_count, before_stats), (after_count, after_stats)) in zip(self.repositories, repo_results):
             all_before_stats[repo] = before_stats
-            
-            # After period  
-            print("  Fetching 'after' commits...")
-            after_commits = self.get_repository_commits(
-                repo,
-                after_start.isoformat(),
-                after_end.isoformat()
-            )
-            after_stats = self.analyze_user_productivity(after_commits, repo)
             all_after_stats[repo] = after_stats
-            
-            print(f"  Before: {len(before_commits)} commits, After: {len(after_commits)} commits")
+            print(f"  {repo} - Before: {before_count} commits, After: {after_count} commits")
         
         # Aggregate and compare
         analysis_results = self.compare_before_after(all_before_stats, all_after_stats)
@@ -307,121 +274,97 @@ class ProductivityAnalyzer:
         """Compare user productivity before and after AI tool adoption"""
         
         # Aggregate user stats across all repositories
-        user_before = defaultdict(lambda: {
-            'commits': 0, 'total_changes': 0, 'active_days': 0, 'ai_assisted_commits': 0, 'repos': []
-        })
-        user_after = defaultdict(lambda: {
-            'commits': 0, 'total_changes': 0, 'active_days': 0, 'ai_assisted_commits': 0, 'repos': []
-        })
-        
-        # Aggregate before stats
-        for repo, repo_stats in before_stats.items():
-            for user, stats in repo_stats.items():
-                user_before[user]['commits'] += stats['commits']
-                user_before[user]['total_changes'] += stats['estimated_total_changes']
-                user_before[user]['active_days'] += stats['active_days']
-                user_before[user]['ai_assisted_commits'] += stats['ai_assisted_commits']
-                user_before[user]['repos'].append(repo)
-        
-        # Aggregate after stats
-        for repo, repo_stats in after_stats.items():
-            for user, stats in repo_stats.items():
-                user_after[user]['commits'] += stats['commits']
-                user_after[user]['total_changes'] += stats['estimated_total_changes']
-                user_after[user]['active_days'] += stats['active_days']
-                user_after[user]['ai_assisted_commits'] += stats['ai_assisted_commits']
-                user_after[user]['repos'].append(repo)
+        fields = {
+            'commits': 'commits', 'total_changes': 'estimated_total_changes',
+            'total_changes_variance': 'estimated_total_changes_variance', 'active_days': 'active_days',
+            'ai_assisted_commits': 'ai_assisted_commits'
+        }
+        before_index, user_before = sum_by_user(before_stats, fields)
+        after_index, user_after = sum_by_user(after_stats, fields)
         
         # Find users who were active both before and after
-        before_users = set(user_before.keys())
-        after_users = set(user_after.keys())
-        common_users = before_users.intersection(after_users)
+        before_users = set(before_index)
+        after_users = set(after_index)
+        common_users = [user for user in before_index if user in after_index]
         
         min_commits = self.config['analysis']['min_commits_for_analysis']
-        qualified_users = [
-            user for user in common_users 
-            if user_before[user]['commits'] >= min_commits and 
-               user_after[user]['commits'] >= min_commits
-        ]
+        b = np.array([before_index[user] for user in common_users], dtype=np.int64)
+        a = np.array([after_index[user] for user in common_users], dtype=np.int64)
+        qualified = (user_before['commits'][b] >= min_commits) & (user_after['commits'][a] >= min_commits)
+        qualified_users = [user for user, ok in zip(common_users, qualified.tolist()) if ok]
+        before = {name: values[b[qualified]] for name, values in user_before.items()}
+        after = {name: values[a[qualified]] for name, values in user_after.items()}
         
         print(f"\nFound {len(qualified_users)} users with sufficient activity in both periods")
         
-        # Calculate improvements for qualified users
-        user_comparisons = {}
+        before_weeks = self.config['analysis']['before_period_weeks']
+        after_weeks = self.config['analysis']['after_period_weeks']
+        
+        # Weekly and per-active-day averages and AI assistance rates for every qualified user at once
+        metrics = {
+            'before': {
+                'commits_per_week': before['commits'] / before_weeks,
+                'changes_per_week': before['total_changes'] / before_weeks,
+                # Sampling error of the line-change estimates (repositories are sampled independently)
+                'changes_margin': DEFAULT_Z * np.sqrt(before['total_changes_variance']) / before_weeks,
+                'commits_per_active_day': ratio(before['commits'], before['active_days']),
+                'ai_assistance_rate': ratio(before['ai_assisted_commits'], before['commits']) * 100,
+            },
+            'after': {
+                'commits_per_week': after['commits'] / after_weeks,
+                'changes_per_week': after['total_changes'] / after_weeks,
+                'changes_margin': DEFAULT_Z * np.sqrt(after['total_changes_variance']) / after_weeks,
+                'commits_per_active_day': ratio(after['commits'], after['active_days']),
+                'ai_assistance_rate': ratio(after['ai_assisted_commits'], after['commits']) * 100,
+            },
+        }
+        
+        # Calculate percentage improvements
         improvements = {
-            'commits_per_week': [],
-            'changes_per_week': [],
-            'commits_per_active_day': [],
-            'ai_assistance_adoption': []
+            'commits_per_week': pct_change(metrics['before']['commits_per_week'], metrics['after']['commits_per_week']),
+            'changes_per_week': pct_change(metrics['before']['changes_per_week'], metrics['after']['changes_per_week']),
+            'commits_per_active_day': pct_change(metrics['before']['commits_per_active_day'],
+                                                 metrics['after']['commits_per_active_day']),
+            'ai_assistance_adoption': metrics['after']['ai_assistance_rate'] - metrics['before']['ai_assistance_rate']
         }
         
-        for user in qualified_users:
-            before = user_before[user]
-            after = user_after[user]
-            
-            before_weeks = self.config['analysis']['before_period_weeks']
-            after_weeks = self.config['analysis']['after_period_weeks']
-            
-            # Calculate weekly averages
-            before_commits_per_week = before['commits'] / before_weeks
-            after_commits_per_week = after['commits'] / after_weeks
-            
-            before_changes_per_week = before['total_changes'] / before_weeks
-            after_changes_per_week = after['total_changes'] / after_weeks
-            
-            # Calculate daily averages
-            before_commits_per_active_day = before['commits'] / before['active_days'] if before['active_days'] > 0 else 0
-            after_commits_per_active_day = after['commits'] / after['active_days'] if after['active_days'] > 0 else 0
-            
-            # AI assistance rates
-            before_ai_rate = (before['ai_assisted_commits'] / before['commits'] * 100) if before['commits'] > 0 else 0
-            after_ai_rate = (after['ai_assisted_commits'] / after['commits'] * 100) if after['commits'] > 0 else 0
-            
-            # Calculate percentage improvements
-            commits_improvement = ((after_commits_per_week - before_commits_per_week) / before_commits_per_week * 100) if before_commits_per_week > 0 else 0
-            changes_improvement = ((after_changes_per_week - before_changes_per_week) / before_changes_per_week * 100) if before_changes_per_week > 0 else 0
-            daily_commits_improvement = ((after_commits_per_active_day - before_commits_per_active_day) / before_commits_per_active_day * 100) if before_commits_per_active_day > 0 else 0
-            ai_adoption_change = after_ai_rate - before_ai_rate
-            
-            user_comparisons[user] = {
-                'before': {
-                    'commits_per_week': before_commits_per_week,
-                    'changes_per_week': before_changes_per_week,
-                    'commits_per_active_day': before_commits_per_active_day,
-                    'ai_assistance_rate': before_ai_rate,
-                    'total_commits': before['commits'],
-                    'active_days': before['active_days']
-                },
-                'after': {
-                    'commits_per_week': after_commits_per_week,
-                    'changes_per_week': after_changes_per_week,
-                    'commits_per_active_day': after_commits_per_active_day,
-                    'ai_assistance_rate': after_ai_rate,
-                    'total_commits': after['commits'],
-                    'active_days': after['active_days']
-                },
-                'improvements': {
-                    'commits_per_week_pct': commits_improvement,
-                    'changes_per_week_pct': changes_improvement,
-                    'commits_per_active_day_pct': daily_commits_improvement,
-                    'ai_adoption_change_pct': ai_adoption_change
+        columns = {period: {name: values.tolist() for name, values in period_metrics.items()}
+                   for period, period_metrics in metrics.items()}
+        totals = {'before': before, 'after': after}
+        changes = {metric: values.tolist() for metric, values in improvements.items()}
+        
+        user_comparisons = {}
+        for row, user in enumerate(qualified_users):
+            comparison = {}
+            for period, period_columns in columns.items():
+                changes_per_week = period_columns['changes_per_week'][row]
+                margin = period_columns['changes_margin'][row]
+                comparison[period] = {
+                    'commits_per_week': period_columns['commits_per_week'][row],
+                    'changes_per_week': changes_per_week,
+                    'changes_per_week_ci': [max(0.0, changes_per_week - margin), changes_per_week + margin],
+                    'commits_per_active_day': period_columns['commits_per_active_day'][row],
+                    'ai_assistance_rate': period_columns['ai_assistance_rate'][row],
+                    'total_commits': int(totals[period]['commits'][row]),
+                    'active_days': int(totals[period]['active_days'][row])
                 }
+            comparison['improvements'] = {
+                'commits_per_week_pct': changes['commits_per_week'][row],
+                'changes_per_week_pct': changes['changes_per_week'][row],
+                'commits_per_active_day_pct': changes['commits_per_active_day'][row],
+                'ai_adoption_change_pct': changes['ai_assistance_adoption'][row]
             }
-            
-            improvements['commits_per_week'].append(commits_improvement)
-            improvements['changes_per_week'].append(changes_improvement)
-            improvements['commits_per_active_day'].append(daily_commits_improvement)
-            improvements['ai_assistance_adoption'].append(ai_adoption_change)
+            user_comparisons[user] = comparison
         
         # Calculate summary statistics
         summary = {}
         for metric, values in improvements.items():
-            if values:
+            if len(values):
                 summary[metric] = {
-                    'avg_improvement_pct': sum(values) / len(values),
-                    'median_improvement_pct': sorted(values)[len(values)//2],
-                    'users_improved': len([v for v in values if v > 0]),
-                    'users_declined': len([v for v in values if v < 0]),
+                    'avg_improvement_pct': float(values.mean()),
+                    'median_improvement_pct': float(np.sort(values)[len(values)//2]),
+                    'users_improved': int((values > 0).sum()),
+                    'users_declined': int((values < 0).sum()),
                     'total_users': len(values)
                 }
         
@@ -488,16 +431,25 @@ def main():
     parser = argparse.ArgumentParser(description='Analyze AI tools productivity impact (Fine-grained token compatible)')
     parser.add_argument('--config', default='config.json', help='Configuration file path')
     parser.add_argument('--output', help='Output file (optional)')
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+                        help=f'Directory for per-repository progress checkpoints (default: {DEFAULT_CHECKPOINT_DIR})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run, skipping repositories and windows already collected')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
+    configure_cache_from_args(args)
     
     if not os.path.exists(args.config):
         print(f"Config file not found: {args.config}")
         print("Please copy config.json.example to config.json and configure it.")
         return 1
     
+    analyzer = None
     try:
         analyzer = ProductivityAnalyzer(args.config)
+        analyzer.checkpoint_dir = args.checkpoint_dir
+        analyzer.resume = args.resume
         results = analyzer.run_before_after_analysis()
         
         # Print summary
@@ -514,9 +466,18 @@ def main():
             json.dump(results, f, indent=2)
         
         print(f"\nDetailed results saved to: {output_file}")
-        
+        if analyzer.checkpoints:
+            analyzer.checkpoints.clear()
+        
+    except (FetchError, OSError, KeyboardInterrupt) as e:
+        # Fetch, network and rate limit failures or an interrupt: a rerun can pick up where this one stopped
+        print(f"Error during analysis: {e!r}" if str(e) else "Analysis interrupted")
+        if analyzer is not None and analyzer.checkpoints:
+            print("Progress so far is checkpointed - run again with --resume to continue")
+        return 1
     except Exception as e:
         print(f"Error during analysis: {e}")
+        traceback.print_exc()
         return 1
     
     return 0
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+GitHub Rate Limit Scheduler
+Paces API requests from the X-RateLimit-* and Retry-After response headers instead of fixed sleeps
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+# Requests held back from each budget so concurrent workers never overshoot it
+DEFAULT_RESERVE = 5
+# Fallback pause for secondary rate limits that don't say how long to wait
+SECONDARY_LIMIT_WAIT = 60
+# Fraction of the budget, at the end of each window, over which requests are paced
+PACING_FRACTION = 0.1
+
+class RateLimitScheduler:
+    def __init__(self, reserve: int = DEFAULT_RESERVE, clock=time.time, sleep=time.sleep):
+        """Track one budget per GitHub rate limit resource (core, search, graphql, ...)"""
+        self.reserve = reserve
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, Dict] = {}
+        self._paused_until = 0.0
+
+    def _budget(self, resource: str) -> Dict:
+        return self._budgets.setdefault(resource, {'remaining': None, 'limit': None, 'reset': 0.0, 'next_slot': 0.0})
+
+    def headroom(self, resource: str = 'core'):
+        """
+        (seconds until a request could be sent, requests left) for choosing between credentials
+        An unknown budget counts as immediately available with plenty left
+        """
+        with self._lock:
+            now = self.clock()
+            budget = self._budget(resource)
+            remaining = budget['remaining']
+
+            if remaining is None or (budget['reset'] and now >= budget['reset']):
+                remaining = float('inf')
+
+            wait = max(0.0, self._paused_until - now)
+            if remaining <= self.reserve:
+                wait = max(wait, budget['reset'] - now)
+            return wait, remaining
+
+    def acquire(self, resource: str = 'core'):
+        """
+        Block until a request against `resource` may be sent
+        In the last part of a budget requests are spread evenly over the time left until it resets;
+        once it is used up we wait for the reset instead of failing.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                budget = self._budget(resource)
+
+                if budget['reset'] and now >= budget['reset']:
+                    # Window rolled over - the next response will tell us the new budget
+                    budget['remaining'] = None
+
+                if self._paused_until > now:
+                    wait = self._paused_until - now
+                elif budget['remaining'] is not None and budget['remaining'] <= self.reserve and budget['reset'] > now:
+                    wait = max(1.0, budget['reset'] - now)
+                else:
+                    delay = 0.0
+                    remaining = budget['remaining']
+                    if remaining is not None:
+                        usable = remaining - self.reserve
+                        if budget['limit'] and usable < budget['limit'] * PACING_FRACTION:
+                            # Hand out evenly spaced slots shared by all threads
+                            interval = max(0.0, budget['reset'] - now) / usable
+                            slot = max(now, budget['next_slot'])
+                            budget['next_slot'] = slot + interval
+                            delay = slot - now
+                        budget['remaining'] = remaining - 1
+                    break
+
+            print(f"Rate limit reached for '{resource}' - waiting {wait:.0f}s for the budget to reset...")
+            self.sleep(wait)
+
+        if delay > 0:
+            self.sleep(delay)
+
+    def update(self, response) -> Optional[float]:
+        """
+        Record the budget reported by a response
+        Returns how long to wait before retrying if the response was a rate limit rejection, else None
+        """
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        now = self.clock()
+
+        with self._lock:
+            budget = self._budget(resource)
+            if headers.get('X-RateLimit-Remaining') is not None:
+                budget['remaining'] = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Limit') is not None:
+                budget['limit'] = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Reset') is not None:
+                budget['reset'] = float(headers['X-RateLimit-Reset'])
+
+            if response.status_code not in (403, 429):
+                return None
+
+            wait = None
+            if headers.get('Retry-After') is not None:
+                # Secondary (abuse) limits: GitHub says exactly how long to back off
+                wait = float(headers['Retry-After'])
+            elif budget['remaining'] == 0:
+                wait = max(1.0, budget['reset'] - now)
+            elif response.status_code == 429 or 'rate limit' in (getattr(response, 'text', '') or '').lower():
+                wait = SECONDARY_LIMIT_WAIT
+
+            if wait is not None:
+                self._paused_until = max(self._paused_until, now + wait)
+            return wait
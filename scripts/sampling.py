@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Commit Sampling
+Spends a fixed commit-detail budget across (author, time bucket) strata in proportion to how much each
+stratum's line changes vary (Neyman allocation), and estimates per-author totals with confidence intervals.
+Adaptive sampling instead keeps fetching details in small batches until the estimate converges.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKET_DAYS = 14
+# Two-sided 95% normal interval
+DEFAULT_Z = 1.96
+# Share of the budget spent on the pilot sample that measures each stratum's spread
+PILOT_SHARE = 0.5
+
+# Adaptive sampling stops once the 95% interval of changes per commit is within this fraction of its mean
+DEFAULT_RELATIVE_ERROR = 0.2
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_MAX_SAMPLES = 50
+# Details are fetched this many at a time so batches still run in parallel
+ADAPTIVE_BATCH_SIZE = 5
+
+def commit_author(commit: Dict) -> Optional[str]:
+    author = commit.get('author')
+    return author.get('login') if isinstance(author, dict) else None
+
+def commit_datetime(commit: Dict) -> datetime:
+    return datetime.fromisoformat(commit['commit']['author']['date'].replace('Z', '+00:00'))
+
+def commit_changes(details: Dict) -> Optional[float]:
+    stats = details.get('stats') if details else None
+    return stats.get('total', 0) if stats else None
+
+def stratify(commits: Iterable[Dict], bucket_days: int = DEFAULT_BUCKET_DAYS) -> Dict[Tuple[str, int], List[Dict]]:
+    """
+    Group authored commits into (author, time bucket) strata
+    Each stratum is ordered by SHA - effectively a random permutation that stays stable between runs,
+    so repeated runs sample (and cache) the same commits
+    """
+    commits = [commit for commit in commits if commit_author(commit)]
+    if not commits:
+        return {}
+
+    start = min(commit_datetime(commit) for commit in commits)
+    strata = defaultdict(list)
+    for commit in commits:
+        bucket = (commit_datetime(commit) - start).days // bucket_days
+        strata[(commit_author(commit), bucket)].append(commit)
+
+    return {key: sorted(members, key=lambda c: c['sha']) for key, members in strata.items()}
+
+def sample_std(values: List[float]) -> Optional[float]:
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+def neyman_allocation(sizes: Dict, stds: Dict, budget: int, already: Dict) -> Dict:
+    """
+    How many more commits to sample per stratum: the total sample is split in proportion to
+    size x standard deviation, never exceeding a stratum's size or going below what is already sampled
+    """
+    extra = {key: 0 for key in sizes}
+    total = budget + sum(already.values())
+    open_keys = {key for key in sizes if already.get(key, 0) < sizes[key]}
+
+    # Iteratively cap strata whose proportional share exceeds their size
+    while open_keys and budget > 0:
+        weights = {key: sizes[key] * stds[key] for key in open_keys}
+        weight_sum = sum(weights.values())
+        if weight_sum <= 0:
+            weights = {key: sizes[key] for key in open_keys}
+            weight_sum = sum(weights.values())
+
+        capped = False
+        for key in list(open_keys):
+            target = total * weights[key] / weight_sum if weight_sum else 0
+            if target >= sizes[key]:
+                extra[key] = sizes[key] - already.get(key, 0)
+                budget -= extra[key]
+                total -= sizes[key]
+                open_keys.remove(key)
+                capped = True
+        if capped:
+            continue
+
+        # Largest remainders get the leftover units so the whole budget is used
+        targets = {key: total * weights[key] / weight_sum for key in open_keys}
+        wants = {key: max(0, math.floor(targets[key]) - already.get(key, 0)) for key in open_keys}
+        scale = min(1.0, budget / sum(wants.values())) if sum(wants.values()) else 0
+        for key in open_keys:
+            extra[key] = int(wants[key] * scale)
+        left = budget - sum(extra[key] for key in open_keys)
+        by_remainder = sorted(open_keys, key=lambda k: targets[k] - already.get(k, 0) - extra[k], reverse=True)
+        for key in by_remainder:
+            if left <= 0:
+                break
+            if already.get(key, 0) + extra[key] < sizes[key]:
+                extra[key] += 1
+                left -= 1
+        break
+
+    return extra
+
+def stratified_sample(commits: List[Dict], fetch_values: Callable[[List[str]], Dict[str, float]],
+                      budget: int, known: Optional[Dict[str, float]] = None,
+                      bucket_days: int = DEFAULT_BUCKET_DAYS, z: float = DEFAULT_Z) -> Dict[str, Dict]:
+    """
+    Sample commit line changes within `budget` API fetches and estimate each author's total
+    fetch_values(shas) returns {sha: value} for fetched commits; `known` values cost nothing and are
+    always used. Returns per author: estimate, variance, ci_low, ci_high, sampled, commits.
+    """
+    known = dict(known or {})
+    strata = stratify(commits, bucket_days)
+    if not strata:
+        return {}
+
+    values: Dict[str, float] = {}
+    sampled = {key: [c['sha'] for c in members if c['sha'] in known] for key, members in strata.items()}
+    for shas in sampled.values():
+        values.update((sha, known[sha]) for sha in shas)
+
+    def fetch(plan: Dict):
+        shas = []
+        for key, count in plan.items():
+            taken = set(sampled[key])
+            fresh = [c['sha'] for c in strata[key] if c['sha'] not in taken][:count]
+            sampled[key].extend(fresh)
+            shas.extend(fresh)
+        if shas:
+            values.update(fetch_values(shas))
+        return len(shas)
+
+    # Pilot: a commit or two from each stratum (largest strata first) to measure its spread
+    pilot_budget = int(budget * PILOT_SHARE)
+    per_stratum = 2 if 2 * len(strata) <= pilot_budget else 1
+    pilot = {}
+    for key in sorted(strata, key=lambda k: len(strata[k]), reverse=True):
+        want = max(0, min(per_stratum, len(strata[key])) - len(sampled[key]))
+        want = min(want, pilot_budget - sum(pilot.values()))
+        if want > 0:
+            pilot[key] = want
+    budget -= fetch(pilot)
+
+    # Spread: per stratum where measurable, else the author's pooled spread, else everyone's
+    stds = spreads(strata, sampled, values)
+    if budget > 0:
+        already = {key: len(shas) for key, shas in sampled.items()}
+        budget -= fetch(neyman_allocation({k: len(v) for k, v in strata.items()}, stds, budget, already))
+        stds = spreads(strata, sampled, values)
+
+    return estimate_totals(strata, sampled, values, stds, z)
+
+def spreads(strata: Dict, sampled: Dict, values: Dict) -> Dict:
+    """Standard deviation per stratum: measured where possible, else the author's pooled one, else everyone's"""
+    by_author = defaultdict(list)
+    everything = []
+    for key, shas in sampled.items():
+        observed = [values[sha] for sha in shas if sha in values]
+        by_author[key[0]].extend(observed)
+        everything.extend(observed)
+
+    overall = sample_std(everything) or 0.0
+    stds = {}
+    for key in strata:
+        observed = [values[sha] for sha in sampled[key] if sha in values]
+        std = sample_std(observed)
+        if not std:
+            # Unmeasurable, or no spread in the sample (e.g. a pilot of two equal values): a zero would
+            # collapse the stratum's variance and interval, so fall back to the pooled spread
+            std = sample_std(by_author[key[0]]) or overall
+        stds[key] = std
+    return stds
+
+def estimate_totals(strata: Dict, sampled: Dict, values: Dict, stds: Dict, z: float = DEFAULT_Z) -> Dict[str, Dict]:
+    """Stratified estimate of each author's total with a normal-approximation confidence interval"""
+    by_author = defaultdict(list)
+    everything = []
+    for key, shas in sampled.items():
+        observed = [values[sha] for sha in shas if sha in values]
+        by_author[key[0]].extend(observed)
+        everything.extend(observed)
+    overall_mean = sum(everything) / len(everything) if everything else 0.0
+
+    results = {}
+    for (author, _), members in strata.items():
+        observed = [values[sha] for sha in sampled[(author, _)] if sha in values]
+        size, n = len(members), len(observed)
+
+        if n:
+            mean = sum(observed) / n
+        elif by_author[author]:
+            # Unsampled stratum: borrow the author's mean from their other periods
+            mean = sum(by_author[author]) / len(by_author[author])
+        else:
+            mean = overall_mean
+
+        # Finite population correction; an unsampled stratum counts as one observation's worth of uncertainty
+        variance = size ** 2 * (1 - n / size) * stds[(author, _)] ** 2 / max(n, 1) if size else 0.0
+
+        totals = results.setdefault(author, {'estimate': 0.0, 'variance': 0.0, 'sampled': 0, 'commits': 0})
+        totals['estimate'] += size * mean
+        totals['variance'] += variance
+        totals['sampled'] += n
+        totals['commits'] += size
+
+    for totals in results.values():
+        margin = z * math.sqrt(totals['variance'])
+        totals['ci_low'] = max(0.0, totals['estimate'] - margin)
+        totals['ci_high'] = totals['estimate'] + margin
+
+    return results
+
+def sample_commit_details(client, org: str, repo: str, commits: List[Dict], budget: int,
+                          max_workers: int = 8, bucket_days: int = DEFAULT_BUCKET_DAYS) -> Tuple[Dict, Dict]:
+    """
+    Fetch commit details for a stratified sample of `commits` and estimate each author's line changes
+    Commits already detailed locally are always included and don't count against the budget.
+    Returns (details by SHA, per-author estimates from stratified_sample)
+    """
+    details_by_sha = {}
+
+    def fetch(shas: List[str]) -> Dict[str, float]:
+        fetched = client.get_commits_batch(org, repo, shas, max_workers=max_workers)
+        details_by_sha.update(fetched)
+        changes = {sha: commit_changes(details) for sha, details in fetched.items()}
+        return {sha: value for sha, value in changes.items() if value is not None}
+
+    known = fetch([
+        commit['sha'] for commit in commits
+        if commit_author(commit) and client.has_commit_details(org, repo, commit['sha'])
+    ])
+    estimates = stratified_sample(commits, fetch, budget, known, bucket_days)
+    return details_by_sha, estimates
+
+def relative_error(values: List[float], population: int, z: float = DEFAULT_Z) -> float:
+    """Half-width of the confidence interval for the mean, relative to the mean (with finite population correction)"""
+    n = len(values)
+    if n >= population:
+        return 0.0
+    std = sample_std(values)
+    if std is None:
+        return math.inf
+    mean = sum(values) / n
+    margin = z * std / math.sqrt(n) * math.sqrt(1 - n / population)
+    if mean <= 0:
+        return 0.0 if margin == 0 else math.inf
+    return margin / mean
+
+def adaptive_sample(commits: List[Dict], fetch_values: Callable[[List[str]], Dict[str, float]],
+                    target_error: float = DEFAULT_RELATIVE_ERROR, min_samples: int = DEFAULT_MIN_SAMPLES,
+                    max_samples: int = DEFAULT_MAX_SAMPLES, batch_size: int = ADAPTIVE_BATCH_SIZE,
+                    known: Optional[Dict[str, float]] = None, z: float = DEFAULT_Z) -> Dict:
+    """
+    Fetch values for `commits` in batches until the mean per commit is within target_error
+    Known values are used first at no cost, then commits in SHA order (a stable pseudo-random order).
+    Fetching stops at max_samples commits; calls_saved counts the fetches a fixed sample of that size would
+    have needed on top of the ones made.
+    """
+    known = known or {}
+    population = len(commits)
+    values = {commit['sha']: known[commit['sha']] for commit in commits if commit['sha'] in known}
+    pending = sorted((commit['sha'] for commit in commits if commit['sha'] not in values))
+    fixed_cost = min(len(pending), max(0, max_samples - len(values)))
+    fetched = 0
+
+    while pending and len(values) < max_samples:
+        error = relative_error(list(values.values()), population, z)
+        if len(values) >= min_samples and error <= target_error:
+            break
+        take = min(batch_size, max_samples - len(values), len(pending))
+        if len(values) < min_samples:
+            take = max(take, min(min_samples - len(values), len(pending)))
+        batch, pending = pending[:take], pending[take:]
+        values.update(fetch_values(batch))
+        fetched += len(batch)
+
+    observed = list(values.values())
+    mean = sum(observed) / len(observed) if observed else 0.0
+    error = relative_error(observed, population, z)
+    return {
+        'values': values,
+        'commits': population,
+        'sampled': len(observed),
+        'fetched': fetched,
+        'calls_saved': max(0, fixed_cost - fetched),
+        'mean': mean,
+        'estimate': mean * population,
+        # None when there were too few samples to tell (keeps the summary JSON-serializable)
+        'relative_error': error if math.isfinite(error) else None,
+        'converged': error <= target_error
+    }
+
+def sample_details_adaptively(client, org: str, repo: str, commits: List[Dict],
+                              target_error: float = DEFAULT_RELATIVE_ERROR, max_samples: int = DEFAULT_MAX_SAMPLES,
+                              max_workers: int = 8) -> Tuple[Dict, Dict]:
+    """
+    Fetch commit details for one developer's commits until their changes per commit converge
+    Returns (details by SHA, adaptive_sample summary without the raw values)
+    """
+    details_by_sha = {}
+
+    def fetch(shas: List[str]) -> Dict[str, float]:
+        fetched = client.get_commits_batch(org, repo, shas, max_workers=max_workers)
+        details_by_sha.update(fetched)
+        changes = {sha: commit_changes(details) for sha, details in fetched.items()}
+        return {sha: value for sha, value in changes.items() if value is not None}
+
+    known = fetch([commit['sha'] for commit in commits if client.has_commit_details(org, repo, commit['sha'])])
+    summary = adaptive_sample(commits, fetch, target_error, max_samples=max_samples, known=known)
+    summary.pop('values')
+    return details_by_sha, summary
@@ -3,17 +3,19 @@
 Test GitHub Copilot API Access with Different Token Types
 """
 
-import requests
+import argparse
 import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from github_client import get_client, add_cache_arguments, configure_cache_from_args
 
 def test_copilot_api_access(token: str, org: str):
     """Test different Copilot API endpoints to see what works"""
     
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28'
-    }
+    client = get_client(token)
     
     endpoints_to_test = [
         {
@@ -43,7 +45,7 @@ def test_copilot_api_access(token: str, org: str):
         print(f"URL: {endpoint['url']}")
         
         try:
-            response = requests.get(endpoint['url'], headers=headers)
+            response = client.get(endpoint['url'])
             
             results[endpoint['name']] = {
                 'status_code': response.status_code,
@@ -112,6 +114,10 @@ def test_copilot_api_access(token: str, org: str):
         return False
 
 def main():
+    parser = argparse.ArgumentParser(description='Test GitHub Copilot API access')
+    add_cache_arguments(parser)
+    configure_cache_from_args(parser.parse_args())
+    
     print("GitHub Copilot API Access Tester")
     print("================================")
     
@@ -0,0 +1,37 @@
+"""
+Commit store queries must select the same commits as the list-commits API: committer date range and
+case-insensitive author login
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from commit_store import CommitStore
+
+def listed(sha, login, authored, committed):
+    return {'sha': sha, 'author': {'login': login},
+            'commit': {'message': sha, 'author': {'date': authored}, 'committer': {'date': committed}}}
+
+def test_date_range_uses_committer_date():
+    store = CommitStore(':memory:')
+    store.put_listed('acme', 'widgets', [
+        # Authored before the window, rebased into it
+        listed('rebased', 'octocat', '2023-12-01T00:00:00Z', '2024-01-10T00:00:00+01:00'),
+        # Authored inside the window, committed after it
+        listed('late', 'octocat', '2024-01-20T00:00:00Z', '2024-02-02T00:00:00Z'),
+        listed('inside', 'octocat', '2024-01-15T00:00:00Z', '2024-01-15T00:00:00Z'),
+    ])
+
+    commits = store.query('acme', 'widgets', since='2024-01-01T00:00:00Z', until='2024-01-31T00:00:00Z')
+    assert [c['sha'] for c in commits] == ['inside', 'rebased']
+    assert commits[1]['commit']['committer']['date'] == '2024-01-09T23:00:00Z'
+    assert commits[1]['commit']['author']['date'] == '2023-12-01T00:00:00Z'
+
+def test_author_matches_any_case():
+    store = CommitStore(':memory:')
+    store.put_listed('acme', 'widgets', [listed('a', 'OctoCat', '2024-01-15T00:00:00Z', '2024-01-15T00:00:00Z')])
+
+    assert [c['sha'] for c in store.query('acme', 'widgets', author='octocat')] == ['a']
+    assert store.query('acme', 'widgets', author='someone-else') == []
@@ -0,0 +1,119 @@
+"""
+The columnar commit table must give the same per-user stats as the per-commit dict loop it replaced in
+the productivity analyzers
+"""
+
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from commit_table import CommitTable, NO_INDICATORS
+from github_client import changed_files_count
+
+def listed(sha, login, date):
+    return {'sha': sha, 'author': {'login': login} if login else None,
+            'commit': {'message': sha, 'author': {'date': date}}}
+
+def indicators(score, assisted=False, bot=False):
+    return {'ai_likelihood_score': score, 'likely_ai_assisted': assisted, 'bot_author': bot}
+
+COMMITS = [
+    listed('a1', 'alice', '2024-03-01T09:00:00Z'),
+    listed('a2', 'alice', '2024-03-01T17:00:00Z'),
+    # 23:30 UTC on the 1st, but the 2nd in the author's own timezone
+    listed('a3', 'alice', '2024-03-02T01:30:00+02:00'),
+    listed('b1', 'bob', '2024-03-03T12:00:00Z'),
+    listed('b2', 'bob', '2024-03-05T12:00:00Z'),
+    listed('bot1', 'dependabot[bot]', '2024-03-04T00:00:00Z'),
+    listed('nobody', None, '2024-03-04T00:00:00Z'),
+    {'sha': 'nologin', 'author': {}, 'commit': {'message': '', 'author': {'date': '2024-03-04T00:00:00Z'}}},
+]
+INDICATORS = [
+    indicators(3, True), indicators(0), indicators(1), indicators(2, True), indicators(0),
+    indicators(0, bot=True), indicators(3, True), indicators(0),
+]
+DETAILS = {
+    'a1': {'sha': 'a1', 'stats': {'additions': 10, 'deletions': 2, 'total': 12}, 'files': [{}, {}]},
+    'a3': {'sha': 'a3', 'stats': {'additions': 1, 'deletions': 1, 'total': 2}, 'files_changed': 1},
+    'b2': {'sha': 'b2', 'stats': {'additions': 0, 'deletions': 40, 'total': 40}, 'files': [{}]},
+    'bot1': {'sha': 'bot1', 'stats': {'additions': 500, 'deletions': 0, 'total': 500}, 'files': [{}]},
+    # Details without stats do not count as detailed
+    'b1': {'sha': 'b1'},
+}
+
+def loop_summaries(commits, details_by_sha, all_indicators):
+    """The per-commit loop the analyzers used before the commit table"""
+    user_stats = defaultdict(lambda: {
+        'commits': 0, 'total_additions': 0, 'total_deletions': 0, 'total_changes': 0, 'commit_dates': [],
+        'files_changed': 0, 'detailed_commits': 0, 'ai_assisted_commits': 0, 'ai_likelihood_scores': []
+    })
+    for commit, ai_indicators in zip(commits, all_indicators):
+        author_login = None
+        if commit.get('author') and isinstance(commit['author'], dict):
+            author_login = commit['author'].get('login')
+        if not author_login or ai_indicators['bot_author']:
+            continue
+
+        stats = user_stats[author_login]
+        stats['commits'] += 1
+        stats['commit_dates'].append(datetime.fromisoformat(commit['commit']['author']['date'].replace('Z', '+00:00')))
+        stats['ai_likelihood_scores'].append(ai_indicators['ai_likelihood_score'])
+        if ai_indicators['likely_ai_assisted']:
+            stats['ai_assisted_commits'] += 1
+
+        details = details_by_sha.get(commit['sha'])
+        if details and 'stats' in details:
+            stats['total_additions'] += details['stats'].get('additions', 0)
+            stats['total_deletions'] += details['stats'].get('deletions', 0)
+            stats['total_changes'] += details['stats'].get('total', 0)
+            stats['files_changed'] += changed_files_count(details)
+            stats['detailed_commits'] += 1
+
+    for stats in user_stats.values():
+        stats['active_days'] = len({date.date() for date in stats.pop('commit_dates')})
+        stats['commits_per_active_day'] = stats['commits'] / stats['active_days']
+        stats['ai_assistance_rate'] = stats['ai_assisted_commits'] / stats['commits'] * 100
+        scores = stats.pop('ai_likelihood_scores')
+        stats['avg_ai_likelihood'] = sum(scores) / len(scores)
+    return dict(user_stats)
+
+def assert_same(summaries, expected):
+    assert list(summaries) == list(expected)
+    for user, stats in expected.items():
+        assert set(summaries[user]) == set(stats)
+        for name, value in stats.items():
+            assert summaries[user][name] == pytest.approx(value), (user, name)
+
+def test_matches_the_per_commit_loop():
+    table = CommitTable.from_commits(COMMITS, DETAILS, INDICATORS)
+    expected = loop_summaries(COMMITS, DETAILS, INDICATORS)
+
+    assert_same(table.user_summaries(), expected)
+    # Bot accounts and commits without a GitHub author are left out
+    assert set(expected) == {'alice', 'bob'}
+    assert expected['alice']['active_days'] == 2
+
+def test_without_indicators_every_authored_commit_counts():
+    table = CommitTable.from_commits(COMMITS, DETAILS)
+    expected = loop_summaries(COMMITS, DETAILS, [NO_INDICATORS] * len(COMMITS))
+
+    assert_same(table.user_summaries(), expected)
+    assert expected['dependabot[bot]']['total_changes'] == 500
+
+def test_aggregate_columns():
+    table = CommitTable.from_commits(COMMITS, DETAILS, INDICATORS)
+    authors, metrics = table.aggregate()
+
+    assert [table.authors[code] for code in authors.tolist()] == ['alice', 'bob']
+    assert metrics['commits'].tolist() == [3, 2]
+    assert metrics['total_changes'].tolist() == [14, 40]
+    assert metrics['detailed_commits'].tolist() == [2, 1]
+    assert metrics['active_days'].tolist() == [2, 2]
+
+def test_empty():
+    assert CommitTable.from_commits([], {}).user_summaries() == {}
@@ -0,0 +1,113 @@
+"""
+Git mirror backend: commits read from a local mirror must have the same shape and line stats as the
+REST commit details they stand in for
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from git_mirror import GitMirror
+from github_client import changed_files_count
+
+def git(cwd, *args, date=None, email='dev@example.com'):
+    env = dict(os.environ, GIT_AUTHOR_NAME='Dev', GIT_AUTHOR_EMAIL=email,
+               GIT_COMMITTER_NAME='Dev', GIT_COMMITTER_EMAIL=email)
+    if date:
+        env.update(GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    return subprocess.run(['git'] + list(args), cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout.strip()
+
+def commit(cwd, files, message, date, email='dev@example.com'):
+    """Write (or with None, delete) files and commit them; returns the new SHA"""
+    for name, content in files.items():
+        path = os.path.join(cwd, name)
+        if content is None:
+            os.remove(path)
+        else:
+            with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+                f.write(content)
+    git(cwd, 'add', '-A')
+    git(cwd, 'commit', '-q', '-m', message, date=date, email=email)
+    return git(cwd, 'rev-parse', 'HEAD')
+
+@pytest.fixture
+def source(tmp_path):
+    """A repository with known commits: (path, {name: sha})"""
+    repo = tmp_path / 'widgets'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    shas = {
+        'initial': commit(repo, {'a.txt': 'one\ntwo\nthree\n', 'b.txt': 'x\n'}, 'Initial commit',
+                          '2024-03-01T10:00:00+00:00', email='12345+octocat@users.noreply.github.com'),
+        'edit': commit(repo, {'a.txt': 'one\n2\nthree\nfour\n', 'b.txt': None}, 'Edit a, drop b\n\nLonger body',
+                       '2024-03-05T09:30:00+02:00'),
+        'binary': commit(repo, {'logo.png': bytes(range(256))}, 'Add logo', '2024-03-10T12:00:00+00:00',
+                         email='octocat@users.noreply.github.com'),
+    }
+    return repo, shas
+
+@pytest.fixture
+def mirror(tmp_path, source):
+    repo, _ = source
+    return GitMirror(str(tmp_path / 'mirrors'), str(repo.parent / '{repo}'))
+
+def test_commits_match_the_api_shape(mirror, source):
+    _, shas = source
+    commits = mirror.list_commits('acme', 'widgets')
+
+    # Newest first, like the list-commits API
+    assert [c['sha'] for c in commits] == [shas['binary'], shas['edit'], shas['initial']]
+    by_sha = {c['sha']: c for c in commits}
+
+    initial = by_sha[shas['initial']]
+    assert initial['author'] == {'login': 'octocat'}
+    assert initial['commit']['message'] == 'Initial commit'
+    assert initial['commit']['author']['date'] == '2024-03-01T10:00:00+00:00'
+    assert initial['commit']['committer']['date'] == '2024-03-01T10:00:00+00:00'
+    assert initial['stats'] == {'additions': 4, 'deletions': 0, 'total': 4}
+    assert changed_files_count(initial) == 2
+
+    edit = by_sha[shas['edit']]
+    # An email GitHub cannot link to an account has no author, as in the REST results
+    assert edit['author'] is None
+    assert edit['commit']['message'] == 'Edit a, drop b\n\nLonger body'
+    assert edit['commit']['author']['date'] == '2024-03-05T09:30:00+02:00'
+    assert edit['stats'] == {'additions': 2, 'deletions': 2, 'total': 4}
+    assert changed_files_count(edit) == 2
+
+    # Binary files count as changed but add no lines, as in the API's numstat-based stats
+    binary = by_sha[shas['binary']]
+    assert binary['stats'] == {'additions': 0, 'deletions': 0, 'total': 0}
+    assert changed_files_count(binary) == 1
+
+def test_date_range_and_author(mirror, source):
+    _, shas = source
+    window = mirror.list_commits('acme', 'widgets', '2024-03-02T00:00:00Z', '2024-03-09T00:00:00Z')
+    assert [c['sha'] for c in window] == [shas['edit']]
+
+    by_author = mirror.list_commits('acme', 'widgets', author='OctoCat')
+    assert [c['sha'] for c in by_author] == [shas['binary'], shas['initial']]
+
+def test_dates_without_offset_are_utc(mirror, source, monkeypatch):
+    _, shas = source
+    # 'edit' was committed at 07:30 UTC; read as New York time, 05:00 would be 10:00 UTC and miss it
+    monkeypatch.setenv('TZ', 'America/New_York')
+    window = mirror.list_commits('acme', 'widgets', '2024-03-05T05:00:00', '2024-03-05T08:00:00')
+    assert [c['sha'] for c in window] == [shas['edit']]
+
+def test_commits_after_a_sha(mirror, source):
+    _, shas = source
+    assert mirror.update('acme', 'widgets')
+    assert mirror.has_commit('acme', 'widgets', shas['edit'])
+    assert not mirror.has_commit('acme', 'widgets', '0' * 40)
+
+    after = list(mirror.iter_commits('acme', 'widgets', revisions=f"{shas['initial']}..HEAD"))
+    assert [c['sha'] for c in after] == [shas['binary'], shas['edit']]
+
+def test_unreachable_source(tmp_path):
+    mirror = GitMirror(str(tmp_path / 'mirrors'), str(tmp_path / 'missing' / '{repo}'))
+    assert mirror.list_commits('acme', 'widgets') is None
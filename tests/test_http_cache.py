@@ -0,0 +1,36 @@
+"""
+Response cache keys: the same request shares an entry only within one set of credentials
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from credentials import TokenCredential
+from github_client import GitHubClient
+from http_cache import ResponseCache
+
+URL = 'https://api.github.com/repos/acme/widgets/commits'
+
+def test_keys_are_scoped_to_the_credentials():
+    first = GitHubClient(['token-a', 'token-b'])
+    reordered = GitHubClient([TokenCredential('token-b'), TokenCredential('token-a')])
+    other = GitHubClient('token-c')
+
+    assert first.cache_scope == reordered.cache_scope
+    assert first.cache_scope != other.cache_scope
+    assert (ResponseCache.make_key(URL, {'page': 2}, first.cache_scope)
+            != ResponseCache.make_key(URL, {'page': 2}, other.cache_scope))
+
+def test_scope_does_not_contain_the_token():
+    assert 'token-a' not in GitHubClient('token-a').cache_scope
+
+def test_entries_round_trip(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = ResponseCache.make_key(URL, {'page': 1}, ResponseCache.make_scope(['token:x']))
+    cache.put(key, '"abc"', None, {'ETag': '"abc"', 'X-Other': '1'}, '[]')
+
+    assert cache.get(key) == {'etag': '"abc"', 'last_modified': None, 'headers': {'ETag': '"abc"'}, 'body': '[]'}
+    assert cache.get(ResponseCache.make_key(URL, {'page': 1})) is None
+    assert ResponseCache(str(tmp_path)).get(key)['body'] == '[]'
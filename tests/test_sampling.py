@@ -0,0 +1,115 @@
+"""
+Stratified sampling: Neyman allocation of the detail budget and the per-author estimates and
+confidence intervals built from it
+"""
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from sampling import neyman_allocation, estimate_totals, spreads, stratified_sample, sample_std
+
+def commit(sha, login, date):
+    return {'sha': sha, 'author': {'login': login}, 'commit': {'author': {'date': date}}}
+
+def test_allocation_is_proportional_to_size_times_spread():
+    sizes = {'a': 100, 'b': 100, 'c': 200}
+    stds = {'a': 1.0, 'b': 3.0, 'c': 1.0}
+    extra = neyman_allocation(sizes, stds, 60, {})
+
+    assert extra == {'a': 10, 'b': 30, 'c': 20}
+
+def test_allocation_caps_small_strata_and_redistributes():
+    sizes = {'tiny': 3, 'big': 100}
+    stds = {'tiny': 1000.0, 'big': 1.0}
+    extra = neyman_allocation(sizes, stds, 20, {'tiny': 1})
+
+    # The tiny stratum's share exceeds its size: it is taken whole, the rest goes to the big one
+    assert extra == {'tiny': 2, 'big': 18}
+
+def test_allocation_uses_the_whole_budget_without_exceeding_sizes():
+    sizes = {'a': 7, 'b': 11, 'c': 13}
+    stds = {'a': 2.0, 'b': 5.0, 'c': 0.5}
+    already = {'a': 1, 'b': 2, 'c': 1}
+    extra = neyman_allocation(sizes, stds, 17, already)
+
+    assert sum(extra.values()) == 17
+    assert all(already[key] + extra[key] <= sizes[key] for key in sizes)
+
+def test_allocation_without_any_spread_falls_back_to_sizes():
+    extra = neyman_allocation({'a': 30, 'b': 10}, {'a': 0.0, 'b': 0.0}, 8, {})
+    assert extra == {'a': 6, 'b': 2}
+
+def test_allocation_with_everything_sampled():
+    assert neyman_allocation({'a': 2}, {'a': 1.0}, 5, {'a': 2}) == {'a': 0}
+
+def test_fully_sampled_stratum_has_no_variance():
+    strata = {('alice', 0): [{'sha': 's1'}, {'sha': 's2'}]}
+    values = {'s1': 10.0, 's2': 30.0}
+    results = estimate_totals(strata, {('alice', 0): ['s1', 's2']}, values, {('alice', 0): 14.0})
+
+    assert results['alice']['estimate'] == 40.0
+    assert results['alice']['variance'] == 0.0
+    assert results['alice']['ci_low'] == results['alice']['ci_high'] == 40.0
+
+def test_unsampled_stratum_borrows_the_author_mean():
+    strata = {
+        ('alice', 0): [{'sha': f'a{i}'} for i in range(4)],
+        ('alice', 1): [{'sha': f'b{i}'} for i in range(5)],
+    }
+    sampled = {('alice', 0): ['a0', 'a1'], ('alice', 1): []}
+    values = {'a0': 10.0, 'a1': 20.0}
+    stds = {('alice', 0): 5.0, ('alice', 1): 5.0}
+    results = estimate_totals(strata, sampled, values, stds)
+
+    # Both strata estimated at the author's mean of 15 per commit
+    assert results['alice']['estimate'] == pytest.approx(9 * 15.0)
+    # Sampled: 4^2 * (1 - 2/4) * 25 / 2; unsampled (n=0) counts as one observation: 5^2 * 25
+    assert results['alice']['variance'] == pytest.approx(100.0 + 625.0)
+    assert results['alice']['sampled'] == 2
+    assert results['alice']['commits'] == 9
+
+def test_unsampled_author_borrows_the_overall_mean():
+    strata = {('alice', 0): [{'sha': 'a0'}], ('bob', 0): [{'sha': 'b0'}, {'sha': 'b1'}]}
+    results = estimate_totals(strata, {('alice', 0): ['a0'], ('bob', 0): []}, {'a0': 8.0},
+                              {('alice', 0): 0.0, ('bob', 0): 2.0})
+
+    assert results['bob']['estimate'] == 16.0
+    assert results['bob']['variance'] == pytest.approx(4 * 4.0)
+
+def test_pilot_without_spread_uses_the_author_spread():
+    strata = {
+        ('alice', 0): [{'sha': f'a{i}'} for i in range(10)],
+        ('alice', 1): [{'sha': f'b{i}'} for i in range(10)],
+    }
+    sampled = {('alice', 0): ['a0', 'a1'], ('alice', 1): ['b0', 'b1']}
+    values = {'a0': 5.0, 'a1': 5.0, 'b0': 1.0, 'b1': 40.0}
+    stds = spreads(strata, sampled, values)
+
+    assert stds[('alice', 0)] == pytest.approx(sample_std([5.0, 5.0, 1.0, 40.0]))
+    assert stds[('alice', 1)] == pytest.approx(sample_std([1.0, 40.0]))
+
+    results = estimate_totals(strata, sampled, values, stds)
+    assert results['alice']['ci_high'] > results['alice']['estimate'] > results['alice']['ci_low']
+
+def test_stratified_sample_stays_within_budget():
+    commits = [commit(f'{i:02d}', 'alice' if i % 3 else 'bob', f'2024-03-{1 + i % 28:02d}T12:00:00Z')
+               for i in range(60)]
+    changes = {c['sha']: float(int(c['sha']) % 7 * 10) for c in commits}
+    fetched = []
+
+    def fetch_values(shas):
+        fetched.extend(shas)
+        return {sha: changes[sha] for sha in shas}
+
+    results = stratified_sample(commits, fetch_values, budget=20, known={'00': changes['00']})
+
+    assert len(fetched) <= 20 and len(set(fetched)) == len(fetched) and '00' not in fetched
+    assert sum(r['commits'] for r in results.values()) == 60
+    for totals in results.values():
+        assert totals['ci_low'] <= totals['estimate'] <= totals['ci_high']
+        assert math.isfinite(totals['variance'])